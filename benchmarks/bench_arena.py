@@ -0,0 +1,62 @@
+"""Measure how many steps per second an arena runs as the number of snakes grows.
+
+Usage:
+    python benchmarks/bench_arena.py [--snakes 10 100 1000] [--seconds 1]
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snake_arena import ArenaEngine  # noqa: E402
+
+
+def bench_snakes(snakes: int, seconds: float) -> float:
+    """Run an arena with the given number of snakes and return steps per second.
+
+    The snakes keep going straight on a board with a row for every snake, so none
+    of them die and every step moves all of them.
+    """
+    arena = ArenaEngine(200, snakes, food_count=0, seed=0)
+    for row in range(snakes):
+        arena.place_snake([row * 200 + x for x in (2, 1, 0)])
+    arena.food_count = snakes
+
+    steps = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(10):
+            arena.step()
+        steps += 10
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return steps / elapsed
+
+
+def run(snake_counts: List[int], seconds: float) -> Dict[str, float]:
+    """Measure the steps per second with each number of snakes.
+
+    Returns:
+        Dict[str, float]: The steps per second by 'snakes'.
+    """
+    return {str(snakes): bench_snakes(snakes, seconds) for snakes in snake_counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--snakes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--seconds', type=float, default=1)
+    args = parser.parse_args()
+
+    print(f'{"Snakes":>8} {"Steps/s":>12} {"Snake steps/s":>14}')
+    for snakes, steps_per_second in run(args.snakes, args.seconds).items():
+        print(f'{snakes:>8} {steps_per_second:>12.0f} '
+              f'{steps_per_second * int(snakes):>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Measure how many board steps per second BatchSnakeEnv runs.
+
+Usage:
+    python benchmarks/bench_batch.py [--num-envs 4096] [--seconds 2]
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snake_batch import BatchSnakeEnv  # noqa: E402
+
+
+def bench_boards(num_envs: int, seconds: float) -> float:
+    """Measure the board steps per second with `num_envs` boards."""
+    env = BatchSnakeEnv(num_envs, seed=0)
+    rng = np.random.default_rng(0)
+    # Keep going straight most of the time, so the games are not too short
+    actions = rng.integers(-1, 4, size=(64, num_envs))
+    actions[rng.random(actions.shape) < 0.8] = -1
+
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for row in actions:
+            _, dones = env.step(row)
+            env.reset(dones)
+        steps += len(actions) * num_envs
+    return steps / (time.perf_counter() - start)
+
+
+def run(env_counts: List[int], seconds: float) -> Dict[str, float]:
+    """Measure the board steps per second with each number of boards.
+
+    Returns:
+        Dict[str, float]: The board steps per second by 'boards'.
+    """
+    return {str(count): bench_boards(count, seconds) for count in env_counts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--num-envs', type=int, default=4096)
+    parser.add_argument('--seconds', type=float, default=2)
+    args = parser.parse_args()
+
+    steps_per_second = bench_boards(args.num_envs, args.seconds)
+    print(f'{args.num_envs} boards: {steps_per_second:,.0f} steps/s')
+
+
+if __name__ == '__main__':
+    main()
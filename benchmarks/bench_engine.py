@@ -0,0 +1,103 @@
+"""Measure how many steps per second the engine runs as the snake grows.
+
+Usage:
+    python benchmarks/bench_engine.py [--frame-size 2000] [--seconds 1]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snake_engine import BLOCK_SIZE, SnakeEngine  # noqa: E402
+from snake_autopilot import cycle_path  # noqa: E402
+
+
+def direction_between(a: Tuple[int, int], b: Tuple[int, int]) -> str:
+    """The direction to move from `a` to the neighbouring cell `b`."""
+    if b[0] > a[0]:
+        return 'RIGHT'
+    if b[0] < a[0]:
+        return 'LEFT'
+    if b[1] > a[1]:
+        return 'DOWN'
+    return 'UP'
+
+
+def place_on_cycle(engine: SnakeEngine, length: int) -> Tuple[List[str], int]:
+    """Put a snake of the given length on a path that visits every cell of the
+    board, so it never hits itself as long as it follows the path.
+
+    Returns:
+        Tuple[List[str], int]: The direction to take from each cell of the path and
+            the index of the next one to take.
+    """
+    path = cycle_path(engine.columns, engine.rows)
+    actions = [
+        direction_between(path[i], path[(i + 1) % len(path)]) for i in range(len(path))
+    ]
+    block_size = engine.block_size
+    engine.place_snake(
+        ([x * block_size, y * block_size] for x, y in reversed(path[:length])),
+        actions[length - 2]
+    )
+    return actions, length - 1
+
+
+def bench_length(frame_size: int, length: int, seconds: float) -> float:
+    """Run the engine with a snake of the given length and return steps per second.
+
+    The snake follows a path that visits every cell, so it never hits itself.
+    """
+    engine = SnakeEngine(frame_size, frame_size, big_food_chance=0)
+    actions, index = place_on_cycle(engine, length)
+
+    steps = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(1000):
+            engine.step(actions[index])
+            index = (index + 1) % len(actions)
+        steps += 1000
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return steps / elapsed
+
+
+def run(frame_sizes: List[int], seconds: float) -> Dict[str, float]:
+    """Measure the steps per second for lengths from 10 to half of each board.
+
+    Returns:
+        Dict[str, float]: The steps per second by 'frame size/length'.
+    """
+    random.seed(0)
+    results = {}
+    for frame_size in frame_sizes:
+        cells = (frame_size // BLOCK_SIZE)**2
+        length = 10
+        while length < cells // 2:
+            results[f'{frame_size}/{length}'] = bench_length(
+                frame_size, length, seconds
+            )
+            length *= 10
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frame-size', type=int, nargs='+', default=[2000])
+    parser.add_argument('--seconds', type=float, default=1)
+    args = parser.parse_args()
+
+    print(f'{"Frame":>8} {"Length":>10} {"Steps/s":>12}')
+    for key, steps_per_second in run(args.frame_size, args.seconds).items():
+        frame_size, length = key.split('/')
+        print(f'{frame_size:>8} {length:>10} {steps_per_second:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Measure how many frames per second `do_drawings` draws as the snake grows and how
+fast the HUD texts are rendered.
+
+It runs without a window, using the dummy video driver of SDL.
+
+Usage:
+    python benchmarks/bench_render.py [--frame-size 720] [--seconds 1]
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib.util
+from typing import Dict, List
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import log21  # noqa: E402
+
+from snake_engine import BLOCK_SIZE  # noqa: E402
+from bench_engine import place_on_cycle  # noqa: E402
+
+
+def load_game_module():
+    """Import snake-game.py, which cannot be imported by name."""
+    spec = importlib.util.spec_from_file_location(
+        'snake_game', os.path.join(ROOT, 'snake-game.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_game(frame_size: int):
+    """Make a game without a big food, so every frame draws the same things."""
+    return load_game_module().SnakeGame(
+        frame_size, frame_size, big_food_chance=0, seed=0
+    )
+
+
+def bench_drawings(game, length: int, seconds: float, full: bool = False) -> float:
+    """Move a snake of the given length one step every frame and return the frames
+    per second of `do_drawings`.
+
+    Args:
+        game (SnakeGame): The game to draw.
+        length (int): The length of the snake.
+        seconds (float): How long to measure.
+        full (bool, optional): Draw the whole window every frame instead of only the
+            changes. Defaults to False.
+    """
+    engine = game.engine
+    engine.reset()
+    actions, index = place_on_cycle(engine, length)
+    game.snapshot = engine.snapshot()
+    game.redraw()
+    game.do_drawings()
+
+    frames = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(10):
+            engine.step(actions[index])
+            index = (index + 1) % len(actions)
+            game.snapshot = engine.snapshot()
+            if full:
+                game.redraw()
+            game.do_drawings()
+        frames += 10
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return frames / elapsed
+
+
+def bench_text(game, seconds: float, cached: bool) -> float:
+    """Render the score text with a new score every time and return the texts per
+    second.
+
+    Args:
+        game (SnakeGame): The game whose text cache and font are used.
+        seconds (float): How long to measure.
+        cached (bool): Use the text cache. The scores repeat every 32 texts, so the
+            texts are found in the cache after the first round.
+    """
+    render = game.text_cache.render
+    font = game.text_cache.font(game.font, 16)
+    color = (255, 255, 255)
+
+    texts = 0
+    start = time.perf_counter()
+    while True:
+        for score in range(32):
+            if cached:
+                render('Score : ' + str(score), game.font, 16, color)
+            else:
+                font.render('Score : ' + str(score), True, color)
+        texts += 32
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return texts / elapsed
+
+
+def bench_hud(game, seconds: float) -> float:
+    """Return how many times per second the HUD items are laid out by `hud()`."""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            game.hud()
+        calls += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return calls / elapsed
+
+
+def run(frame_sizes: List[int], seconds: float) -> Dict[str, float]:
+    """Measure the drawing and the HUD text rendering.
+
+    Returns:
+        Dict[str, float]: Frames per second by 'incremental or full/frame size/length'
+            and texts or layouts per second by 'text/cached', 'text/uncached' and
+            'hud'.
+    """
+    # Don't print the game's log messages among the results
+    log21.root.setLevel(log21.WARNING)
+    results = {}
+    game = None
+    for frame_size in frame_sizes:
+        game = make_game(frame_size)
+        cells = (frame_size // BLOCK_SIZE)**2
+        length = 10
+        while length < cells // 2:
+            for mode in ('incremental', 'full'):
+                results[f'{mode}/{frame_size}/{length}'] = bench_drawings(
+                    game, length, seconds, full=mode == 'full'
+                )
+            length *= 10
+    game.engine.reset()
+    game.snapshot = game.engine.snapshot()
+    results['text/cached'] = bench_text(game, seconds, cached=True)
+    results['text/uncached'] = bench_text(game, seconds, cached=False)
+    results['hud'] = bench_hud(game, seconds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frame-size', type=int, nargs='+', default=[720])
+    parser.add_argument('--seconds', type=float, default=1)
+    args = parser.parse_args()
+
+    for key, per_second in run(args.frame_size, args.seconds).items():
+        print(f'{key:>24} {per_second:>12.0f}/s')
+
+
+if __name__ == '__main__':
+    main()
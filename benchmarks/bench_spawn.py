@@ -0,0 +1,84 @@
+"""Measure how long spawning food takes as the board fills up.
+
+Usage:
+    python benchmarks/bench_spawn.py [--frame-size 720] [--seconds 1]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snake_engine import SnakeEngine  # noqa: E402
+
+FILLS = (0.5, 0.9, 0.99, 0.999)
+
+
+def bench_spawn(frame_size: int, fill: float, seconds: float,
+                big: bool = False) -> float:
+    """Spawn food on a board that is `fill` full of snake and return spawns per
+    second.
+
+    The snake blocks are put on random cells of the spawn zone. They don't need to
+    be next to each other, since spawning only cares about which cells are free.
+
+    Args:
+        frame_size (int): The width and the height of the board.
+        fill (float): The part of the spawn zone the snake covers.
+        seconds (float): How long to measure.
+        big (bool, optional): Spawn big food instead. Defaults to False.
+    """
+    engine = SnakeEngine(frame_size, frame_size, big_food_chance=0.5, seed=0)
+    zone = list(engine.free.cells)
+    blocks = random.Random(0).sample(zone, int(len(zone) * fill))
+    engine.place_snake(engine.position_of(cell) for cell in blocks)
+    spawn = engine.spawn_big_food if big else engine.spawn_food
+
+    spawns = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            spawn()
+        spawns += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return spawns / elapsed
+
+
+def run(frame_sizes: List[int], seconds: float) -> Dict[str, float]:
+    """Measure the spawns per second of food and big food on boards that are more
+    and more full.
+
+    Returns:
+        Dict[str, float]: The spawns per second by 'food or big_food/frame size/fill'.
+    """
+    results = {}
+    for frame_size in frame_sizes:
+        for fill in FILLS:
+            results[f'food/{frame_size}/{fill}'] = bench_spawn(
+                frame_size, fill, seconds
+            )
+            results[f'big_food/{frame_size}/{fill}'] = bench_spawn(
+                frame_size, fill, seconds, big=True
+            )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--frame-size', type=int, nargs='+', default=[720])
+    parser.add_argument('--seconds', type=float, default=1)
+    args = parser.parse_args()
+
+    print(f'{"Kind":>8} {"Frame":>8} {"Fill":>8} {"Spawns/s":>12}')
+    for key, spawns_per_second in run(args.frame_size, args.seconds).items():
+        kind, frame_size, fill = key.split('/')
+        print(f'{kind:>8} {frame_size:>8} {fill:>8} {spawns_per_second:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
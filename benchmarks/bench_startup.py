@@ -0,0 +1,84 @@
+"""Measure the time from launching snake-game.py to its first frame.
+
+Each launch is a new Python process, so the imports are measured as well. The time
+starts when the process starts running Python code and stops when the first frame
+is on the display.
+
+Usage:
+    python benchmarks/bench_startup.py [--launches 5] [-- GAME ARGUMENTS]
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from typing import Dict, List, Sequence
+
+GAME = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'snake-game.py'
+)
+
+# Runs the game and exits when the first frame is shown, printing the time to it
+LAUNCHER = '''
+import time
+started = time.perf_counter()
+import os, sys, runpy, pygame
+update = pygame.display.update
+def first_update(*args):
+    update(*args)
+    print(time.perf_counter() - started)
+    sys.stdout.flush()
+    os._exit(0)
+pygame.display.update = first_update
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+
+def time_to_first_frame(args: List[str]) -> float:
+    """Launch the game once and return the time to its first frame in seconds."""
+    env = dict(os.environ)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('SDL_AUDIODRIVER', 'dummy')
+    output = subprocess.run(
+        [sys.executable, '-c', LAUNCHER, GAME, *args],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    return float(output.split()[-1])
+
+
+def run(launches: int, args: Sequence[str] = ()) -> Dict[str, float]:
+    """Measure the launches per second, from the best of `launches` launches with
+    and without arguments, so bigger is better like in the other benchmarks.
+
+    Returns:
+        Dict[str, float]: The launches per second by 'no args' or the arguments.
+    """
+    results = {}
+    for launch_args in ((), tuple(args) or ('--seed', '1')):
+        best = min(time_to_first_frame(list(launch_args)) for _ in range(launches))
+        results[' '.join(launch_args) or 'no args'] = 1 / best
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--launches', type=int, default=5)
+    parser.add_argument('args', nargs='*', help='The arguments of the game.')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    times = sorted(time_to_first_frame(args.args) for _ in range(args.launches))
+    print(f'Time to first frame in {args.launches} launches '
+          f'({time.perf_counter() - start:.1f}s):')
+    print(f'{"best":>8} {times[0] * 1000:>8.0f}ms')
+    print(f'{"median":>8} {times[len(times) // 2] * 1000:>8.0f}ms')
+
+
+if __name__ == '__main__':
+    main()
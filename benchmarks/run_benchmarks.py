@@ -0,0 +1,136 @@
+"""Run all the benchmarks and save or compare their results.
+
+The results are saved as JSON, so a baseline can be saved on one commit and compared
+with the results of another:
+    python benchmarks/run_benchmarks.py --save baseline.json
+    git checkout other-branch
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+Everything runs without a window, using the dummy video driver of SDL. The batch
+environment is skipped if NumPy is not installed. The startup is measured in
+launches per second of the game, so bigger is better like in the others.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--seconds 0.5] [--repeat 3] [--save FILE]
+        [--compare FILE]
+"""
+
+import os
+import sys
+import json
+import platform
+import argparse
+import subprocess
+from typing import Any, Dict
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pygame  # noqa: E402
+
+import bench_arena  # noqa: E402
+import bench_spawn  # noqa: E402
+import bench_engine  # noqa: E402
+import bench_render  # noqa: E402
+import bench_startup  # noqa: E402
+
+try:
+    import bench_batch  # noqa: E402
+except ImportError:  # NumPy is optional
+    bench_batch = None
+
+GROUPS = ('engine', 'render', 'spawn', 'arena', 'batch', 'startup')
+
+
+def git_commit() -> str:
+    """The current commit or an empty string if it cannot be found."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run(seconds: float, repeat: int = 3) -> Dict[str, Any]:
+    """Run all the benchmarks.
+
+    Args:
+        seconds (float): How long to run each measurement.
+        repeat (int, optional): Run everything this many times and keep the best
+            result of each measurement, which is the least disturbed by other
+            programs. Defaults to 3.
+
+    Returns:
+        Dict[str, Any]: Where the results come from and the results of each
+            benchmark. Bigger numbers are better in all of them.
+    """
+    benchmarks = {
+        'engine': lambda: bench_engine.run([200, 720, 2000], seconds),
+        'render': lambda: bench_render.run([720], seconds),
+        'spawn': lambda: bench_spawn.run([720], seconds),
+        'arena': lambda: bench_arena.run([10, 100, 1000], seconds),
+        'startup': lambda: bench_startup.run(3)
+    }
+    if bench_batch is not None:
+        benchmarks['batch'] = lambda: bench_batch.run([256, 4096], seconds)
+    results = {}
+    for _ in range(repeat):
+        for group, benchmark in benchmarks.items():
+            group_results = benchmark()
+            best = results.setdefault(group, {})
+            for key, value in group_results.items():
+                best[key] = max(value, best.get(key, 0))
+    return {
+        'info': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'seconds': seconds,
+            'repeat': repeat
+        },
+        **results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=0.5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', help='Save the results to this JSON file.')
+    parser.add_argument('--compare', help='Compare the results with this JSON file.')
+    args = parser.parse_args()
+
+    results = run(args.seconds, args.repeat)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print(f'Compared with {baseline["info"]["commit"] or args.compare}')
+
+    for group in GROUPS:
+        if group not in results:
+            continue
+        print(f'\n{group}')
+        for key, value in results[group].items():
+            line = f'{key:>24} {value:>14,.{2 if value < 100 else 0}f}/s'
+            old = baseline and baseline.get(group, {}).get(key)
+            if old:
+                line += f' {value / old:>8.2f}x'
+            print(line)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f'\nSaved the results to {args.save}')
+
+
+if __name__ == '__main__':
+    main()
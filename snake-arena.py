@@ -0,0 +1,238 @@
+"""Snake Arena: many snakes on one board, played by people and bots."""
+
+import sys
+import colorsys
+from typing import Dict, List, Tuple, Optional
+
+import log21
+import pygame
+
+from snake_render import TextCache, CellRenderer
+from snake_engine import Scheduler
+from snake_arena import SNAKE_COLORS, ArenaEngine, GreedyBot
+
+BLACK = pygame.Color(0, 0, 0)
+WHITE = pygame.Color(255, 255, 255)
+RED = pygame.Color(255, 0, 0)
+
+# The keys of each player: the arrows and WASD
+PLAYER_KEYS = (
+    {
+        pygame.K_UP: 'UP',
+        pygame.K_DOWN: 'DOWN',
+        pygame.K_LEFT: 'LEFT',
+        pygame.K_RIGHT: 'RIGHT'
+    },
+    {
+        ord('w'): 'UP',
+        ord('s'): 'DOWN',
+        ord('a'): 'LEFT',
+        ord('d'): 'RIGHT'
+    },
+)
+PLAYER_COLORS = ((0, 255, 0), (0, 128, 255))
+
+
+def arena_palette(players: int) -> List[Tuple[int, int, int]]:
+    """Get the colors of the values of `ArenaEngine.grid`: black for empty cells,
+    white for food, the player colors for the first snake colors and dim colors all
+    around the color wheel for the others, which are the bot colors."""
+    colors = [(0, 0, 0), (255, 255, 255)]
+    for color in range(SNAKE_COLORS):
+        if color < players:
+            colors.append(PLAYER_COLORS[color])
+        else:
+            red, green, blue = colorsys.hsv_to_rgb((color * 0.618) % 1, 0.6, 0.7)
+            colors.append((int(red * 255), int(green * 255), int(blue * 255)))
+    return colors
+
+
+class ArenaGame:
+    """A window with an arena where the first snakes are played with the keyboard and
+    the others by bots."""
+
+    def __init__(
+        self,
+        columns: int = 120,
+        rows: int = 80,
+        cell_size: int = 8,
+        players: int = 1,
+        bots: int = 30,
+        food_count: int = 20,
+        speed: float = 10,
+        fps: int = 60,
+        seed: Optional[int] = None
+    ) -> None:
+        """Arena Game class.
+
+        Args:
+            columns (int, optional): The number of columns of the board. Defaults to
+                120.
+            rows (int, optional): The number of rows of the board. Defaults to 80.
+            cell_size (int, optional): The size of each cell in pixels. Defaults to
+                8.
+            players (int, optional): The number of snakes that are played with the
+                keyboard, 0 to 2. Defaults to 1.
+            bots (int, optional): The number of snakes that are played by bots.
+                Defaults to 30.
+            food_count (int, optional): The number of foods on the board. Defaults to
+                20.
+            speed (float, optional): The number of steps in a second. Defaults to 10.
+            fps (int, optional): Fps. Defaults to 60.
+            seed (Optional[int], optional): The seed of the game. Defaults to None.
+        """
+        self.fps = fps
+        self.text_cache = TextCache()
+        try:
+            pygame.display.init()
+            pygame.font.init()
+        except pygame.error as error:
+            log21.error(f'Failed to initialise the game: {error}, exiting...')
+            sys.exit(-1)
+        pygame.display.set_caption('Snake Arena')
+        self.game_window = pygame.display.set_mode(
+            (columns * cell_size, rows * cell_size)
+        )
+
+        self.arena = ArenaEngine(columns, rows, food_count, speed, seed)
+        self.players = []
+        for i in range(players):
+            snake = self.arena.add_snake(color=i)
+            if snake is None:
+                log21.error(
+                    f'There is no room for player {i + 1} on a {columns}x{rows} board'
+                )
+                sys.exit(1)
+            self.players.append(snake)
+        # The bots never get the colors of the players, however many there are
+        for i in range(bots):
+            self.arena.add_snake(color=players + i % (SNAKE_COLORS - players))
+        self.bot = GreedyBot(seed=seed)
+        # The last direction each player asked for
+        self.change_to: Dict[int, str] = {}
+        self.renderer = CellRenderer(WHITE, cell_size)
+        self.renderer.palette = arena_palette(players)
+        self.scheduler = Scheduler(self.arena, step=self.step)
+        self.__running = False
+
+    def step(self, action: Optional[str] = None) -> List[int]:
+        """Run a step with the directions of the players and the bots."""
+        players = len(self.players)
+        actions = {
+            snake.id: self.bot(self.arena, snake)
+            for snake in self.arena.living if snake.id >= players
+        }
+        actions.update(self.change_to)
+        return self.arena.step(actions)
+
+    @property
+    def over(self) -> bool:
+        """Whether all the players or, without players, all the snakes are dead."""
+        if self.players:
+            return not any(snake.alive for snake in self.players)
+        return self.arena.done
+
+    def show_scores(self) -> None:
+        """Show the scores of the players and the number of living snakes."""
+        lines = [
+            f'P{i + 1} : {snake.score}' + ('' if snake.alive else ' (dead)')
+            for i, snake in enumerate(self.players)
+        ]
+        lines.append(f'Snakes : {len(self.arena.living)}')
+        y = 10
+        for line in lines:
+            surface = self.text_cache.render(line, 'consolas', 16, WHITE)
+            self.game_window.blit(surface, (10, y))
+            y += surface.get_height()
+
+    def do_drawings(self) -> None:
+        """Draw the board and the scores."""
+        arena = self.arena
+        self.renderer.draw_grid(self.game_window, arena.grid, arena.columns, arena.rows)
+        self.show_scores()
+
+    def handle_events(self) -> None:
+        """Handle the keyboard and window events."""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.__running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.__running = False
+                for snake, keys in zip(self.players, PLAYER_KEYS):
+                    if event.key in keys:
+                        self.change_to[snake.id] = keys[event.key]
+
+    def game_over(self) -> None:
+        """Show the game over text for 3 seconds."""
+        surface = self.text_cache.render('GAME OVER', 'times new roman', 90, RED)
+        self.game_window.blit(
+            surface, surface.get_rect(center=self.game_window.get_rect().center)
+        )
+        pygame.display.flip()
+        end = pygame.time.get_ticks() + 3000
+        while self.__running and pygame.time.get_ticks() < end:
+            self.handle_events()
+            pygame.time.wait(10)
+
+    def run(self) -> None:
+        """Run the game."""
+        clock = pygame.time.Clock()
+        self.__running = True
+        while self.__running:
+            self.handle_events()
+            self.scheduler.advance()
+            self.do_drawings()
+            pygame.display.flip()
+            if self.over:
+                self.game_over()
+                break
+            clock.tick(self.fps)
+        self.__running = False
+
+
+def main(
+    columns: int = 120,
+    rows: int = 80,
+    cell_size: int = 8,
+    players: int = 1,
+    bots: int = 30,
+    food_count: int = 20,
+    speed: float = 10,
+    fps: int = 60,
+    seed: Optional[int] = None
+):
+    """Play in an arena with many snakes.
+
+    Args:
+        columns (int): The number of columns of the board. (default: 120)
+        rows (int): The number of rows of the board. (default: 80)
+        cell_size (int): The size of each cell in pixels. (default: 8)
+        players (int): The number of people playing, 0 to 2. The first one uses the
+            arrows and the second one WASD. (default: 1)
+        bots (int): The number of snakes played by bots. (default: 30)
+        food_count (int): The number of foods on the board. (default: 20)
+        speed (float): The number of steps in a second. (default: 10)
+        fps (int): The number of frames per second. (default: 60)
+        seed (Optional[int]): The seed of the game. A random one is used by default.
+    """
+    if not 0 <= players <= len(PLAYER_KEYS):
+        log21.error(f'players must be between 0 and {len(PLAYER_KEYS)}, not {players}')
+        sys.exit(1)
+
+    ArenaGame(
+        columns=columns,
+        rows=rows,
+        cell_size=cell_size,
+        players=players,
+        bots=bots,
+        food_count=food_count,
+        speed=speed,
+        fps=fps,
+        seed=seed
+    ).run()
+    pygame.quit()
+
+
+if __name__ == '__main__':
+    log21.argumentify(main)
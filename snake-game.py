@@ -1,14 +1,34 @@
 """Snake Eater Made with PyGame."""
 
+import os
 import sys
 import time
 import random
-from typing import Union, Iterable, Optional
-from threading import Thread
+from typing import (
+    TYPE_CHECKING, Dict, List, Tuple, Union, Callable, Iterable, Optional
+)
+from functools import partial
+from collections import deque
 
-import log21
 import pygame
 
+from snake_level import Level
+from snake_render import TextCache, LayerCache, CellRenderer
+from snake_engine import BLOCK_SIZE, GameState, Scheduler
+from snake_replay import Replay, ReplayRecorder
+from snake_profiler import NULL_PROFILER, Profiler
+from snake_autopilot import Autopilot
+
+# log21, asyncio, snake_control and snake_capture are imported when they are
+# needed, since importing them takes longer than opening the window
+if TYPE_CHECKING:
+    from snake_control import GameControl
+    from snake_capture import FrameCapture
+
+# When the modules of the game were loaded, to measure the time to the first frame.
+# benchmarks/bench_startup.py measures it from the start of the process instead.
+STARTED = time.perf_counter()
+
 # Colors (R, G, B)
 BLACK = pygame.Color(0, 0, 0)
 WHITE = pygame.Color(255, 255, 255)
@@ -16,10 +36,10 @@ RED = pygame.Color(255, 0, 0)
 GREEN = pygame.Color(0, 255, 0)
 BLUE = pygame.Color(0, 0, 255)
 LIGHT_GRAY = pygame.Color(200, 200, 200)
+GRAY = pygame.Color(100, 100, 100)
 
 
 class SnakeGame:
-    current_difficulty: float
 
     def __init__(
         self,
@@ -31,7 +51,13 @@ class SnakeGame:
         fps: int = 60,
         big_food_chance: float = 0.02,
         big_food_score: int = 3,
-        big_food_time: float = 6
+        big_food_time: float = 6,
+        unthrottled: bool = False,
+        seed: Optional[int] = None,
+        autopilot: bool = False,
+        profile: bool = False,
+        cell_size: int = BLOCK_SIZE,
+        level: Optional[Level] = None
     ) -> None:
         """Snake Game class.
 
@@ -46,31 +72,53 @@ class SnakeGame:
             big_food_chance (float, optional): Big food chance. Defaults to 0.02.
             big_food_score (int, optional): Big food score. Defaults to 3.
             big_food_time (float, optional): Big food time. Defaults to 6.
+            unthrottled (bool, optional): Run the game and draw the frames as fast as
+                possible. Useful for benchmarks. Defaults to False.
+            seed (Optional[int], optional): The seed of the game. The same seed and
+                the same moves always give the same game. Defaults to None which picks
+                a random seed.
+            autopilot (bool, optional): Let the computer play instead of the
+                keyboard. Defaults to False.
+            profile (bool, optional): Time each phase of the frames and show the
+                times under the difficulty. Defaults to False.
+            cell_size (int, optional): The size of each cell of the board in pixels.
+                The board has `frame_size_x // cell_size` columns. Resizing the window
+                changes the cell size to fit the board in it. Defaults to BLOCK_SIZE.
+            level (Optional[Level], optional): Play on a level with walls. The frame
+                is the size of the level. Defaults to None.
         """
-        self.__frame_size_x = (frame_size_x // 10) * 10
-        self.__frame_size_y = (frame_size_y // 10) * 10
+        if level is not None:
+            frame_size_x = level.columns * cell_size
+            frame_size_y = level.rows * cell_size
         self.font = font
-        self.base_difficulty = base_difficulty
-        self.current_difficulty = base_difficulty
-        self.difficulty_modifier = difficulty_modifier
         self.fps = fps
-        self.big_food_chance = big_food_chance
-        self.big_food_score = big_food_score
-        self.big_food_time = big_food_time
-        self.big_food_time_left = 0
-        self.getting_big_score = 0
-
-        # Checks for errors encountered
-        check_errors = pygame.init()
-        # pygame.init() example output -> (6, 0)
-        # second number in tuple gives number of errors
-        if check_errors[1] > 0:
-            log21.error(
-                f'Had {check_errors[1]} errors when initialising game, exiting...'
-            )
+        self.unthrottled = unthrottled
+        self.text_cache = TextCache()
+        # Find the fonts while the window opens
+        self.text_cache.font_paths.preload((font, 'times new roman', 'times'))
+        # The borders that only change when the window is resized
+        self.layers = LayerCache()
+        self.body_renderer = CellRenderer(GREEN, cell_size)
+        self.profiler = Profiler() if profile else NULL_PROFILER
+        self.__profile_lines: Tuple[str, ...] = ()
+        self.__profile_time = -1.0
+        # The time from loading the modules of the game to showing its first frame
+        # in seconds
+        self.first_frame_time: Optional[float] = None
+        # Where the frames are recorded, see `start_capture`
+        self.capture: Optional['FrameCapture'] = None
+        self.capture_fps = 30.0
+        self.__captured_frames = 0
+
+        # Only the display and the fonts are used, so the other subsystems (e.g.
+        # audio and joysticks) are not initialised
+        try:
+            pygame.display.init()
+            pygame.font.init()
+        except pygame.error as error:
+            import log21
+            log21.error(f'Failed to initialise the game: {error}, exiting...')
             sys.exit(-1)
-        else:
-            log21.info('Game successfully initialised')
 
         # Initialise game window
         pygame.display.set_caption('Snake Eater')
@@ -79,37 +127,79 @@ class SnakeGame:
         )
 
         # Game variables
-        self.snake_pos = [100, 50]
-        self.snake_body = [[100, 50], [100 - 10, 50], [100 - (2 * 10), 50]]
-
-        self.food_pos = [
-            random.randrange(1, (self.frame_size_x // 10)) * 10,
-            random.randrange(1, (self.frame_size_y // 10)) * 10
-        ]
-        self.food_spawn = True
-        self.big_food_pos = [0, 0]
-
-        self.direction = 'RIGHT'
-        self.change_to = self.direction
-
-        self.score = 0
-        self.eating_score = False
-        self.in_the_danger_zone = False
+        if seed is None:
+            seed = random.randrange(2**32)
+        # The moves are recorded, so the game can be saved as a replay with
+        # `self.recorder.save()`
+        self.recorder = ReplayRecorder(
+            seed,
+            measure_text=self.measure_score_text,
+            frame_size_x=frame_size_x,
+            frame_size_y=frame_size_y,
+            base_difficulty=base_difficulty,
+            difficulty_modifier=difficulty_modifier,
+            big_food_chance=big_food_chance,
+            big_food_score=big_food_score,
+            big_food_time=big_food_time,
+            block_size=cell_size,
+            level=level
+        )
+        self.engine = self.recorder.engine
+        self.change_to = self.engine.direction
+        self.autopilot = Autopilot() if autopilot else None
+        self.scheduler = Scheduler(
+            self.engine,
+            unthrottled=unthrottled,
+            step=self.recorder.step if self.autopilot is None else self.autopilot_step
+        )
+        # The state of the game at the end of the last update. It is what is drawn.
+        self.snapshot = self.engine.snapshot()
+
+        # What is on the screen, so only the changes are drawn in the next frame
+        self.__redraw = True
+        self.__drawn_frame_size = (0, 0)
+        self.__drawn_steps = 0
+        self.__drawn_body = deque()
+        self.__drawn_food = None
+        self.__drawn_big_food = None
+        self.__drawn_hud = {}
 
         self.__running = False
 
     def game_over(self):
         """Game Over function."""
+        self.show_game_over()
+        time.sleep(3)
+
+    async def game_over_async(self):
+        """Show the game over screen without blocking the event loop."""
+        import asyncio
+        self.show_game_over()
+        await asyncio.sleep(3)
+
+    def show_game_over(self):
+        """Draw the game over screen."""
         self.__running = False
-        my_font = pygame.font.SysFont('times new roman', 90)
-        game_over_surface = my_font.render('YOU DIED', True, RED)
+        game_over_surface = self.text_cache.render(
+            'YOU DIED', 'times new roman', 90, RED
+        )
         game_over_rect = game_over_surface.get_rect()
         game_over_rect.midtop = (self.frame_size_x // 2, self.frame_size_y // 4)
         self.game_window.fill(BLACK)
         self.game_window.blit(game_over_surface, game_over_rect)
         self.show_score(color=RED, font='times', size=20)
         pygame.display.flip()
-        time.sleep(3)
+
+    def autopilot_step(self, action: Optional[str] = None):
+        """Run a step with the direction the autopilot picks. The keyboard is only
+        used to pause the game."""
+        with self.profiler.section('autopilot'):
+            action = self.autopilot(self.engine)
+        return self.recorder.step(action)
+
+    def measure_score_text(self, text: str) -> Tuple[int, int]:
+        """Get the size of the score text when it is rendered."""
+        return self.text_cache.font(self.font, 16).size(text)
 
     def show_score(
         self,
@@ -121,87 +211,140 @@ class SnakeGame:
     ):
         """Show score function."""
         font = font or self.font
-        score_font = pygame.font.SysFont(font, size)
-        score_surface = score_font.render('Score : ' + str(self.score), True, color)
+        score_surface = self.text_cache.render(
+            'Score : ' + str(self.snapshot.score), font, size, color
+        )
         score_rect = score_surface.get_rect()
         score_rect.topleft = (self.frame_size_x // 25, self.frame_size_y // 25)
         red_rect = pygame.Rect(
             score_rect[0] - 5, score_rect[1] - 5, score_rect[2] + 10, score_rect[3] + 10
         )
         if draw:
-            pygame.draw.rect(self.game_window, RED, red_rect, width=4)
+            self.game_window.blit(self.box_frame(red_rect.size, RED), red_rect)
             self.game_window.blit(score_surface, score_rect)
         return red_rect
 
+    def box_frame(self, size: Tuple[int, int], color: pygame.Color) -> pygame.Surface:
+        """Get the red frame around a box of the HUD."""
+        return self.layers.get(
+            ('box_frame', size, tuple(color)), size,
+            lambda surface: pygame.draw.rect(
+                surface, color, surface.get_rect(), width=4
+            )
+        )
+
+    @property
+    def difficulty_text(self) -> str:
+        """The name of the current difficulty."""
+        if self.snapshot.current_difficulty < 25:
+            return 'Baby'
+        elif self.snapshot.current_difficulty < 40:
+            return 'Beginner'
+        elif self.snapshot.current_difficulty < 60:
+            return 'Intermediate'
+        elif self.snapshot.current_difficulty < 120:
+            return 'Expert'
+        elif self.snapshot.current_difficulty < 250:
+            return 'Master'
+        elif self.snapshot.current_difficulty < 400:
+            return 'Insane'
+        return 'GOD'
+
     def show_difficulty(
         self,
         *,
         color: pygame.Color = WHITE,
         font: Optional[Union[str, bytes, Iterable[Union[str, bytes]]]] = None,
-        size: int = 16
+        size: int = 16,
+        draw: bool = True
     ):
         """Show difficulty function."""
         font = font or self.font
-        difficulty_font = pygame.font.SysFont(font, size)
-        if self.current_difficulty < 25:
-            difficulty_text = 'Baby'
-        elif self.current_difficulty < 40:
-            difficulty_text = 'Beginner'
-        elif self.current_difficulty < 60:
-            difficulty_text = 'Intermediate'
-        elif self.current_difficulty < 120:
-            difficulty_text = 'Expert'
-        elif self.current_difficulty < 250:
-            difficulty_text = 'Master'
-        elif self.current_difficulty < 400:
-            difficulty_text = 'Insane'
-        else:
-            difficulty_text = 'GOD'
-        difficulty_surface = difficulty_font.render(
-            'Difficulty : ' + difficulty_text, True, color
+        difficulty_surface = self.text_cache.render(
+            'Difficulty : ' + self.difficulty_text, font, size, color
         )
         difficulty_rect = difficulty_surface.get_rect()
         difficulty_rect.topleft = (
             self.frame_size_x * 24 // 25 - difficulty_rect.width,
             self.frame_size_y // 25
         )
-        if self.current_difficulty >= 250:
-            red_rect = pygame.Rect(
-                difficulty_rect[0] - 5, difficulty_rect[1] - 5, difficulty_rect[2] + 10,
-                difficulty_rect[3] + 10
+        red_rect = pygame.Rect(
+            difficulty_rect[0] - 5, difficulty_rect[1] - 5, difficulty_rect[2] + 10,
+            difficulty_rect[3] + 10
+        )
+        if draw:
+            if self.snapshot.current_difficulty >= 250:
+                self.game_window.blit(self.box_frame(red_rect.size, RED), red_rect)
+            self.game_window.blit(difficulty_surface, difficulty_rect)
+        return red_rect
+
+    @property
+    def profile_lines(self) -> Tuple[str, ...]:
+        """The lines of the profiler overlay. They change twice a second at most, so
+        they can be read."""
+        now = time.perf_counter()
+        if now - self.__profile_time >= 0.5:
+            self.__profile_time = now
+            self.__profile_lines = tuple(
+                f'{name} p50 {stats["p50"]:.2f} p99 {stats["p99"]:.2f} ms'
+                for name, stats in self.profiler.summary().items()
             )
-            pygame.draw.rect(self.game_window, RED, red_rect, width=4)
-        self.game_window.blit(difficulty_surface, difficulty_rect)
+        return self.__profile_lines
+
+    def show_profile(
+        self,
+        *,
+        color: pygame.Color = LIGHT_GRAY,
+        font: Optional[Union[str, bytes, Iterable[Union[str, bytes]]]] = None,
+        size: int = 12,
+        draw: bool = True
+    ):
+        """Show the profiler overlay under the difficulty."""
+        font = font or self.font
+        right = self.frame_size_x * 24 // 25
+        top = self.show_difficulty(draw=False).bottom + 5
+        rect = pygame.Rect(right, top, 0, 0)
+        for line in self.profile_lines:
+            surface = self.text_cache.render(line, font, size, color)
+            line_rect = surface.get_rect(topright=(right, rect.bottom))
+            if draw:
+                self.game_window.blit(surface, line_rect)
+            rect.union_ip(line_rect)
+        return rect
 
     def show_eating_score(
         self,
         *,
         color: pygame.Color = RED,
         font: Optional[Union[str, bytes, Iterable[Union[str, bytes]]]] = None,
-        size: int = 20
+        size: int = 20,
+        draw: bool = True
     ):
         """Show eating score function."""
         font = font or self.font
-        score_font = pygame.font.SysFont(font, size)
-        score_surface = score_font.render('Stop EATING Score!!', True, color)
+        score_surface = self.text_cache.render('Stop EATING Score!!', font, size, color)
         score_rect = score_surface.get_rect()
         score_rect.midtop = (self.frame_size_x // 2, self.frame_size_y - 25)
-        self.game_window.blit(score_surface, score_rect)
+        if draw:
+            self.game_window.blit(score_surface, score_rect)
+        return score_rect
 
     def show_danger_zone(
         self,
         *,
         color: pygame.Color = RED,
         font: Optional[Union[str, bytes, Iterable[Union[str, bytes]]]] = None,
-        size: int = 20
+        size: int = 20,
+        draw: bool = True
     ):
         """Show danger zone function."""
         font = font or self.font
-        score_font = pygame.font.SysFont(font, size)
-        score_surface = score_font.render('Danger Zone!!', True, color)
+        score_surface = self.text_cache.render('Danger Zone!!', font, size, color)
         score_rect = score_surface.get_rect()
         score_rect.midtop = (self.frame_size_x // 2, self.frame_size_y - 25)
-        self.game_window.blit(score_surface, score_rect)
+        if draw:
+            self.game_window.blit(score_surface, score_rect)
+        return score_rect
 
     def show_pause(
         self,
@@ -212,14 +355,21 @@ class SnakeGame:
     ):
         """Show pause function."""
         font = font or self.font
-        pause_font = pygame.font.SysFont(font, size)
-        pause_surface = pause_font.render('Paused', True, color)
+        pause_surface = self.text_cache.render('Paused', font, size, color)
         pause_rect = pause_surface.get_rect()
         pause_rect.midtop = (
             self.frame_size_x // 2, self.frame_size_y // 2 - pause_rect[3] // 2
         )
         self.game_window.blit(pause_surface, pause_rect)
 
+    def big_food_time_bar_rect(self, bar_thickness: int = 15) -> pygame.Rect:
+        """Get the area of the big food time bar including its border."""
+        return pygame.Rect(
+            self.frame_size_x // 10 - 5,
+            (self.frame_size_y * 19) // 20 - bar_thickness - 5,
+            (self.frame_size_x * 8) // 10 + 10, bar_thickness + 10
+        )
+
     def big_food_time_bar(
         self,
         *,
@@ -229,326 +379,568 @@ class SnakeGame:
         draw: bool = True
     ) -> int:
         """Show big food time bar function."""
-        border_x = self.frame_size_x // 10 - 5
-        border_y = (self.frame_size_y * 19) // 20 - bar_thickness - 5
-        border_w = (self.frame_size_x * 8) // 10 + 10
-        border_h = bar_thickness + 10
+        border_rect = self.big_food_time_bar_rect(bar_thickness)
+        border_x, border_y, border_w, _ = border_rect
 
         bar_rect = pygame.Rect(
             border_x + 5, border_y + 5,
-            (border_w - 10) * self.big_food_time_left / self.big_food_time,
-            bar_thickness
+            (border_w - 10) * self.snapshot.big_food_time_left /
+            self.snapshot.big_food_time, bar_thickness
         )
         if draw:
-            # Draw the border
-            # Top Line
-            pygame.draw.rect(
-                self.game_window, border_color,
-                pygame.Rect(border_x + 5, border_y, border_w - 10, 3)
+            border = self.layers.get(
+                ('time_bar_border', border_rect.size, tuple(border_color)),
+                border_rect.size, partial(self.draw_time_bar_border, color=border_color)
             )
-            # Bottom Line
-            pygame.draw.rect(
-                self.game_window, border_color,
-                pygame.Rect(
-                    border_x + 5, border_y + border_h - 5 + 2, border_w - 10, 3
-                )
+            self.game_window.blit(border, border_rect)
+            pygame.draw.rect(self.game_window, color, bar_rect)
+        return border_y
+
+    @staticmethod
+    def draw_time_bar_border(surface: pygame.Surface, color: pygame.Color) -> None:
+        """Draw the border of the big food time bar on a surface of its size."""
+        border_w, border_h = surface.get_size()
+        # Top Line
+        pygame.draw.rect(surface, color, pygame.Rect(5, 0, border_w - 10, 3))
+        # Bottom Line
+        pygame.draw.rect(
+            surface, color, pygame.Rect(5, border_h - 5 + 2, border_w - 10, 3)
+        )
+        # Left line
+        pygame.draw.rect(surface, color, pygame.Rect(0, 5, 3, border_h - 10))
+        # Right Line
+        pygame.draw.rect(
+            surface, color, pygame.Rect(border_w - 5 + 2, 5, 3, border_h - 10)
+        )
+        for x in (0, border_w - 5):
+            for y in (0, border_h - 5):
+                pygame.draw.rect(surface, BLACK, pygame.Rect(x, y, 5, 5))
+
+    def hud(self) -> Dict[str, Tuple[object, pygame.Rect, Callable[[], object]]]:
+        """Get the things that are drawn over the game.
+
+        Returns:
+            Dict[str, Tuple[object, pygame.Rect, Callable[[], object]]]: For each item,
+                a key that changes when the item looks different, the area it covers
+                and a function that draws it.
+        """
+        score_color = (
+            RED if self.snapshot.eating_score or self.snapshot.in_the_danger_zone else
+            WHITE
+        )
+        items = {
+            'score': (
+                (self.snapshot.score, tuple(score_color)),
+                self.show_score(color=score_color, draw=False),
+                partial(self.show_score, color=score_color)
+            ),
+            'difficulty': (
+                self.difficulty_text, self.show_difficulty(draw=False),
+                self.show_difficulty
             )
-            # Left line
-            pygame.draw.rect(
-                self.game_window, border_color,
-                pygame.Rect(border_x, border_y + 5, 3, border_h - 10)
+        }
+        if self.profiler.enabled:
+            lines = self.profile_lines
+            items['profile'] = (lines, self.show_profile(draw=False), self.show_profile)
+        if self.snapshot.big_food_time_left > 0:
+            rect = self.big_food_time_bar_rect()
+            items['big_food_time_bar'] = (
+                int((rect.width - 10) * self.snapshot.big_food_time_left /
+                    self.snapshot.big_food_time), rect, self.big_food_time_bar
             )
-            # Right Line
-            pygame.draw.rect(
-                self.game_window, border_color,
-                pygame.Rect(
-                    border_x + border_w - 5 + 2, border_y + 5, 3, border_h - 10
-                )
+        # Warnings about losing score
+        if self.snapshot.eating_score:
+            items['warning'] = (
+                'eating_score', self.show_eating_score(draw=False),
+                self.show_eating_score
             )
-            for x in (border_x, border_x + border_w - 5):
-                for y in (border_y, border_y + border_h - 5):
-                    pygame.draw.rect(self.game_window, BLACK, pygame.Rect(x, y, 5, 5))
-            pygame.draw.rect(self.game_window, color, bar_rect)
-        return border_y
+        elif self.snapshot.in_the_danger_zone:
+            items['warning'] = (
+                'danger_zone', self.show_danger_zone(draw=False), self.show_danger_zone
+            )
+        return items
+
+    def cell_rect(self, cell: int, blocks: int = 1) -> pygame.Rect:
+        """Get the area of a cell on the screen."""
+        block_size = self.snapshot.block_size
+        return pygame.Rect(
+            (cell % self.snapshot.columns) * block_size,
+            (cell // self.snapshot.columns) * block_size, block_size * blocks,
+            block_size * blocks
+        )
 
-    def do_drawings(self):
-        """Draw the things that need to be drawn."""
-        self.game_window.fill(BLACK)
-        for pos in self.snake_body:
-            # Snake body
-            # .draw.rect(play_surface, color, xy-coordinate)
-            # xy-coordinate -> .Rect(x, y, size_x, size_y)
+    def walls_layer(self) -> Optional[pygame.Surface]:
+        """Get the walls of the level, which are only drawn again when the size of
+        the cells changes."""
+        level = self.engine.level
+        if level is None:
+            return None
+        state = self.snapshot
+        block_size = state.block_size
+
+        def draw(surface: pygame.Surface) -> None:
+            renderer = CellRenderer(GRAY, block_size)
+            renderer.palette[0] = tuple(LayerCache.TRANSPARENT)
+            renderer.draw_grid(surface, level.walls, state.columns, state.rows)
+
+        return self.layers.get(
+            ('walls', block_size),
+            (state.columns * block_size, state.rows * block_size), draw
+        )
+
+    def draw_food(self):
+        """Draw the food and the big food."""
+        if self.snapshot.food_spawn:
+            pygame.draw.rect(
+                self.game_window, WHITE, self.cell_rect(self.snapshot.food)
+            )
+        if self.snapshot.big_food_time_left > 0:
             pygame.draw.rect(
-                self.game_window, GREEN, pygame.Rect(pos[0], pos[1], 10, 10)
+                self.game_window, WHITE, self.cell_rect(self.snapshot.big_food, 2)
             )
 
-        # Show score
-        self.show_score(
-            color=RED if self.eating_score or self.in_the_danger_zone else WHITE
-        )
+    def draw_area(
+        self, rect: pygame.Rect, hud: Dict[str, Tuple[object, pygame.Rect,
+                                                      Callable[[], object]]]
+    ) -> pygame.Rect:
+        """Draw everything in an area of the window again.
 
-        # Show difficulty
-        self.show_difficulty()
+        The area grows to cover the HUD items it touches, because thick borders are
+        not drawn the same way when they are clipped.
 
-        # Snake food
-        pygame.draw.rect(
-            self.game_window, WHITE,
-            pygame.Rect(self.food_pos[0], self.food_pos[1], 10, 10)
-        )
+        Args:
+            rect (pygame.Rect): The area to draw.
+            hud (Dict[str, Tuple[object, pygame.Rect, Callable[[], object]]]): The
+                result of `hud()`.
 
-        # Big food
-        if self.big_food_time_left > 0:
-            pygame.draw.rect(
-                self.game_window, WHITE,
-                pygame.Rect(self.big_food_pos[0], self.big_food_pos[1], 20, 20)
+        Returns:
+            pygame.Rect: The area that was drawn.
+        """
+        state = self.snapshot
+        rect = pygame.Rect(rect)
+        grown = True
+        while grown:
+            grown = False
+            for _, item_rect, _ in hud.values():
+                if item_rect.colliderect(rect) and not rect.contains(item_rect):
+                    rect.union_ip(item_rect)
+                    grown = True
+
+        self.game_window.set_clip(rect)
+        self.game_window.fill(BLACK, rect)
+        walls = self.walls_layer()
+        if walls is not None:
+            self.game_window.blit(walls, rect.topleft, rect)
+        occupied = state.occupied
+        columns = state.columns
+        block_size = state.block_size
+        self.body_renderer.draw_cells(
+            self.game_window, [
+                cell for y in range(
+                    max(rect.top // block_size, 0),
+                    min((rect.bottom - 1) // block_size + 1, state.rows)
+                ) for cell in range(
+                    y * columns + max(rect.left // block_size, 0),
+                    y * columns + min((rect.right - 1) // block_size + 1, columns)
+                ) if occupied[cell]
+            ], columns, state.rows
+        )
+        self.draw_food()
+        for _, item_rect, draw in hud.values():
+            if item_rect.colliderect(rect):
+                draw()
+        self.game_window.set_clip(None)
+        return rect
+
+    def redraw(self) -> None:
+        """Draw the whole window in the next frame instead of only the changes."""
+        self.__redraw = True
+
+    def do_drawings(self) -> Optional[List[pygame.Rect]]:
+        """Draw the things that need to be drawn.
+
+        The game is drawn from `snapshot`, so nothing changes while it is drawn. Only
+        the cells that changed since the last frame and the changed parts of the HUD
+        are drawn again, unless the whole window needs to be redrawn.
+
+        Returns:
+            Optional[List[pygame.Rect]]: The areas of the window that changed or None
+                if the whole window was drawn.
+        """
+        state = self.snapshot
+        hud = self.hud()
+        frame_size = (self.frame_size_x, self.frame_size_y)
+        food = state.food if state.food_spawn else None
+        big_food = state.big_food if state.big_food_time_left > 0 else None
+        steps = state.steps - self.__drawn_steps
+        length = len(state.body)
+        moved = min(steps, length)
+        removed = len(self.__drawn_body) + moved - length
+
+        if (self.__redraw or frame_size != self.__drawn_frame_size or steps < 0
+                or removed < 0 or removed > len(self.__drawn_body)):
+            self.__redraw = False
+            self.__drawn_frame_size = frame_size
+            self.__drawn_steps = state.steps
+            self.__drawn_body = deque(state.body)
+            self.__drawn_food = food
+            self.__drawn_big_food = big_food
+            self.__drawn_hud = hud
+
+            self.game_window.fill(BLACK)
+            walls = self.walls_layer()
+            if walls is not None:
+                self.game_window.blit(walls, (0, 0))
+            # Snake body, without hiding the walls under its empty cells
+            self.body_renderer.draw(
+                self.game_window, state.body, state.occupied, state.columns,
+                state.rows, background=walls is None
+            )
+            self.draw_food()
+            for _, _, draw in hud.values():
+                draw()
+            return None
+
+        rects = []
+        # The tail of the snake moved away from these cells
+        for _ in range(removed):
+            rects.append(self.cell_rect(self.__drawn_body.pop()))
+        # The head of the snake moved to these cells
+        for i in range(moved - 1, -1, -1):
+            cell = state.body[i]
+            self.__drawn_body.appendleft(cell)
+            rects.append(self.cell_rect(cell))
+        self.__drawn_steps += steps
+
+        if food != self.__drawn_food:
+            for cell in (self.__drawn_food, food):
+                if cell is not None:
+                    rects.append(self.cell_rect(cell))
+            self.__drawn_food = food
+        if big_food != self.__drawn_big_food:
+            for cell in (self.__drawn_big_food, big_food):
+                if cell is not None:
+                    rects.append(self.cell_rect(cell, 2))
+            self.__drawn_big_food = big_food
+
+        for name in set(hud) | set(self.__drawn_hud):
+            old = self.__drawn_hud.get(name)
+            new = hud.get(name)
+            if old is None or new is None or old[:2] != new[:2]:
+                rects.extend(item[1] for item in (old, new) if item is not None)
+        self.__drawn_hud = hud
+
+        return [self.draw_area(rect, hud) for rect in rects]
+
+    def pause(self) -> None:
+        """Pause the game until a direction is given."""
+        self.change_to = 'PAUSE'
+        self.show_pause(font='consolas')
+        pygame.display.update()
+        # Remove the pause text when the game goes on
+        self.__redraw = True
+
+    def handle_command(self, command: str) -> None:
+        """Handle a command of a `GameControl`."""
+        if command == 'QUIT':
+            self.__running = False
+        elif command == 'PAUSE':
+            self.pause()
+        else:
+            self.change_to = command
+
+    def handle_pygame_events(self) -> None:
+        """Handle the keyboard and window events."""
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.__running = False
+                return
+
+            # Scale the board to the window when it is resized
+            elif event.type == pygame.VIDEORESIZE:
+                self.fit_window(event.size)
+
+            # Whenever a key is pressed down
+            elif event.type == pygame.KEYDOWN:
+                # W -> Up; S -> Down; A -> Left; D -> Right
+                if (event.key == pygame.K_UP or event.key == ord('w')
+                        or event.key == ord('k')):
+                    self.change_to = 'UP'
+                if (event.key == pygame.K_DOWN or event.key == ord('s')
+                        or event.key == ord('j')):
+                    self.change_to = 'DOWN'
+                if (event.key == pygame.K_LEFT or event.key == ord('a')
+                        or event.key == ord('h')):
+                    self.change_to = 'LEFT'
+                if (event.key == pygame.K_RIGHT or event.key == ord('d')
+                        or event.key == ord('l')):
+                    self.change_to = 'RIGHT'
+                if event.key == pygame.K_PAUSE or event.key == ord('p'):
+                    self.pause()
+                # Esc -> Create event to quit the game
+                if event.key == pygame.K_ESCAPE:
+                    pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    def export_state(self) -> GameState:
+        """Get a copy of the state of the game, e.g. to save it with
+        `GameState.to_bytes`."""
+        return self.engine.get_state()
+
+    def load_state(self, state: GameState) -> None:
+        """Continue the game from a state of `export_state`. The game must have the
+        same parameters as the one the state came from.
+
+        The replay of the game starts from its seed, so it can't be verified after a
+        state is loaded.
+        """
+        self.engine.set_state(state)
+        self.change_to = self.engine.direction
+        self.scheduler.pause()
+        self.engine_changed()
+
+    def engine_changed(self) -> None:
+        """Fit the window and the drawing to the engine after it was changed
+        directly, e.g. to another state or size, and draw it all again."""
+        if self.body_renderer.block_size != self.engine.block_size:
+            self.body_renderer = CellRenderer(GREEN, self.engine.block_size)
+        self.layers.clear()
+        self.snapshot = self.engine.snapshot()
+        if self.game_window.get_size() != (self.frame_size_x, self.frame_size_y):
+            self.game_window = pygame.display.set_mode(
+                (self.frame_size_x, self.frame_size_y), pygame.RESIZABLE
             )
+        self.__redraw = True
+
+    def start_capture(self, capture: 'FrameCapture', fps: float = 30) -> None:
+        """Record the frames of the game from now on.
 
-            self.big_food_time_bar()
+        Args:
+            capture (FrameCapture): Where the frames go.
+            fps (float, optional): The number of frames per second. The frames are
+                taken on the clock of the game, so pauses and slow frames don't show
+                in the recording. Defaults to 30.
+        """
+        self.capture = capture
+        self.capture_fps = fps
+        self.__captured_frames = int(self.engine.time * fps)
+
+    def capture_frames(self) -> None:
+        """Give the window to the capture once for every frame that is due since the
+        last one. The drawing loops call it after updating the display."""
+        if self.capture is None:
+            return
+        due = int(self.engine.time * self.capture_fps) + 1
+        while self.__captured_frames < due:
+            self.capture.grab(self.game_window)
+            self.__captured_frames += 1
+
+    def render_replay(self, replay: Replay) -> bool:
+        """Draw every step of a replay as fast as possible and capture the frames,
+        e.g. without a window. The game must have the parameters of the replay.
+
+        Returns:
+            bool: False if it was stopped before the end of the replay, e.g. with
+                Ctrl+C.
+        """
+        engine = self.engine
+        engine.measure_text = replay.measure_text
+        engine.reset(replay.header['seed'])
+        self.__captured_frames = 0
+        shape = None
+        try:
+            for _ in replay.play(engine):
+                if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                    return False
+                size = (engine.frame_size_x, engine.frame_size_y, engine.block_size)
+                if size != shape:
+                    shape = size
+                    self.engine_changed()
+                else:
+                    self.snapshot = engine.snapshot()
+                self.do_drawings()
+                self.capture_frames()
+        except KeyboardInterrupt:
+            return False
+        return True
+
+    def fit_window(self, size: Tuple[int, int]) -> None:
+        """Use the biggest cells that fit the whole board in a window of the given
+        size. The board itself doesn't change."""
+        block_size = max(
+            1, min(size[0] // self.engine.columns, size[1] // self.engine.rows)
+        )
+        if block_size != self.engine.block_size:
+            self.engine.set_block_size(block_size)
+            self.body_renderer = CellRenderer(GREEN, block_size)
+            self.layers.clear()
+            self.snapshot = self.engine.snapshot()
+        if self.game_window.get_size() != tuple(size):
+            self.game_window = pygame.display.set_mode(size, pygame.RESIZABLE)
+        self.__redraw = True
 
     def main_loop(self):
         """Main loop function."""
+        clock = pygame.time.Clock()
+        profiler = self.profiler
         while self.__running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.__running = False
-                    return
+            with profiler.section('events'):
+                self.handle_pygame_events()
+            if not self.__running:
+                return
 
-                # Change the frame size when the window is resized
-                elif event.type == pygame.VIDEORESIZE:
-                    self.frame_size_x, self.frame_size_y = event.size
-
-                # Whenever a key is pressed down
-                elif event.type == pygame.KEYDOWN:
-                    # W -> Up; S -> Down; A -> Left; D -> Right
-                    if (event.key == pygame.K_UP or event.key == ord('w')
-                            or event.key == ord('k')):
-                        self.change_to = 'UP'
-                    if (event.key == pygame.K_DOWN or event.key == ord('s')
-                            or event.key == ord('j')):
-                        self.change_to = 'DOWN'
-                    if (event.key == pygame.K_LEFT or event.key == ord('a')
-                            or event.key == ord('h')):
-                        self.change_to = 'LEFT'
-                    if (event.key == pygame.K_RIGHT or event.key == ord('d')
-                            or event.key == ord('l')):
-                        self.change_to = 'RIGHT'
-                    if event.key == pygame.K_PAUSE or event.key == ord('p'):
-                        self.change_to = 'PAUSE'
-                        self.show_pause(font='consolas')
-                        pygame.display.update()
-                    # Esc -> Create event to quit the game
-                    if event.key == pygame.K_ESCAPE:
-                        pygame.event.post(pygame.event.Event(pygame.QUIT))
-
-            self.do_drawings()
-
-            # Making sure the snake cannot move in the opposite direction
-            # instantaneously
             if self.change_to == 'PAUSE':
-                time.sleep(self.tick)
+                self.scheduler.pause()
+                clock.tick(self.fps)
                 continue
-            if self.change_to == 'UP' and self.direction != 'DOWN':
-                self.direction = 'UP'
-            if self.change_to == 'DOWN' and self.direction != 'UP':
-                self.direction = 'DOWN'
-            if self.change_to == 'LEFT' and self.direction != 'RIGHT':
-                self.direction = 'LEFT'
-            if self.change_to == 'RIGHT' and self.direction != 'LEFT':
-                self.direction = 'RIGHT'
+
+            # Run the steps that are due since the last frame
+            # The engine makes sure the snake cannot move in the opposite direction
+            # instantaneously
+            with profiler.section('steps'):
+                self.scheduler.advance(self.change_to)
+                self.snapshot = self.engine.snapshot()
+            if self.snapshot.done:
+                self.game_over()
+                return
+
+            with profiler.section('draw'):
+                rects = self.do_drawings()
 
             # Refresh game screen
-            pygame.display.update()
+            with profiler.section('update'):
+                pygame.display.update(rects)
+            self.first_frame_shown()
+            self.capture_frames()
             # Refresh rate
-            # if self.eating_score:
-            #     # self.fps_controller.tick(10)
-            #     time.sleep(1 / self.base_difficulty)
-            # else:
-            #     # self.fps_controller.tick(difficulty)
-            time.sleep(self.tick)
-
-    def __run(self):
-        while self.__running:
-            if self.change_to == 'PAUSE':
-                time.sleep(self.tick)
-                continue
+            clock.tick(0 if self.unthrottled else self.fps)
 
-            # Moving the snake
-            if self.direction == 'UP':
-                self.snake_pos[1] -= 10
-            if self.direction == 'DOWN':
-                self.snake_pos[1] += 10
-            if self.direction == 'LEFT':
-                self.snake_pos[0] -= 10
-            if self.direction == 'RIGHT':
-                self.snake_pos[0] += 10
-
-            # Snake eating and growing mechanism
-            self.snake_body.insert(0, list(self.snake_pos))
-            if self.snake_pos[0] == self.food_pos[0] and self.snake_pos[
-                    1] == self.food_pos[1]:
-                self.score += 1
-                self.food_spawn = False
-            elif self.getting_big_score > 0:
-                self.getting_big_score -= 1
-                self.score += 1
-            else:
-                self.snake_body.pop()
-            if self.big_food_time_left > 0:
-                if ((self.snake_pos[0] == self.big_food_pos[0]
-                     and self.snake_pos[1] == self.big_food_pos[1])
-                        or (self.snake_pos[0] == self.big_food_pos[0] + 10
-                            and self.snake_pos[1] == self.big_food_pos[1])
-                        or (self.snake_pos[0] == self.big_food_pos[0]
-                            and self.snake_pos[1] == self.big_food_pos[1] + 10)
-                        or (self.snake_pos[0] == self.big_food_pos[0] + 10
-                            and self.snake_pos[1] == self.big_food_pos[1] + 10)):
-                    self.getting_big_score = self.big_food_score
-                    self.big_food_time_left = 0
-                    self.big_food_pos = [0, 0]
-
-            # Getting out of bounds
-            if self.snake_pos[0] < 0:
-                self.snake_pos[0] = self.frame_size_x - 10
-            if self.snake_pos[0] > self.frame_size_x - 10:
-                self.snake_pos[0] = 0
-            if self.snake_pos[1] < 0:
-                self.snake_pos[1] = self.frame_size_y - 10
-            if self.snake_pos[1] > self.frame_size_y - 10:
-                self.snake_pos[1] = 0
-
-            # Game Over condition
-            # Touching the snake body
-            for block in self.snake_body[1:]:
-                if self.snake_pos[0] == block[0] and self.snake_pos[1] == block[1]:
-                    self.game_over()
-
-            # Show score
-            rect = self.show_score(draw=False)
-            self.eating_score = False
-
-            # Decrease score if snake is in score box
-            if self.score > 0 and self.snake_pos[0] - rect[0] in range(
-                    rect[2]) and self.snake_pos[1] - rect[1] in range(rect[3]):
-                self.eating_score = True
-                self.show_score(color=RED)
-                self.show_eating_score(color=RED)
-                self.score -= 1
-                self.snake_body.pop()
-
-            # Set difficulty
-            self.current_difficulty = (
-                self.score * self.difficulty_modifier + self.base_difficulty
-            )
+    def first_frame_shown(self) -> None:
+        """Measure and log the time to the first frame, once. The drawing loops call
+        it after updating the display."""
+        if self.first_frame_time is not None:
+            return
+        self.first_frame_time = time.perf_counter() - STARTED
+        import log21
+        log21.info(f'Showed the first frame in {self.first_frame_time * 1000:.0f}ms')
+
+    def run(self):
+        """Run the game."""
+        self.__running = True
+        self.main_loop()
+        self.__running = False
 
-            self.in_the_danger_zone = False
-            # Decrease score if snake is in Insane or GOD difficulty box
-            if self.score > 0 and self.current_difficulty >= 250:
-                self.in_the_danger_zone = True
-                self.show_score(color=RED)
-                self.show_danger_zone(color=RED)
-                self.score -= 1
-                self.snake_body.pop()
-
-            if self.big_food_chance > 0:
-                bar_y = self.big_food_time_bar(draw=False)
-            else:
-                bar_y = self.frame_size_y
-
-            # Spawning food on the screen
-            if not self.food_spawn:
-                self.food_pos = [
-                    random.randrange(1, self.frame_size_x // 10) * 10,
-                    random.randrange(1 + (rect[1] + rect[3]) // 10, bar_y // 10 - 1) *
-                    10
-                ]
-                self.food_spawn = True
-
-            if self.eating_score:
-                time.sleep(1 / self.base_difficulty)
-            else:
-                time.sleep(1 / self.current_difficulty)
-
-    def big_food_handler(self):
-        """Spawn big food every few seconds."""
+    async def read_keyboard(self) -> None:
+        """Handle the keyboard and window events once a frame. PyGame has no way to
+        wait for events, so they are polled."""
+        import asyncio
         while self.__running:
-            if self.change_to == 'PAUSE':
-                time.sleep(self.tick)
-                continue
+            with self.profiler.section('events'):
+                self.handle_pygame_events()
+            await asyncio.sleep(self.tick)
 
-            if self.big_food_time_left > 0:
-                self.big_food_time_left -= 0.01
-                time.sleep(0.01)
-                continue
+    async def read_commands(self, control: 'GameControl') -> None:
+        """Handle the commands of a `GameControl` as soon as they are sent."""
+        while self.__running:
+            self.handle_command(await control.commands.get())
 
-            spawn_big_food = random.random() <= self.big_food_chance
-            if spawn_big_food:
-                rect = self.show_score(draw=False)
-                if self.big_food_chance > 0:
-                    bar_y = self.big_food_time_bar(draw=False)
-                else:
-                    bar_y = self.frame_size_y
-                self.big_food_pos = [
-                    random.randrange(1, self.frame_size_x // 20 - 1) * 20,
-                    random.randrange(1 + (rect[1] + rect[3]) // 20, bar_y // 20 - 1) *
-                    20
-                ]
-
-                self.big_food_pos[0] += 10
-                if self.big_food_pos[0] > self.frame_size_x - 10:
-                    self.big_food_pos[0] = 0
-
-                self.big_food_time_left = self.big_food_time
+    async def run_steps(self, control: 'GameControl') -> None:
+        """Run the steps of the game when they are due and publish the state after
+        them, until the game is over."""
+        import asyncio
+        while self.__running:
+            if self.change_to == 'PAUSE':
+                self.scheduler.pause()
+                await asyncio.sleep(self.tick)
                 continue
+            with self.profiler.section('steps'):
+                steps = self.scheduler.advance(self.change_to)
+                if steps:
+                    self.snapshot = self.engine.snapshot()
+            if steps:
+                control.publish(self.snapshot)
+                if self.snapshot.done:
+                    return
+            await asyncio.sleep(self.scheduler.time_to_next_step())
 
-            time.sleep(1)
+    async def render(self) -> None:
+        """Draw the frames at the frame rate."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        while self.__running:
+            start = loop.time()
+            if self.change_to != 'PAUSE':
+                with self.profiler.section('draw'):
+                    rects = self.do_drawings()
+                with self.profiler.section('update'):
+                    pygame.display.update(rects)
+                self.first_frame_shown()
+                self.capture_frames()
+            delay = 0 if self.unthrottled else self.tick - (loop.time() - start)
+            await asyncio.sleep(max(delay, 0))
+
+    async def run_async(self, control: Optional['GameControl'] = None) -> None:
+        """Run the game on the running asyncio event loop instead of `run`.
+
+        The steps, the drawing and the input run as separate coroutines, so nothing
+        blocks the loop and other coroutines (e.g. bots) run between them.
 
-    def run(self):
-        """Run the game."""
-        threads = []
+        Args:
+            control (Optional[GameControl], optional): Commands to the game are read
+                from it and the state after each step is published to it. Defaults to
+                None.
+        """
+        import asyncio
+        from snake_control import GameControl
+        control = control or GameControl()
         self.__running = True
-        threads.append(Thread(target=self.__run, daemon=True))
-        threads[-1].start()
-        if 0 < self.big_food_chance < 1:
-            threads.append(Thread(target=self.big_food_handler, daemon=True))
-            threads[-1].start()
-
-        self.main_loop()
+        control.publish(self.snapshot)
+        tasks = [
+            asyncio.ensure_future(coroutine) for coroutine in (
+                self.read_keyboard(), self.read_commands(control),
+                self.render()
+            )
+        ]
+        try:
+            await self.run_steps(control)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            control.close()
+        if self.snapshot.done:
+            await self.game_over_async()
         self.__running = False
-        for thread in threads:
-            thread.join()
 
     @property
     def frame_size_x(self) -> int:
         """Get the width of the game frame."""
-        return self.__frame_size_x
+        return self.engine.frame_size_x
 
     @frame_size_x.setter
     def frame_size_x(self, value: int):
-        self.__frame_size_x = (value // 10) * 10
+        self.recorder.resize(value, self.frame_size_y)
+        self.layers.clear()
+        self.snapshot = self.engine.snapshot()
         if self.game_window.get_width() != value:
             self.game_window = pygame.display.set_mode(
                 (self.frame_size_x, self.frame_size_y), pygame.RESIZABLE
             )
 
-        if self.food_spawn and self.food_pos[0] > self.frame_size_x - 10:
-            self.food_spawn = False
-
     @property
     def frame_size_y(self) -> int:
         """Get the height of the game frame."""
-        return self.__frame_size_y
+        return self.engine.frame_size_y
 
     @frame_size_y.setter
     def frame_size_y(self, value: int):
-        self.__frame_size_y = (value // 10) * 10
+        self.recorder.resize(self.frame_size_x, value)
+        self.layers.clear()
+        self.snapshot = self.engine.snapshot()
         if self.game_window.get_height() != value:
             self.game_window = pygame.display.set_mode(
                 (self.frame_size_x, self.frame_size_y), pygame.RESIZABLE
             )
 
-        if self.food_spawn and self.food_pos[1] > self.frame_size_y - 10:
-            self.food_spawn = False
-
     @property
     def fps(self) -> int:
         """Get the number of frames per second."""
@@ -564,20 +956,26 @@ class SnakeGame:
         """Get the time between each frame."""
         return self.__tick
 
-    @property
-    def in_the_danger_zone(self) -> bool:
-        """When the difficulty is insane or higher, the difficulty box becomes a Danger
-        Zone!"""
-        return self.__in_the_danger_zone
-
-    @in_the_danger_zone.setter
-    def in_the_danger_zone(self, value: bool):
-        self.__in_the_danger_zone = value
-
     def __del__(self):
         pygame.quit()
 
 
+async def run_async(game: SnakeGame, control_port: Optional[int] = None):
+    """Run a game on the event loop and serve its control on a port, if one is
+    given."""
+    from snake_control import GameControl, serve_control
+    control = GameControl()
+    server = None
+    if control_port is not None:
+        server = await serve_control(control, port=control_port)
+    try:
+        await game.run_async(control)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+
+
 def main(
     frame_size_x: int = 720,
     frame_size_y: int = 480,
@@ -586,7 +984,22 @@ def main(
     fps: int = 90,
     big_food_chance: float = 0.02,
     big_food_score: int = 3,
-    big_food_time: float = 6
+    big_food_time: float = 6,
+    unthrottled: bool = False,
+    seed: Optional[int] = None,
+    record: Optional[str] = None,
+    autopilot: bool = False,
+    profile: bool = False,
+    profile_output: Optional[str] = None,
+    cell_size: int = BLOCK_SIZE,
+    use_asyncio: bool = False,
+    control_port: Optional[int] = None,
+    load_state: Optional[str] = None,
+    save_state: Optional[str] = None,
+    capture: Optional[str] = None,
+    capture_fps: float = 30,
+    render_replay: Optional[str] = None,
+    level: Optional[str] = None
 ):
     """Run the game.
 
@@ -601,24 +1014,119 @@ def main(
             and 1.)
         big_food_score (int): The score to earn for eating a BIG FOOD. (default: 3)
         big_food_time (float): The time in seconds for a big food to stay. (default: 6)
+        unthrottled (bool): Run the game as fast as possible. Useful for benchmarks.
+            (default: False)
+        seed (Optional[int]): The seed of the game. A random one is used by default.
+        record (Optional[str]): Save a replay of the game to this file when it is
+            over. Check it with `python snake_replay.py --path FILE`.
+        autopilot (bool): Let the computer play. (default: False)
+        profile (bool): Show how long each phase of the frames takes. (default: False)
+        profile_output (Optional[str]): Save the frame phase times to this file when
+            the game is over, as CSV if it ends with '.csv' or as JSON otherwise.
+        cell_size (int): The size of each cell of the board in pixels. Use a small
+            one for big boards. (default: 10)
+        use_asyncio (bool): Run the game on an asyncio event loop. (default: False)
+        control_port (Optional[int]): Let bots control the game over TCP on this port
+            of localhost. See snake_control.py. Implies --use-asyncio.
+        load_state (Optional[str]): Continue the game from a state saved with
+            --save-state. The other parameters must be the same as that game's.
+        save_state (Optional[str]): Save the state of the game to this file when it is
+            over.
+        capture (Optional[str]): Record the frames of the game to this file: a GIF if
+            it ends with '.gif', raw RGB frames with '.raw', a video made with ffmpeg
+            with '.mp4', '.mkv' or '.webm' or a folder of PNG files otherwise.
+        capture_fps (float): The number of frames per second of --capture, on the
+            clock of the game. (default: 30)
+        render_replay (Optional[str]): Draw a replay without a window, as fast as
+            possible, to record it with --capture. The parameters of the game come
+            from the replay.
+        level (Optional[str]): Play on a level file made with snake_level.py. The
+            frame is the size of the level.
     """
-
     if big_food_chance > 1:
+        import log21
         log21.error(f'big_food_chance must be between 0 and 1, not {big_food_chance}')
         sys.exit(1)
+    if render_replay and not capture:
+        import log21
+        log21.error('--render-replay needs --capture to know where the frames go')
+        sys.exit(1)
 
-    game = SnakeGame(
-        frame_size_x=frame_size_x,
-        frame_size_y=frame_size_y,
-        base_difficulty=base_difficulty,
-        difficulty_modifier=difficulty_modifier,
-        fps=fps,
-        big_food_chance=big_food_chance,
-        big_food_score=big_food_score,
-        big_food_time=big_food_time
-    )
-    game.run()
+    if render_replay:
+        # Draw on SDL's dummy driver, which has no window
+        os.environ['SDL_VIDEODRIVER'] = 'dummy'
+        replay = Replay.load(render_replay)
+        params = replay.engine_params()
+        game = SnakeGame(
+            seed=replay.header['seed'],
+            cell_size=params.pop('block_size', BLOCK_SIZE),
+            **params
+        )
+    else:
+        game = SnakeGame(
+            frame_size_x=frame_size_x,
+            frame_size_y=frame_size_y,
+            base_difficulty=base_difficulty,
+            difficulty_modifier=difficulty_modifier,
+            fps=fps,
+            big_food_chance=big_food_chance,
+            big_food_score=big_food_score,
+            big_food_time=big_food_time,
+            unthrottled=unthrottled,
+            seed=seed,
+            autopilot=autopilot,
+            profile=profile or bool(profile_output),
+            cell_size=cell_size,
+            level=Level.load(level) if level else None
+        )
+    if load_state:
+        with open(load_state, 'rb') as file:
+            game.load_state(GameState.from_bytes(file.read()))
+    frame_capture = None
+    finished = True
+    if capture:
+        from snake_capture import FrameCapture, writer_for
+        # A live game drops frames when the writer is behind instead of slowing down
+        frame_capture = FrameCapture(
+            writer_for(capture, capture_fps), block=bool(render_replay)
+        )
+        game.start_capture(frame_capture, capture_fps)
+    try:
+        if render_replay:
+            finished = game.render_replay(replay)
+        elif use_asyncio or control_port is not None:
+            import asyncio
+            asyncio.run(run_async(game, control_port))
+        else:
+            game.run()
+    finally:
+        if frame_capture is not None:
+            frame_capture.close()
+
+    import log21
+    if not finished:
+        log21.warning('Stopped rendering the replay before its end')
+    if frame_capture is not None:
+        log21.info(
+            f'Saved {frame_capture.frames} frames to {capture}'
+            + (f' ({frame_capture.dropped} dropped)' if frame_capture.dropped else '')
+        )
+    if record:
+        game.recorder.save(record)
+        log21.info(f'Saved the replay of the game to {record}')
+    if save_state:
+        with open(save_state, 'wb') as file:
+            file.write(game.export_state().to_bytes())
+        log21.info(f'Saved the state of the game to {save_state}')
+    if profile_output:
+        game.profiler.export(profile_output)
+        log21.info(f'Saved the frame times to {profile_output}')
 
 
 if __name__ == '__main__':
-    log21.argumentify(main)
+    if len(sys.argv) > 1:
+        import log21
+        log21.argumentify(main)
+    else:
+        # Parsing no arguments needs no log21 before the window opens
+        main()
@@ -0,0 +1,332 @@
+"""Many snakes on one wrapping board.
+
+Every cell of the board knows the snake that owns it, so finding collisions only
+looks at the cells the heads move to. A step takes time in proportion to the number
+of snakes that move, however long they are and however many pairs of them there are.
+
+Example:
+    arena = ArenaEngine(160, 100, seed=0)
+    for _ in range(100):
+        arena.add_snake()
+    bot = GreedyBot()
+    while not arena.done:
+        arena.step({snake.id: bot(arena, snake) for snake in arena.living})
+"""
+
+import random
+from array import array
+from typing import Dict, List, Mapping, Optional
+from collections import deque
+
+from snake_engine import MOVES, DIRECTIONS, OPPOSITE_DIRECTIONS, FreeCells
+
+# The owner of a cell that no snake is on
+EMPTY = -1
+
+# The values of `ArenaEngine.grid`. Snake cells are GRID_SNAKE + their color.
+GRID_EMPTY = 0
+GRID_FOOD = 1
+GRID_SNAKE = 2
+# The number of colors the snakes can have in `ArenaEngine.grid`
+SNAKE_COLORS = 256 - GRID_SNAKE
+
+
+class ArenaSnake:
+    """A snake of an arena."""
+
+    __slots__ = ('id', 'body', 'direction', 'color', 'alive', 'score', 'growing')
+
+    def __init__(
+        self, snake_id: int, body: List[int], direction: str, color: int
+    ) -> None:
+        """Arena Snake class.
+
+        Args:
+            snake_id (int): The index of the snake in `ArenaEngine.snakes`.
+            body (List[int]): The cells of the snake, head first.
+            direction (str): The direction the snake is moving to.
+            color (int): The color of the snake in `ArenaEngine.grid`, 0 to
+                SNAKE_COLORS - 1.
+        """
+        self.id = snake_id
+        self.body = deque(body)
+        self.direction = direction
+        self.color = color
+        self.alive = True
+        self.score = 0
+        # Whether the snake eats in the current step, so its tail stays where it is
+        self.growing = False
+
+    @property
+    def head(self) -> int:
+        """The cell of the head."""
+        return self.body[0]
+
+
+class ArenaEngine:
+    """The rules of a game with many snakes, with no window or PyGame involved.
+
+    All the snakes move at the same time. A snake dies when its head moves to a cell
+    of any snake, except a tail that moves away in the same step, or to the same
+    cell as another head. Both snakes die in a head-on collision, so food that two
+    heads reach at the same time is eaten by neither.
+    """
+
+    def __init__(
+        self,
+        columns: int = 72,
+        rows: int = 48,
+        food_count: int = 1,
+        speed: float = 10,
+        seed: Optional[int] = None
+    ) -> None:
+        """Arena Engine class.
+
+        Args:
+            columns (int, optional): The number of columns of the board. Defaults to
+                72.
+            rows (int, optional): The number of rows of the board. Defaults to 48.
+            food_count (int, optional): The number of foods that are kept on the
+                board. Defaults to 1.
+            speed (float, optional): The number of steps in a second of game time.
+                Defaults to 10.
+            seed (Optional[int], optional): The seed of the random number generator.
+                Defaults to None.
+        """
+        self.columns = columns
+        self.rows = rows
+        self.food_count = food_count
+        self.speed = speed
+        self.random = random.Random(seed)
+        self.reset()
+
+    def reset(self) -> None:
+        """Remove all the snakes and start again."""
+        size = self.columns * self.rows
+        # The id of the snake on each cell or EMPTY
+        self.owner = array('i', [EMPTY]) * size
+        # A byte for each cell, for drawing the board: GRID_EMPTY, GRID_FOOD or
+        # GRID_SNAKE + the color of the snake. Many snakes can have the same color,
+        # so `owner` tells them apart.
+        self.grid = bytearray(size)
+        self.foods = FreeCells((), size)
+        # The cells with no snake and no food
+        self.free = FreeCells(range(size), size)
+        self.snakes: List[ArenaSnake] = []
+        self.living: List[ArenaSnake] = []
+        self.steps = 0
+        self.spawn_food()
+
+    @property
+    def done(self) -> bool:
+        """Whether all the snakes are dead."""
+        return not self.living
+
+    @property
+    def step_time(self) -> float:
+        """The game time in seconds that a step takes."""
+        return 1 / self.speed
+
+    def _take(self, cell: int, snake: ArenaSnake) -> None:
+        self.owner[cell] = snake.id
+        self.grid[cell] = GRID_SNAKE + snake.color
+        self.free.discard(cell)
+
+    def _release(self, cell: int) -> None:
+        self.owner[cell] = EMPTY
+        self.grid[cell] = GRID_EMPTY
+        self.free.add(cell)
+
+    def add_snake(
+        self, length: int = 3, attempts: int = 64, color: Optional[int] = None
+    ) -> Optional[ArenaSnake]:
+        """Put a new snake on a random free row of cells, moving right.
+
+        Args:
+            length (int, optional): The length of the snake. Defaults to 3.
+            attempts (int, optional): The number of random places to try. Defaults to
+                64.
+            color (Optional[int], optional): The color of the snake in `grid`, 0 to
+                SNAKE_COLORS - 1. Defaults to None which uses its id % SNAKE_COLORS.
+
+        Returns:
+            Optional[ArenaSnake]: The snake or None if no place was found for it.
+        """
+        columns = self.columns
+        for _ in range(attempts):
+            if not self.free:
+                return None
+            head = self.free.choice(self.random)
+            y = head // columns
+            body = [y * columns + (head - i) % columns for i in range(length)]
+            if all(cell in self.free for cell in body):
+                break
+        else:
+            return None
+        return self.place_snake(body, color=color)
+
+    def place_snake(
+        self, body: List[int], direction: str = 'RIGHT', color: Optional[int] = None
+    ) -> ArenaSnake:
+        """Put a new snake on the given cells.
+
+        Args:
+            body (List[int]): The cells of the snake, head first.
+            direction (str, optional): The direction the snake is moving to. Defaults
+                to 'RIGHT'.
+            color (Optional[int], optional): The color of the snake in `grid`, 0 to
+                SNAKE_COLORS - 1. Defaults to None which uses its id % SNAKE_COLORS.
+
+        Raises:
+            ValueError: If a cell has a snake or food on it or the color is out of
+                range.
+        """
+        if not all(cell in self.free for cell in body):
+            raise ValueError('A snake can only be placed on free cells')
+        snake_id = len(self.snakes)
+        if color is None:
+            color = snake_id % SNAKE_COLORS
+        elif not 0 <= color < SNAKE_COLORS:
+            raise ValueError(f'The color must be between 0 and {SNAKE_COLORS - 1}')
+        snake = ArenaSnake(snake_id, body, direction, color)
+        for cell in body:
+            self._take(cell, snake)
+        self.snakes.append(snake)
+        self.living.append(snake)
+        return snake
+
+    def spawn_food(self) -> None:
+        """Put food on random free cells until there are `food_count` of them."""
+        while len(self.foods) < self.food_count and self.free:
+            cell = self.free.choice(self.random)
+            self.foods.add(cell)
+            self.grid[cell] = GRID_FOOD
+            self.free.discard(cell)
+
+    def next_cell(self, cell: int, direction: str) -> int:
+        """Get the cell next to a cell in a direction, wrapping around the board."""
+        move_x, move_y = MOVES[direction]
+        return ((cell // self.columns + move_y) % self.rows) * self.columns + (
+            (cell % self.columns + move_x) % self.columns
+        )
+
+    def step(self, actions: Optional[Mapping[int, str]] = None) -> List[int]:
+        """Move every living snake one block forward.
+
+        Args:
+            actions (Optional[Mapping[int, str]], optional): The direction to turn to
+                for snake ids. The snakes that are not in it keep their direction.
+                Defaults to None.
+
+        Returns:
+            List[int]: The ids of the snakes that died.
+        """
+        owner = self.owner
+        snakes = self.snakes
+        foods = self.foods
+        living = self.living
+        self.steps += 1
+
+        # Where the heads move to and how many heads move to each cell
+        targets = []
+        claims: Dict[int, int] = {}
+        for snake in living:
+            action = actions.get(snake.id) if actions else None
+            if action in OPPOSITE_DIRECTIONS and action != OPPOSITE_DIRECTIONS[
+                    snake.direction]:
+                snake.direction = action
+            target = self.next_cell(snake.body[0], snake.direction)
+            targets.append(target)
+            claims[target] = claims.get(target, 0) + 1
+            snake.growing = target in foods
+
+        # All the snakes move at once, so a head can follow a tail that moves away
+        dead = []
+        for snake, target in zip(living, targets):
+            other = owner[target]
+            if claims[target] > 1 or (other != EMPTY and (
+                    snakes[other].growing or snakes[other].body[-1] != target)):
+                snake.alive = False
+                dead.append(snake)
+
+        for snake in living:
+            if not snake.growing:
+                self._release(snake.body.pop())
+        for snake in dead:
+            for cell in snake.body:
+                self._release(cell)
+            snake.body.clear()
+
+        for snake, target in zip(living, targets):
+            if not snake.alive:
+                continue
+            if target in foods:
+                foods.discard(target)
+                snake.score += 1
+            self._take(target, snake)
+            snake.body.appendleft(target)
+
+        if dead:
+            self.living = [snake for snake in living if snake.alive]
+        self.spawn_food()
+        return [snake.id for snake in dead]
+
+
+class GreedyBot:
+    """Moves snakes towards food without hitting anything on the next step. It is
+    meant to fill arenas, not to play well."""
+
+    def __init__(self, samples: int = 8, seed: Optional[int] = None) -> None:
+        """Greedy Bot class.
+
+        Args:
+            samples (int, optional): The number of random foods to pick the closest
+                one from, so picking a food doesn't get slower with more foods.
+                Defaults to 8.
+            seed (Optional[int], optional): The seed of the bot's random number
+                generator. Defaults to None.
+        """
+        self.samples = samples
+        self.random = random.Random(seed)
+        self.targets: Dict[int, int] = {}
+
+    def _distance(self, arena: ArenaEngine, a: int, b: int) -> int:
+        dx = abs(a % arena.columns - b % arena.columns)
+        dy = abs(a // arena.columns - b // arena.columns)
+        return min(dx, arena.columns - dx) + min(dy, arena.rows - dy)
+
+    def __call__(self, arena: ArenaEngine, snake: ArenaSnake) -> Optional[str]:
+        """Get the direction a snake should turn to."""
+        head = snake.body[0]
+        target = self.targets.get(snake.id)
+        if target is None or target not in arena.foods:
+            target = None
+            if arena.foods:
+                target = min(
+                    (arena.foods.choice(self.random) for _ in range(self.samples)),
+                    key=lambda food: self._distance(arena, head, food)
+                )
+            self.targets[snake.id] = target
+
+        best = 0
+        choice = None
+        for direction in DIRECTIONS:
+            if direction == OPPOSITE_DIRECTIONS[snake.direction]:
+                continue
+            cell = arena.next_cell(head, direction)
+            if arena.owner[cell] != EMPTY:
+                continue
+            distance = 0 if target is None else self._distance(arena, cell, target)
+            # Keep away from cells that another head may move to as well
+            for near in DIRECTIONS:
+                neighbor = arena.next_cell(cell, near)
+                other = arena.owner[neighbor]
+                if (other not in (EMPTY, snake.id)
+                        and arena.snakes[other].body[0] == neighbor):
+                    distance += arena.columns + arena.rows
+                    break
+            # Going straight wins ties, so the snakes don't wiggle
+            distance -= direction == snake.direction
+            if choice is None or distance < best:
+                best, choice = distance, direction
+        return choice
@@ -0,0 +1,472 @@
+"""A controller that plays the game by itself.
+
+The autopilot looks for the shortest safe path to the food or the big food with a
+breadth-first search on the wrapping board. A path is safe if the snake can still
+reach its tail after following it. If there is no safe path, the snake follows its
+tail and if it cannot reach its tail either, it follows a cycle through every cell
+of the board. Boards with walls have no such cycle.
+
+The searches work on the whole board at once: a set of cells is a Python integer
+with a bit for each cell, and a step of the search moves all the cells of its
+frontier with a few shifts. A step takes time in proportion to the number of cells
+of the board, so each search stops after `SEARCH_WORK` cells worth of steps. When
+the food is farther than that, the snake heads to the cell of the last step that is
+closest to it. The set of the cells of the snake is kept up to date as it moves
+instead of being made again for each search, and a path is reused until the food
+moves or something gets in the way, so most steps don't search at all.
+"""
+
+import random
+import itertools
+from typing import List, Tuple, Optional, Sequence
+from collections import deque
+
+from snake_engine import BLOCK_SIZE, DIRECTIONS, SnakeEngine
+from snake_level import Level
+
+# The direction index of the opposite of each direction index
+OPPOSITE = (1, 0, 3, 2)
+
+# The number of steps of a search times the number of cells of the board. It keeps
+# the calls that search well under a tick of the GOD difficulty (2.5ms).
+SEARCH_WORK = 400_000
+
+# Turns bytes of 0 or 1 into the digits of a binary number
+_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def cell_set(cells: bytes) -> int:
+    """Turn a byte of 0 or 1 for each cell into a set of cells, an integer with the
+    bit of each cell that has a 1."""
+    return int(bytes(cells).translate(_DIGITS)[::-1] or b'0', 2)
+
+
+def cycle_path(columns: int, rows: int) -> Optional[List[Tuple[int, int]]]:
+    """A closed path through every cell of the board that doesn't need to wrap.
+
+    The path goes right through the first row, zigzags through the rest of the
+    columns and comes back up through the first column. If `rows` is odd, the same
+    is done with the columns and the rows swapped.
+
+    Returns:
+        Optional[List[Tuple[int, int]]]: The (x, y) of the cells of the path or None
+            if both `columns` and `rows` are odd.
+    """
+    if rows % 2:
+        if columns % 2:
+            return None
+        return [(x, y) for y, x in cycle_path(rows, columns)]
+    path = [(x, 0) for x in range(columns)]
+    for y in range(1, rows):
+        xs = range(columns - 1, 0, -1) if y % 2 else range(1, columns)
+        path.extend((x, y) for x in xs)
+    path.extend((0, y) for y in range(rows - 1, 0, -1))
+    return path
+
+
+def cycle_next(columns: int, rows: int, x: int, y: int) -> Optional[Tuple[int, int]]:
+    """Get the cell after (x, y) on the path of `cycle_path` without making the
+    whole path.
+
+    Returns:
+        Optional[Tuple[int, int]]: The (x, y) of the next cell or None if both
+            `columns` and `rows` are odd.
+    """
+    if rows % 2:
+        if columns % 2:
+            return None
+        next_y, next_x = cycle_next(rows, columns, y, x)
+        return next_x, next_y
+    if x == 0 and (y > 0 or columns == 1):
+        # Going up through the first column
+        return 0, (y - 1) % rows
+    if y == 0 or y % 2 == 0:
+        # Going right, then down at the end of the row
+        return (x + 1, y) if x < columns - 1 else (x, (y + 1) % rows)
+    # Going left, then down, or to the first column from the last row
+    if x > 1:
+        return x - 1, y
+    return (1, y + 1) if y < rows - 1 else (0, y)
+
+
+class Autopilot:
+    """Plays the game. Call it with the engine to get the direction to turn to.
+
+    It has the signature of a `snake_runner` policy, so it can play headless games
+    too.
+    """
+
+    def __init__(self) -> None:
+        """Autopilot class."""
+        self.size: Optional[Tuple[int, int]] = None
+        self.level: Optional[Level] = None
+        # The path to the food as (cell, direction index) pairs, the next step last
+        self.path: List[Tuple[int, int]] = []
+        self._path_key = None
+        self._expected_head = -1
+
+    def _prepare(self, columns: int, rows: int, level: Optional[Level] = None) -> None:
+        """Make the search buffers for a board size and its walls."""
+        if self.size == (columns, rows) and self.level is level:
+            return
+        self.size = (columns, rows)
+        self.level = level
+        cells = columns * rows
+        # The number of steps a search may take on this board
+        self.max_steps = max(8, SEARCH_WORK // cells)
+        # The cells reached in each step of the last search
+        self._reached: List[int] = []
+        self.exhausted = False
+
+        # The masks of the bit shifts that move a set of cells one step, wrapping
+        # around the board
+        self._all = (1 << cells) - 1
+        self._first_column = self._all // ((1 << columns) - 1)
+        self._last_column = self._first_column << (columns - 1)
+        self._first_row = (1 << columns) - 1
+        # The cells that are not walls
+        self._open = self._all
+
+        # The cells of the snake as it was last seen, head first, and as a set
+        self._body: deque = deque()
+        self._body_bits = 0
+        self._synced = (None, -1)
+        # The cells of the score box as a list and as a set, for its position
+        self._box_key = None
+        self._box: List[int] = []
+        self._box_bits = 0
+
+        self._walls: Optional[bytes] = None
+        if level is not None and any(level.walls):
+            self._walls = level.walls
+            self._open &= ~cell_set(self._walls)
+        self.path.clear()
+
+    def _neighbors(self, cell: int) -> Tuple[int, int, int, int]:
+        """Get the neighbours of a cell in the order of DIRECTIONS. Walls are
+        replaced by an extra cell that is never open, so the searches don't have to
+        check for them."""
+        columns, rows = self.size
+        y, x = divmod(cell, columns)
+        neighbors = (
+            (y - 1) % rows * columns + x, (y + 1) % rows * columns + x,
+            y * columns + (x - 1) % columns, y * columns + (x + 1) % columns
+        )
+        walls = self._walls
+        if walls is None:
+            return neighbors
+        return tuple(columns * rows if walls[n] else n for n in neighbors)
+
+    def _cycle_next(self, cell: int) -> int:
+        """Get the cell after a cell on a cycle through every cell of the board, or
+        -1 if there is no such cycle."""
+        columns, rows = self.size
+        if self._walls is not None:
+            return -1
+        following = cycle_next(columns, rows, cell % columns, cell // columns)
+        if following is None:
+            return -1
+        return following[1] * columns + following[0]
+
+    def _sync(self, engine: SnakeEngine) -> None:
+        """Update the set of the cells of the snake. After a step, only the new head
+        and the cells the tail left are changed."""
+        body, tracked = engine.body, self._body
+        source, steps = self._synced
+        self._synced = (body, engine.steps)
+        if source is body and tracked and len(body) > 1:
+            if steps == engine.steps and tracked[0] == body[0]:
+                return
+            if steps + 1 == engine.steps and tracked[0] == body[1]:
+                bits = self._body_bits | 1 << body[0]
+                tracked.appendleft(body[0])
+                occupied = engine.occupied
+                while len(tracked) > len(body):
+                    cell = tracked.pop()
+                    if not occupied[cell]:
+                        bits &= ~(1 << cell)
+                if tracked[-1] == body[-1]:
+                    self._body_bits = bits
+                    return
+        # The snake was replaced, e.g. by a new game or a loaded state
+        marks = bytearray(engine.columns * engine.rows)
+        for cell in body:
+            marks[cell] = 1
+        self._body = deque(body)
+        self._body_bits = cell_set(marks)
+
+    def _score_box(self, engine: SnakeEngine) -> Tuple[List[int], int]:
+        """The cells of the score box, where the snake loses score, as a list and as
+        a set."""
+        key = engine.score_box
+        if key != self._box_key:
+            self._box_key = key
+            x, y, width, height = key
+            columns, rows = self.size
+            self._box = [
+                (row % rows) * columns + column % columns
+                for row in range(y // BLOCK_SIZE, (y + height - 1) // BLOCK_SIZE + 1)
+                for column in range(x // BLOCK_SIZE, (x + width - 1) // BLOCK_SIZE + 1)
+            ]
+            self._box_bits = 0
+            for cell in self._box:
+                self._box_bits |= 1 << cell
+        return self._box, self._box_bits
+
+    def _spread(self, cells: int) -> int:
+        """Get the neighbours of a set of cells, wrapping around the board."""
+        columns, rows = self.size
+        last_row = columns * (rows - 1)
+        first_column, last_column = self._first_column, self._last_column
+        return (
+            cells >> columns | (cells & self._first_row) << last_row
+            | (cells << columns & self._all) | cells >> last_row
+            | (cells & ~first_column) >> 1 | (cells & first_column) << (columns - 1)
+            | (cells & ~last_column) << 1 | (cells & last_column) >> (columns - 1)
+        )
+
+    def _search(
+        self,
+        start: int,
+        wanted: int,
+        blocked: int,
+        body: Sequence[int],
+        growth: int,
+        forbidden: int = -1
+    ) -> int:
+        """Find the closest wanted cell that can be reached without hitting anything.
+
+        A cell of the snake can be entered once the snake has moved out of it: the
+        tail after `growth + 1` steps, the block before it a step later and so on.
+        The search stops after `max_steps` steps and sets `exhausted` if it could
+        have gone on.
+
+        Args:
+            start (int): The cell to search from.
+            wanted (int): The set of cells to look for.
+            blocked (int): The set of cells that can't be entered at the start.
+            body (Sequence[int]): The cells of the snake, head first.
+            growth (int): The number of steps the snake grows before its tail moves.
+            forbidden (int, optional): A neighbour of `start` that must not be the
+                first step. Defaults to -1.
+
+        Returns:
+            int: The cell that was found or -1. The path to it is found with
+                `_path_to`.
+        """
+        free = self._open & ~blocked
+        seen = frontier = 1 << start
+        if forbidden >= 0:
+            # It can be reached later, just not as the first step
+            seen |= 1 << forbidden
+        reached = self._reached
+        reached.clear()
+        reached.append(frontier)
+        spread = self._spread
+        length = len(body)
+        # The cell of the snake that is free after the next step
+        released = length + growth - 1
+        self.exhausted = False
+        for steps in range(1, self.max_steps + 1):
+            if 0 <= released < length:
+                free |= 1 << body[released]
+            released -= 1
+            frontier = spread(frontier) & free & ~seen
+            if not frontier:
+                return -1
+            if steps == 1 and forbidden >= 0:
+                seen &= ~(1 << forbidden)
+            seen |= frontier
+            reached.append(frontier)
+            found = frontier & wanted
+            if found:
+                return (found & -found).bit_length() - 1
+        self.exhausted = True
+        return -1
+
+    def _closest(self, cells: int, targets: Sequence[int]) -> int:
+        """Get the cell of a set that is the closest to a target, ignoring what is
+        in the way."""
+        columns, rows = self.size
+        best, best_distance = -1, columns + rows
+        while cells:
+            low = cells & -cells
+            cells ^= low
+            cell = low.bit_length() - 1
+            y, x = divmod(cell, columns)
+            for target in targets:
+                dx = abs(x - target % columns)
+                dy = abs(y - target // columns)
+                distance = min(dx, columns - dx) + min(dy, rows - dy)
+                if distance < best_distance:
+                    best, best_distance = cell, distance
+        return best
+
+    def _path_to(self, start: int, target: int) -> List[Tuple[int, int]]:
+        """Get the path to a target found by `_search`, the first step last."""
+        reached = self._reached
+        path = []
+        cell = target
+        for step in range(len(reached) - 2, -1, -1):
+            # Any neighbour that was reached in the step before leads here
+            for index, previous in enumerate(self._neighbors(cell)):
+                if reached[step] >> previous & 1:
+                    path.append((cell, OPPOSITE[index]))
+                    cell = previous
+                    break
+        return path
+
+    def _is_safe(
+        self, engine: SnakeEngine, path: List[Tuple[int, int]], growth: int
+    ) -> bool:
+        """Check that the snake can reach its tail after following a path.
+
+        Args:
+            engine (SnakeEngine): The engine.
+            path (List[Tuple[int, int]]): The path, the first step last.
+            growth (int): The number of blocks the snake grows for what it eats at
+                the end of the path.
+        """
+        body = engine.body
+        steps = len(path)
+        grown = min(engine.getting_big_score, steps)
+        length = len(body) + grown
+        if engine.food_spawn and path[0][0] == engine.food:
+            length += 1
+            growth -= 1
+        # The snake at the end of the path, head first
+        cells = [cell for cell, _ in path[:length]]
+        kept = length - len(cells)
+        bits = self._body_bits
+        for cell in itertools.islice(reversed(body), max(len(body) - kept, 0)):
+            bits &= ~(1 << cell)
+        for cell in cells:
+            bits |= 1 << cell
+        cells.extend(itertools.islice(body, kept))
+        neck = cells[1] if len(cells) > 1 else -1
+        # Reaching any cell the snake left is enough: the cells behind it were
+        # left earlier, so they lead to the tail
+        return self._search(
+            cells[0], bits & ~(1 << cells[0]), bits, cells,
+            engine.getting_big_score - grown + growth, neck
+        ) >= 0
+
+    def _targets(self, engine: SnakeEngine) -> Tuple[int, ...]:
+        """The cells of the food and the big food."""
+        targets = ()
+        if engine.food_spawn:
+            targets += (engine.food,)
+        if engine.big_food_time_left > 0:
+            columns, rows = self.size
+            x, y = engine.big_food % columns, engine.big_food // columns
+            targets += tuple(
+                (y + dy) % rows * columns + (x + dx) % columns
+                for dy in (0, 1) for dx in (0, 1)
+            )
+        return targets
+
+    def _plan(self, engine: SnakeEngine, targets: Tuple[int, ...]) -> Optional[int]:
+        """Find a safe path to the targets, or follow the tail or the cycle.
+
+        Returns:
+            Optional[int]: The index of the direction to go to or None if all the
+                neighbours are blocked.
+        """
+        body = engine.body
+        head = body[0]
+        options = self._neighbors(head)
+        forbidden = options[OPPOSITE[DIRECTIONS.index(engine.direction)]]
+        body_bits = self._body_bits
+        # The areas of the level tell which targets can't be reached at all, which
+        # would take a search of the whole area of the head to find out
+        if self.level is not None:
+            reachable = self.level.reachable
+            targets = tuple(cell for cell in targets if reachable(head, cell))
+
+        # The shortest path to the food that doesn't go through the score box
+        if targets:
+            _, box_bits = self._score_box(engine)
+            wanted = 0
+            for cell in targets:
+                wanted |= 1 << cell
+            found = self._search(
+                head, wanted, body_bits | box_bits, body, engine.getting_big_score,
+                forbidden
+            )
+            growth = 0
+            if found >= 0:
+                if engine.food_spawn and found == engine.food:
+                    growth = 1
+                else:
+                    growth = engine.big_food_score
+            elif self.exhausted:
+                # The food is too far to search for, go closer to it
+                found = self._closest(self._reached[-1], targets)
+            if found >= 0:
+                path = self._path_to(head, found)
+                if self._is_safe(engine, path, growth):
+                    self.path = path
+                    return self.path[-1][1]
+
+        # Follow the tail, it always moves out of the way. Only the first step is
+        # taken, the tail is somewhere else in the next step.
+        found = self._search(
+            head, body_bits & ~(1 << head), body_bits, body, engine.getting_big_score,
+            forbidden
+        )
+        if found >= 0:
+            return self._path_to(head, found)[-1][1]
+
+        # Follow the cycle or take any step that doesn't hit anything
+        free = self._open & ~body_bits
+        if not engine.getting_big_score:
+            free |= 1 << body[-1]
+        following = self._cycle_next(head)
+        if following in options:
+            index = options.index(following)
+            if following != forbidden and free >> following & 1:
+                return index
+        for index, cell in enumerate(options):
+            if cell != forbidden and free >> cell & 1:
+                return index
+        return None
+
+    def __call__(
+        self, engine: SnakeEngine, rng: Optional[random.Random] = None
+    ) -> Optional[str]:
+        """Get the direction to turn to in the next step.
+
+        Args:
+            engine (SnakeEngine): The engine of the game.
+            rng (Optional[random.Random], optional): Not used. It is accepted so the
+                autopilot can be used as a `snake_runner` policy. Defaults to None.
+
+        Returns:
+            Optional[str]: The direction or None to go straight.
+        """
+        self._prepare(engine.columns, engine.rows, engine.level)
+        self._sync(engine)
+        head = engine.body[0]
+        targets = self._targets(engine)
+        key = (self.size, targets)
+
+        # Keep following the path while it's still open
+        if self.path and key == self._path_key and head == self._expected_head:
+            cell, index = self.path[-1]
+            if not engine.occupied[cell] or (cell == engine.body[-1]
+                                             and not engine.getting_big_score
+                                             and cell != engine.food):
+                self.path.pop()
+                self._expected_head = cell
+                return DIRECTIONS[index]
+
+        self.path = []
+        self._path_key = key
+        index = self._plan(engine, targets)
+        if index is None:
+            self._expected_head = -1
+            return None
+        if self.path:
+            self.path.pop()
+        self._expected_head = self._neighbors(head)[index]
+        return DIRECTIONS[index]
@@ -0,0 +1,352 @@
+"""Run many games at once with NumPy, e.g. for training agents.
+
+The rules are the same as the rules of `SnakeEngine`. The score box is measured with
+`estimate_text_size`, as the headless engine does.
+"""
+
+from typing import Tuple, Union, Optional, Sequence
+
+import numpy as np
+
+from snake_engine import BLOCK_SIZE, BAR_THICKNESS, estimate_text_size
+
+# The direction codes are the indices of snake_engine.DIRECTIONS:
+# 0 -> UP; 1 -> DOWN; 2 -> LEFT; 3 -> RIGHT
+MOVE_X = np.array([0, 0, -1, 1], dtype=np.int32)
+MOVE_Y = np.array([-1, 1, 0, 0], dtype=np.int32)
+OPPOSITE = np.array([1, 0, 3, 2], dtype=np.int8)
+
+Indices = Union[None, Sequence[int], np.ndarray]
+
+
+class BatchSnakeEnv:
+    """Many boards of the same size that are all moved with one `step`.
+
+    The state of the boards is kept in NumPy arrays:
+        * `head_x`, `head_y` and `direction` for each board.
+        * `occupied`: The number of snake blocks in each cell of each board. It can be
+          seen as a grid with `occupied.reshape(num_envs, rows, columns)`.
+        * `ring`, `head_index` and `length`: The snake bodies as ring buffers of cell
+          indices. The body of board `i` is `ring[i, head_index[i]]`,
+          `ring[i, head_index[i] + 1]`, ... wrapping around `ring.shape[1]`.
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        frame_size_x: int = 720,
+        frame_size_y: int = 480,
+        base_difficulty: float = 10,
+        difficulty_modifier: float = 2.5,
+        big_food_chance: float = 0.02,
+        big_food_score: int = 3,
+        big_food_time: float = 6,
+        seed: Optional[int] = None
+    ) -> None:
+        """Batch Snake Env class.
+
+        Args:
+            num_envs (int): The number of boards.
+            frame_size_x (int, optional): Frame size x. Defaults to 720.
+            frame_size_y (int, optional): Frame size y. Defaults to 480.
+            base_difficulty (float, optional): Base difficulty. Defaults to 10.
+            difficulty_modifier (float, optional): Difficulty modifier. Defaults to 2.5.
+            big_food_chance (float, optional): Big food chance. Defaults to 0.02.
+            big_food_score (int, optional): Big food score. Defaults to 3.
+            big_food_time (float, optional): Big food time. Defaults to 6.
+            seed (Optional[int], optional): The seed of the random number generator.
+                Defaults to None.
+        """
+        self.num_envs = num_envs
+        self.frame_size_x = (frame_size_x // BLOCK_SIZE) * BLOCK_SIZE
+        self.frame_size_y = (frame_size_y // BLOCK_SIZE) * BLOCK_SIZE
+        self.columns = self.frame_size_x // BLOCK_SIZE
+        self.rows = self.frame_size_y // BLOCK_SIZE
+        self.cells = self.columns * self.rows
+        self.base_difficulty = base_difficulty
+        self.difficulty_modifier = difficulty_modifier
+        self.big_food_chance = big_food_chance
+        self.big_food_score = big_food_score
+        self.big_food_time = big_food_time
+        self.rng = np.random.default_rng(seed)
+
+        # The score box only gets wider as the score gets more digits
+        self._char_width, text_height = estimate_text_size('0')
+        self._score_box_x = self.frame_size_x // 25 - 5
+        self._score_box_y = self.frame_size_y // 25 - 5
+        self._score_box_height = text_height + 10
+        if big_food_chance > 0:
+            time_bar_y = (self.frame_size_y * 19) // 20 - BAR_THICKNESS - 5
+        else:
+            time_bar_y = self.frame_size_y
+
+        # The cells that food can be spawned in
+        top = 1 + (self._score_box_y + self._score_box_height) // BLOCK_SIZE
+        bottom = time_bar_y // BLOCK_SIZE - 1
+        zone = np.zeros((self.rows, self.columns), dtype=bool)
+        zone[max(top, 0):max(bottom, 0), 1:] = True
+        self.spawn_zone = zone.ravel()
+        self._food_cells = np.flatnonzero(zone)
+        # The cells that the top left block of a big food can be in
+        big_zone = zone.copy()
+        big_zone[:, -1] = False
+        big_zone[:-1] &= zone[1:]
+        big_zone[:, :-1] &= zone[:, 1:]
+        big_zone[:-1, :-1] &= zone[1:, 1:]
+        big_zone[-1] = False
+        self._big_food_cells = np.flatnonzero(big_zone)
+
+        n = num_envs
+        self.head_x = np.zeros(n, dtype=np.int32)
+        self.head_y = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.occupied = np.zeros((n, self.cells), dtype=np.uint8)
+        self.ring = np.zeros((n, self.cells + 1), dtype=np.int32)
+        self.head_index = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int64)
+        self.food = np.zeros(n, dtype=np.int64)
+        self.food_spawn = np.zeros(n, dtype=bool)
+        self.big_food = np.zeros(n, dtype=np.int64)
+        self.big_food_time_left = np.zeros(n, dtype=np.float64)
+        self.getting_big_score = np.zeros(n, dtype=np.int32)
+        self.next_big_food_roll = np.zeros(n, dtype=np.float64)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.current_difficulty = np.zeros(n, dtype=np.float64)
+        self.eating_score = np.zeros(n, dtype=bool)
+        self.in_the_danger_zone = np.zeros(n, dtype=bool)
+        self.done = np.zeros(n, dtype=bool)
+        self.steps = np.zeros(n, dtype=np.int64)
+
+        self.reset()
+
+    def _indices(self, indices: Indices) -> np.ndarray:
+        if indices is None:
+            return np.arange(self.num_envs)
+        indices = np.asarray(indices)
+        if indices.dtype == bool:
+            return np.flatnonzero(indices)
+        return indices
+
+    def reset(self, indices: Indices = None) -> None:
+        """Start new games.
+
+        Args:
+            indices (Indices, optional): The boards to reset, as indices or as a
+                boolean mask, e.g. the `dones` that `step` returned. Defaults to None
+                which resets all of them.
+        """
+        idx = self._indices(indices)
+        start = 5 * self.columns + np.arange(10, 7, -1)
+        self.occupied[idx] = 0
+        self.occupied[idx[:, None], start] = 1
+        self.ring[idx, :3] = start
+        self.head_index[idx] = 0
+        self.length[idx] = 3
+        self.head_x[idx] = 10
+        self.head_y[idx] = 5
+        self.direction[idx] = 3
+        self.big_food[idx] = 0
+        self.big_food_time_left[idx] = 0
+        self.getting_big_score[idx] = 0
+        self.next_big_food_roll[idx] = 0
+        self.score[idx] = 0
+        self.current_difficulty[idx] = self.base_difficulty
+        self.eating_score[idx] = False
+        self.in_the_danger_zone[idx] = False
+        self.done[idx] = False
+        self.steps[idx] = 0
+        self.food_spawn[idx] = False
+        self._spawn_food(idx)
+
+    def _pop_tail(self, idx: np.ndarray) -> None:
+        capacity = self.ring.shape[1]
+        tail = self.ring[idx, (self.head_index[idx] + self.length[idx] - 1) % capacity]
+        self.occupied[idx, tail] -= 1
+        self.length[idx] -= 1
+
+    def _pick_free(
+        self, idx: np.ndarray, candidates: np.ndarray, offsets: Tuple[int, ...],
+        attempts: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Pick a random cell for each board from `candidates` so that the cells at
+        the given offsets from it are not taken.
+
+        Random cells are tried a few times first. The boards that didn't find a cell
+        check all the candidates, so this never retries forever.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The boards that found a cell and the cells.
+        """
+        found_idx, found_cells = [], []
+        pending = idx
+        if len(candidates):
+            for _ in range(attempts):
+                if not len(pending):
+                    break
+                cells = candidates[self.rng.integers(
+                    len(candidates), size=len(pending)
+                )]
+                ok = self._is_free(pending, cells, offsets)
+                found_idx.append(pending[ok])
+                found_cells.append(cells[ok])
+                pending = pending[~ok]
+            for i in pending:
+                i = np.full(len(candidates), i)
+                free = candidates[self._is_free(i, candidates, offsets)]
+                if len(free):
+                    found_idx.append(i[:1])
+                    found_cells.append(self.rng.choice(free, 1))
+        if not found_idx:
+            return idx[:0], idx[:0]
+        return np.concatenate(found_idx), np.concatenate(found_cells)
+
+    def _is_free(
+        self, idx: np.ndarray, cells: np.ndarray, offsets: Tuple[int, ...]
+    ) -> np.ndarray:
+        free = np.ones(len(idx), dtype=bool)
+        food = np.where(self.food_spawn[idx], self.food[idx], -1)
+        for offset in offsets:
+            free &= self.occupied[idx, cells + offset] == 0
+            free &= cells + offset != food
+        return free
+
+    def _spawn_food(self, idx: np.ndarray) -> None:
+        idx, cells = self._pick_free(idx, self._food_cells, (0, ), 8)
+        self.food[idx] = cells
+        self.food_spawn[idx] = True
+
+    def _spawn_big_food(self, idx: np.ndarray) -> np.ndarray:
+        offsets = (0, 1, self.columns, self.columns + 1)
+        idx, cells = self._pick_free(idx, self._big_food_cells, offsets, 16)
+        self.big_food[idx] = cells
+        self.big_food_time_left[idx] = self.big_food_time
+        return idx
+
+    def _advance_big_food(self, idx: np.ndarray, seconds: np.ndarray) -> None:
+        """Advance the big food timers like `SnakeEngine.advance_big_food`. At most
+        one spawn roll is made in each step."""
+        if not 0 < self.big_food_chance < 1:
+            return
+        time_left = self.big_food_time_left[idx]
+        active = time_left > 0
+        expired = active & (time_left <= seconds)
+        self.big_food_time_left[idx] = np.where(
+            active & ~expired, time_left - seconds, 0
+        )
+
+        # The time that passes without a big food on the board
+        seconds = np.where(active, seconds - time_left, seconds)
+        next_roll = np.where(expired, 0, self.next_big_food_roll[idx])
+        waiting = ~active | expired
+        due = waiting & (next_roll <= seconds)
+        self.next_big_food_roll[idx] = np.where(waiting & ~due, next_roll - seconds, 0)
+
+        seconds = (seconds - next_roll)[due]
+        idx = idx[due]
+        rolled = self.rng.random(len(idx)) <= self.big_food_chance
+        spawned = np.zeros(len(idx), dtype=bool)
+        spawned[np.isin(idx, self._spawn_big_food(idx[rolled]))] = True
+        self.big_food_time_left[idx[spawned]] -= seconds[spawned]
+        self.next_big_food_roll[idx[~spawned]] = 1 - seconds[~spawned]
+
+    def step(
+        self, actions: Union[Sequence[int], np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Move the snake of every board that is not done one block forward.
+
+        Args:
+            actions (Union[Sequence[int], np.ndarray]): The direction code to turn to
+                for each board, or -1 to keep the current direction. The snakes cannot
+                turn to the opposite direction instantaneously.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The change of the score of each board and
+                whether each game is over.
+        """
+        rewards = np.zeros(self.num_envs, dtype=np.int32)
+        idx = np.flatnonzero(~self.done)
+        if not len(idx):
+            return rewards, self.done.copy()
+        actions = np.asarray(actions)[idx]
+
+        # Making sure the snakes cannot move in the opposite direction
+        # instantaneously
+        direction = self.direction[idx]
+        direction = np.where(
+            (actions >= 0) & (actions != OPPOSITE[direction]), actions, direction
+        ).astype(np.int8)
+        self.direction[idx] = direction
+
+        # Moving the snakes and getting out of bounds
+        x = (self.head_x[idx] + MOVE_X[direction]) % self.columns
+        y = (self.head_y[idx] + MOVE_Y[direction]) % self.rows
+        head = y * self.columns + x
+        self.head_x[idx] = x
+        self.head_y[idx] = y
+        start_score = self.score[idx]
+
+        # Snake eating and growing mechanism
+        ate = self.food_spawn[idx] & (head == self.food[idx])
+        growing = ~ate & (self.getting_big_score[idx] > 0)
+        self.getting_big_score[idx[growing]] -= 1
+        score = start_score + (ate | growing)
+        self.food_spawn[idx[ate]] = False
+        self._pop_tail(idx[~(ate | growing)])
+
+        big_food = self.big_food[idx]
+        big_x = x - big_food % self.columns
+        big_y = y - big_food // self.columns
+        ate_big = ((self.big_food_time_left[idx] > 0) & (big_x >= 0) & (big_x <= 1)
+                   & (big_y >= 0) & (big_y <= 1))
+        self.getting_big_score[idx[ate_big]] = self.big_food_score
+        self.big_food_time_left[idx[ate_big]] = 0
+        self.big_food[idx[ate_big]] = 0
+
+        # Game Over condition
+        # Touching the snake body
+        dead = self.occupied[idx, head] > 0
+        self.head_index[idx] = (self.head_index[idx] - 1) % self.ring.shape[1]
+        self.ring[idx, self.head_index[idx]] = head
+        self.length[idx] += 1
+        self.occupied[idx, head] += 1
+        self.done[idx[dead]] = True
+        rewards[idx[dead]] = score[dead] - start_score[dead]
+        self.score[idx[dead]] = score[dead]
+        self.steps[idx] += 1
+
+        alive = ~dead
+        idx, x, y, score, start_score = (
+            idx[alive], x[alive], y[alive], score[alive], start_score[alive]
+        )
+
+        # Decrease score if snake is in score box
+        digits = np.floor(np.log10(np.maximum(score, 1))).astype(np.int32) + 1
+        box_width = self._char_width * (len('Score : ') + digits) + 10
+        box_x = x * BLOCK_SIZE - self._score_box_x
+        box_y = y * BLOCK_SIZE - self._score_box_y
+        eating_score = ((score > 0) & (box_x >= 0) & (box_x < box_width) & (box_y >= 0)
+                        & (box_y < self._score_box_height))
+        score -= eating_score
+        self._pop_tail(idx[eating_score])
+        self.eating_score[idx] = eating_score
+
+        # Set difficulty
+        difficulty = score * self.difficulty_modifier + self.base_difficulty
+        self.current_difficulty[idx] = difficulty
+
+        # Decrease score if snake is in Insane or GOD difficulty box
+        danger = (score > 0) & (difficulty >= 250)
+        score -= danger
+        self._pop_tail(idx[danger])
+        self.in_the_danger_zone[idx] = danger
+
+        self.score[idx] = score
+        rewards[idx] = score - start_score
+
+        # Spawning food on the boards
+        self._spawn_food(idx[~self.food_spawn[idx]])
+
+        step_time = np.where(eating_score, 1 / self.base_difficulty, 1 / difficulty)
+        self._advance_big_food(idx, step_time)
+
+        return rewards, self.done.copy()
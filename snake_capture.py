@@ -0,0 +1,540 @@
+"""Record the frames of a game as PNG files, an animated GIF or a video.
+
+Grabbing a frame only copies the pixels of the window into a free slot of a ring
+buffer. A worker process (or thread) converts the frames and encodes them, so the
+game loop doesn't wait for the encoder. When all the slots are taken, a live game
+drops the frame instead of waiting, and a headless render waits for a free slot.
+
+Example:
+    python snake-game.py --capture game.gif
+    python snake-game.py --render-replay game.snake --capture frames
+
+    with FrameCapture(GifWriter('game.gif', fps=30)) as capture:
+        capture.grab(surface)
+"""
+
+import os
+import abc
+import zlib
+import queue
+import signal
+import struct
+import threading
+import subprocess
+import multiprocessing
+from typing import IO, Any, Tuple, Union, Optional, Sequence
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+
+# The index of the transparent color in the GIF palette
+TRANSPARENT = 255
+
+
+class FrameWriter(abc.ABC):
+    """Writes frames of RGB pixels somewhere. The frames of a writer all have the
+    same size."""
+
+    def open(self, size: Tuple[int, int]) -> None:
+        """Get ready to write frames of the given (width, height)."""
+
+    @abc.abstractmethod
+    def write(self, frame: np.ndarray) -> None:
+        """Write a `height x width x 3` array of RGB bytes."""
+
+    def close(self) -> None:
+        """Finish writing."""
+
+
+class PngWriter(FrameWriter):
+    """Writes each frame to a numbered PNG file in a folder."""
+
+    def __init__(self, folder: str, compression: int = 6) -> None:
+        """Png Writer class.
+
+        Args:
+            folder (str): The folder of the files. It is made if it doesn't exist.
+            compression (int, optional): The zlib compression level, 0 to 9. Defaults
+                to 6.
+        """
+        self.folder = folder
+        self.compression = compression
+        self.frames = 0
+
+    def open(self, size: Tuple[int, int]) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+
+    def write(self, frame: np.ndarray) -> None:
+        height, width, _ = frame.shape
+        # Each row starts with the type of its filter, 0 for none
+        rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+        rows[:, 1:] = frame.reshape(height, -1)
+        path = os.path.join(self.folder, f'frame_{self.frames:06d}.png')
+        with open(path, 'wb') as file:
+            file.write(b'\x89PNG\r\n\x1a\n')
+            _png_chunk(file, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0,
+                                                  0, 0))
+            _png_chunk(file, b'IDAT', zlib.compress(rows.tobytes(), self.compression))
+            _png_chunk(file, b'IEND', b'')
+        self.frames += 1
+
+
+def _png_chunk(file: IO[bytes], kind: bytes, data: bytes) -> None:
+    file.write(struct.pack('>I', len(data)) + kind + data)
+    file.write(struct.pack('>I', zlib.crc32(kind + data)))
+
+
+def gif_palette() -> np.ndarray:
+    """Get the 256 colors of the GIF frames: a 6x6x6 color cube, 35 more grays for
+    antialiased text and the transparent color last."""
+    levels = np.arange(6, dtype=np.uint8) * 51
+    cube = np.stack(np.meshgrid(levels, levels, levels, indexing='ij'), -1)
+    grays = np.setdiff1d(np.linspace(0, 255, 41).round().astype(np.uint8), levels)
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    palette[:216] = cube.reshape(-1, 3)
+    palette[216:216 + len(grays)] = grays[:, None]
+    return palette
+
+
+def _palette_tables(palette: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # The cube index of each value of a channel and the index of the nearest gray
+    # to each gray level
+    levels = np.arange(256)
+    cube = ((levels * 5 + 127) // 255).astype(np.uint8)
+    grays = np.flatnonzero(
+        (palette[:255, 0] == palette[:255, 1]) & (palette[:255, 1] == palette[:255, 2])
+    )
+    nearest = np.abs(levels[:, None] - palette[grays, 0][None, :].astype(int))
+    return cube, grays[nearest.argmin(1)].astype(np.uint8)
+
+
+def lzw_encode(data: bytes, min_code_size: int = 8) -> bytes:
+    """Compress the color indices of a GIF image."""
+    clear = 1 << min_code_size
+    code_size = min_code_size + 1
+    next_code = clear + 2
+    table = {}
+    out = bytearray()
+    bits = clear
+    bit_count = code_size
+    prefix = data[0]
+    for byte in memoryview(data)[1:]:
+        key = prefix << 8 | byte
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        bits |= prefix << bit_count
+        bit_count += code_size
+        if next_code == 4096:
+            # The table is full, so start a new one
+            bits |= clear << bit_count
+            bit_count += code_size
+            table.clear()
+            next_code = clear + 2
+            code_size = min_code_size + 1
+        else:
+            if next_code == 1 << code_size:
+                code_size += 1
+            table[key] = next_code
+            next_code += 1
+        if bit_count >= 64:
+            out += (bits & 0xFFFFFFFFFFFFFFFF).to_bytes(8, 'little')
+            bits >>= 64
+            bit_count -= 64
+        prefix = byte
+    bits |= prefix << bit_count
+    bit_count += code_size
+    if next_code == 1 << code_size and code_size < 12:
+        code_size += 1
+    bits |= (clear + 1) << bit_count
+    bit_count += code_size
+    out += bits.to_bytes((bit_count + 7) // 8, 'little')
+    return bytes(out)
+
+
+class GifWriter(FrameWriter):
+    """Writes the frames to an animated GIF.
+
+    Only the part of a frame that changed since the last one is saved, and the same
+    frame again only makes the last one stay longer, so a GIF of a game takes much
+    less than its frames. GIF delays are in hundredths of a second and most viewers
+    don't show frames shorter than two of them, so use up to 50 frames per second.
+    """
+
+    def __init__(self, path: str, fps: float = 30, loop: bool = True) -> None:
+        """Gif Writer class.
+
+        Args:
+            path (str): The GIF file.
+            fps (float, optional): The number of frames per second. Defaults to 30.
+            loop (bool, optional): Play the GIF again when it ends. Defaults to True.
+        """
+        self.path = path
+        self.fps = fps
+        self.loop = loop
+        self.file: Optional[IO[bytes]] = None
+
+    def open(self, size: Tuple[int, int]) -> None:
+        self.palette = gif_palette()
+        self.cube, self.grays = _palette_tables(self.palette)
+        self.file = open(self.path, 'wb')
+        self.file.write(b'GIF89a' + struct.pack('<HHBBB', *size, 0xF7, 0, 0))
+        self.file.write(self.palette.tobytes())
+        if self.loop:
+            self.file.write(b'!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+        self.last: Optional[np.ndarray] = None
+        # The image waiting for its delay, which is known when a different frame
+        # comes, and its first frame and number of frames
+        self.pending: Optional[bytes] = None
+        self.pending_start = 0
+        self.frames = 0
+
+    def quantize(self, frame: np.ndarray) -> np.ndarray:
+        """Get the palette index of each pixel."""
+        cube = self.cube
+        red, green, blue = frame[..., 0], frame[..., 1], frame[..., 2]
+        indices = cube[red] * np.uint8(36) + cube[green] * np.uint8(6) + cube[blue]
+        gray = (red == green) & (green == blue)
+        indices[gray] = self.grays[red[gray]]
+        return indices
+
+    def write(self, frame: np.ndarray) -> None:
+        indices = self.quantize(frame)
+        last = self.last
+        if last is None:
+            top, left, bottom, right = 0, 0, *indices.shape
+            image = indices
+        else:
+            changed = indices != last
+            rows = np.flatnonzero(changed.any(1))
+            if not len(rows):
+                self.frames += 1
+                return
+            columns = np.flatnonzero(changed.any(0))
+            top, bottom = rows[0], rows[-1] + 1
+            left, right = columns[0], columns[-1] + 1
+            # The pixels that didn't change show the last frame through
+            image = np.where(
+                changed[top:bottom, left:right], indices[top:bottom, left:right],
+                np.uint8(TRANSPARENT)
+            )
+        self._flush()
+        self.last = indices
+        self.pending = struct.pack(
+            '<BHHHHB', 0x2C, left, top, right - left, bottom - top, 0
+        ) + _sub_blocks(lzw_encode(np.ascontiguousarray(image).tobytes()))
+        self.pending_start = self.frames
+        self.frames += 1
+
+    def _flush(self) -> None:
+        if self.pending is None:
+            return
+        # Round the time of each frame, so the rounding errors don't add up
+        delay = (round(self.frames * 100 / self.fps)
+                 - round(self.pending_start * 100 / self.fps))
+        self.file.write(struct.pack('<BBBBHBB', 0x21, 0xF9, 4, 0x05, delay,
+                                    TRANSPARENT, 0))
+        self.file.write(self.pending)
+        self.pending = None
+
+    def close(self) -> None:
+        if self.file is None:
+            return
+        self._flush()
+        self.file.write(b';')
+        self.file.close()
+        self.file = None
+
+
+def _sub_blocks(data: bytes) -> bytes:
+    blocks = bytearray(b'\x08')
+    for start in range(0, len(data), 255):
+        chunk = data[start:start + 255]
+        blocks.append(len(chunk))
+        blocks += chunk
+    blocks.append(0)
+    return bytes(blocks)
+
+
+class RawWriter(FrameWriter):
+    """Writes the frames as raw RGB bytes to a file or to the input of a command,
+    e.g. a video encoder."""
+
+    def __init__(
+        self, path: Optional[str] = None, command: Optional[Sequence[str]] = None
+    ) -> None:
+        """Raw Writer class.
+
+        Args:
+            path (Optional[str], optional): The file to write to. Defaults to None.
+            command (Optional[Sequence[str]], optional): The command to pipe the
+                frames to instead. '{size}' in its arguments is replaced with the
+                WIDTHxHEIGHT of the frames. Defaults to None.
+
+        Raises:
+            ValueError: If neither or both of `path` and `command` are given.
+        """
+        if (path is None) == (command is None):
+            raise ValueError('Give either a path or a command')
+        self.path = path
+        self.command = command
+        self.process: Optional[subprocess.Popen] = None
+        self.file: Optional[IO[bytes]] = None
+
+    @classmethod
+    def ffmpeg(cls, path: str, fps: float = 30) -> 'RawWriter':
+        """Encode the frames to a video file with ffmpeg, which must be installed."""
+        return cls(command=[
+            'ffmpeg', '-loglevel', 'error', '-y', '-f', 'rawvideo', '-pix_fmt',
+            'rgb24', '-s', '{size}', '-r', str(fps), '-i', '-', '-pix_fmt', 'yuv420p',
+            path
+        ])
+
+    def open(self, size: Tuple[int, int]) -> None:
+        if self.command is None:
+            self.file = open(self.path, 'wb')
+            return
+        command = [arg.replace('{size}', '%dx%d' % size) for arg in self.command]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+        self.file = self.process.stdin
+
+    def write(self, frame: np.ndarray) -> None:
+        self.file.write(frame.data)
+
+    def close(self) -> None:
+        if self.file is None:
+            return
+        self.file.close()
+        self.file = None
+        if self.process is not None and self.process.wait():
+            raise RuntimeError(
+                f'{self.command[0]} exited with code {self.process.returncode}'
+            )
+
+
+def writer_for(path: str, fps: float = 30) -> FrameWriter:
+    """Pick a writer by the extension of a path: '.gif' for a GIF, '.raw' or '.rgb'
+    for raw frames, '.mp4', '.mkv' or '.webm' for a video made with ffmpeg and no
+    extension for a folder of PNG files."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.gif':
+        return GifWriter(path, fps)
+    if extension in ('.raw', '.rgb'):
+        return RawWriter(path)
+    if extension in ('.mp4', '.mkv', '.webm'):
+        return RawWriter.ffmpeg(path, fps)
+    if extension:
+        raise ValueError(f'Unknown capture format: {extension}')
+    return PngWriter(path)
+
+
+def _encode_frames(
+    writer: FrameWriter,
+    memory: Union[str, bytearray],
+    frames: Any,
+    free: Any,
+    size: Tuple[int, int],
+    pitch: int,
+    shifts: Sequence[int]
+) -> None:
+    """The worker: converts the frames in the slots of `memory` that come from the
+    `frames` queue and gives the slots back on the `free` queue. It puts None on
+    `free` when it is done or the error that stopped it."""
+    shared = None
+    if isinstance(memory, str):
+        # Ctrl+C reaches the whole process group. The game stops on it and closes
+        # the capture, so the process finishes the frames it was given.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        shared = shared_memory.SharedMemory(memory)
+        memory = shared.buf
+    width, height = size
+    slot_size = pitch * height
+    try:
+        writer.open(size)
+        while True:
+            slot = frames.get()
+            if slot is None:
+                break
+            pixels = np.frombuffer(
+                memory, np.uint32, slot_size // 4, slot * slot_size
+            ).reshape(height, pitch // 4)[:, :width]
+            frame = np.empty((height, width, 3), dtype=np.uint8)
+            for channel, shift in enumerate(shifts[:3]):
+                frame[..., channel] = pixels >> shift
+            del pixels
+            free.put(slot)
+            writer.write(frame)
+        writer.close()
+    except BaseException as error:
+        # The game raises it on its next frame
+        free.put(error)
+        return
+    finally:
+        if shared is not None:
+            shared.close()
+    free.put(None)
+
+
+class FrameCapture:
+    """Grabs frames of a surface and gives them to a writer on another process or
+    thread.
+
+    The first frame decides the size of the frames. Later frames of another size,
+    e.g. after the window is resized, are scaled to it.
+    """
+
+    def __init__(
+        self,
+        writer: FrameWriter,
+        capacity: int = 16,
+        block: bool = False,
+        process: bool = True
+    ) -> None:
+        """Frame Capture class.
+
+        Args:
+            writer (FrameWriter): Where the frames are written. With a process, it is
+                copied to the process, so it must be picklable.
+            capacity (int, optional): The number of frames that can wait for the
+                writer. Defaults to 16.
+            block (bool, optional): Wait for the writer when all the slots are taken,
+                instead of dropping the frame. Defaults to False.
+            process (bool, optional): Write the frames on another process, so
+                encoding them doesn't hold the GIL of the game. Defaults to True.
+        """
+        self.writer = writer
+        self.capacity = capacity
+        self.block = block
+        self.process = process
+        self.size: Optional[Tuple[int, int]] = None
+        self.frames = 0
+        self.dropped = 0
+        self._memory: Any = None
+        self._worker: Any = None
+        self._staging: Optional[pygame.Surface] = None
+
+    def _start(self, surface: pygame.Surface) -> None:
+        self.size = width, height = surface.get_size()
+        # Frames that can't be copied as they are, e.g. of another size, are drawn
+        # on a surface with the format of the first frame first
+        if surface.get_bytesize() == 4 and surface.get_pitch() == width * 4:
+            self._staging = pygame.Surface(self.size, 0, surface)
+        else:
+            self._staging = pygame.Surface(self.size, 0, 32)
+        self._format = (
+            self._staging.get_pitch(), self._staging.get_bytesize(),
+            self._staging.get_shifts()
+        )
+        pitch = width * 4
+        self._slot_size = pitch * height
+        total = self._slot_size * self.capacity
+        if self.process:
+            context = multiprocessing.get_context()
+            self._shared = shared_memory.SharedMemory(create=True, size=total)
+            self._memory = self._shared.buf
+            self._frames, self._free = context.Queue(), context.Queue()
+            memory = self._shared.name
+            worker_class = context.Process
+        else:
+            self._shared = None
+            self._memory = memory = bytearray(total)
+            self._frames, self._free = queue.Queue(), queue.Queue()
+            worker_class = threading.Thread
+        # The slots that were never used. The worker gives the others back.
+        self._unused = list(range(self.capacity))
+        self._worker = worker_class(
+            target=_encode_frames,
+            args=(self.writer, memory, self._frames, self._free, self.size, pitch,
+                  self._format[2]),
+            daemon=True
+        )
+        self._worker.start()
+
+    def _free_slot(self) -> Optional[int]:
+        if self._unused:
+            return self._unused.pop()
+        while True:
+            try:
+                slot = self._free.get(self.block, 0.5)
+            except queue.Empty:
+                if not self._worker.is_alive():
+                    self._release()
+                    raise RuntimeError('The frame writer stopped')
+                if not self.block:
+                    return None
+                continue
+            if isinstance(slot, BaseException):
+                self._release()
+                raise RuntimeError('The frame writer failed') from slot
+            return slot
+
+    def grab(self, surface: pygame.Surface) -> bool:
+        """Copy a frame of a surface to be written.
+
+        Returns:
+            bool: False if the frame was dropped because the writer is behind.
+        """
+        if self._worker is None:
+            self._start(surface)
+        slot = self._free_slot()
+        if slot is None:
+            self.dropped += 1
+            return False
+        if surface.get_size() != self.size or (
+                surface.get_pitch(), surface.get_bytesize(), surface.get_shifts()
+        ) != self._format:
+            if surface.get_size() != self.size:
+                surface = pygame.transform.scale(surface, self.size)
+            self._staging.blit(surface, (0, 0))
+            surface = self._staging
+        start = slot * self._slot_size
+        self._memory[start:start + self._slot_size] = memoryview(
+            surface.get_view('1')
+        ).cast('B')
+        self._frames.put(slot)
+        self.frames += 1
+        return True
+
+    def close(self) -> None:
+        """Wait for the writer to write the frames and finish.
+
+        Raises:
+            RuntimeError: If the writer failed.
+        """
+        if self._worker is None:
+            return
+        self._frames.put(None)
+        error = None
+        while True:
+            try:
+                item = self._free.get(timeout=0.5)
+            except queue.Empty:
+                if not self._worker.is_alive():
+                    error = RuntimeError('The frame writer stopped')
+                    break
+                continue
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                error = item
+                break
+        self._release()
+        if error is not None:
+            raise RuntimeError('The frame writer failed') from error
+
+    def _release(self) -> None:
+        self._worker.join()
+        self._worker = None
+        if self._shared is not None:
+            self._memory.release()
+            self._shared.close()
+            self._shared.unlink()
+        self._memory = None
+
+    def __enter__(self) -> 'FrameCapture':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
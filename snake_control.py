@@ -0,0 +1,158 @@
+"""Control a game from other code while it runs on an asyncio event loop.
+
+Bots in the same process use a `GameControl` directly:
+    async def bot(control: GameControl):
+        async for state in control.states():
+            await control.send('UP' if state.direction == 'LEFT' else 'LEFT')
+
+    control = GameControl()
+    await asyncio.gather(game.run_async(control), bot(control))
+
+Bots in other processes connect to a `serve_control` server, send a command on each
+line ('UP', 'DOWN', 'LEFT', 'RIGHT', 'PAUSE' or 'QUIT') and receive the state of the
+game after each step as a line of JSON:
+    python snake-game.py --control-port 8021
+"""
+
+import json
+import asyncio
+from typing import Any, Dict, List, Optional, AsyncIterator
+
+import log21
+
+from snake_engine import DIRECTIONS, Snapshot
+
+COMMANDS = DIRECTIONS + ('PAUSE', 'QUIT')
+
+
+def snapshot_to_dict(state: Snapshot) -> Dict[str, Any]:
+    """Get the state of a game as a dictionary that can be saved as JSON. The
+    occupancy grid is left out, since it can be made from the body."""
+    data = state._asdict()
+    del data['occupied']
+    data['body'] = list(state.body)
+    return data
+
+
+class GameControl:
+    """Sends commands to a game and receives its states.
+
+    A subscriber only keeps the latest state, so a slow bot gets the current state
+    instead of falling behind the game.
+    """
+
+    def __init__(self) -> None:
+        """Game Control class."""
+        # The commands for the game, in the order they were sent
+        self.commands: asyncio.Queue = asyncio.Queue()
+        self._subscribers: List[asyncio.Queue] = []
+        self.state: Optional[Snapshot] = None
+        self.closed = False
+
+    async def send(self, command: str) -> None:
+        """Send a command to the game.
+
+        Args:
+            command (str): A direction, 'PAUSE' to pause the game until the next
+                direction or 'QUIT' to end it.
+
+        Raises:
+            ValueError: If the command is not one of `COMMANDS`.
+        """
+        self.send_nowait(command)
+
+    def send_nowait(self, command: str) -> None:
+        """Send a command to the game without waiting. See `send`."""
+        if command not in COMMANDS:
+            raise ValueError(f'Unknown command: {command!r}')
+        self.commands.put_nowait(command)
+
+    def publish(self, state: Snapshot) -> None:
+        """Give a new state of the game to the subscribers. The game calls it."""
+        self.state = state
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(state)
+
+    def close(self) -> None:
+        """Tell the subscribers that no more states will come. The game calls it when
+        it stops. The queues receive None."""
+        self.closed = True
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    def subscribe(self) -> asyncio.Queue:
+        """Get a queue that receives the states of the game and None when the game
+        stops."""
+        queue = asyncio.Queue(maxsize=1)
+        if self.closed:
+            queue.put_nowait(None)
+        elif self.state is not None:
+            queue.put_nowait(self.state)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Stop giving states to a queue from `subscribe`."""
+        self._subscribers.remove(queue)
+
+    async def states(self) -> AsyncIterator[Snapshot]:
+        """Iterate over the states of the game until it stops."""
+        queue = self.subscribe()
+        try:
+            while True:
+                state = await queue.get()
+                if state is None:
+                    return
+                yield state
+        finally:
+            self.unsubscribe(queue)
+
+
+async def _read_commands(control: GameControl, reader: asyncio.StreamReader) -> None:
+    async for line in reader:
+        command = line.decode(errors='replace').strip().upper()
+        if command in COMMANDS:
+            control.send_nowait(command)
+        elif command:
+            log21.warning(f'Ignored an unknown control command: {command!r}')
+
+
+async def _handle_client(
+    control: GameControl, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    commands = asyncio.ensure_future(_read_commands(control, reader))
+    try:
+        async for state in control.states():
+            if commands.done():
+                break
+            writer.write(json.dumps(snapshot_to_dict(state)).encode() + b'\n')
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        commands.cancel()
+        writer.close()
+
+
+async def serve_control(
+    control: GameControl, host: str = '127.0.0.1', port: int = 8021
+) -> asyncio.AbstractServer:
+    """Let other processes control a game over TCP.
+
+    Args:
+        control (GameControl): The control of the game.
+        host (str, optional): The address to listen on. Defaults to '127.0.0.1'.
+        port (int, optional): The port to listen on. Defaults to 8021.
+
+    Returns:
+        asyncio.AbstractServer: The server. Close it when the game is over.
+    """
+    server = await asyncio.start_server(
+        lambda reader, writer: _handle_client(control, reader, writer), host, port
+    )
+    log21.info(f'Listening for control commands on {host}:{port}')
+    return server
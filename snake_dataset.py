@@ -0,0 +1,380 @@
+"""Record the steps of headless games as a dataset for machine learning.
+
+Each step is saved as the observation before it, the action, the reward, whether
+the game ended with it (`done`) and whether the game was cut off after it without
+being over, e.g. at the maximum number of steps (`truncated`). Every game ends with
+a step that is done or truncated, so the games can be told apart even though their
+steps follow each other. The steps are written in chunks of NumPy `.npy` files, one
+file for each field of each chunk, so recording millions of steps takes the memory
+of one chunk and the files can be memory-mapped when they are read.
+
+The observation is a grid of `rows x columns` bytes: `EMPTY`, `BODY`, `HEAD`, `FOOD`,
+`BIG_FOOD` or `WALL` for each cell. The action is the index of the direction in
+`DIRECTIONS` or -1 for not turning. The reward is the change of the score, including
+the score lost in the score box and the danger zone.
+
+Example:
+    python snake_dataset.py --path data --games 100 --autopilot
+
+    dataset = TrajectoryDataset('data')
+    for batch in dataset.minibatches(256, shuffle=True):
+        train(batch['obs'], batch['action'], batch['reward'], batch['done'])
+"""
+
+import os
+import json
+import time
+import random
+from typing import Any, Dict, List, Iterator, Optional
+
+import log21
+import numpy as np
+
+from snake_level import Level
+from snake_engine import DIRECTIONS, StepResult, SnakeEngine
+from snake_runner import Policy, random_policy
+from snake_autopilot import Autopilot
+
+EMPTY = 0
+BODY = 1
+HEAD = 2
+FOOD = 3
+BIG_FOOD = 4
+WALL = 5
+
+FORMAT = 2
+META_FILE = 'meta.json'
+FIELDS = {
+    'obs': np.uint8,
+    'action': np.int8,
+    'reward': np.int32,
+    'done': np.bool_,
+    'truncated': np.bool_
+}
+
+
+def observe(engine: SnakeEngine, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Get the occupancy grid of a game.
+
+    Args:
+        engine (SnakeEngine): The game.
+        out (Optional[np.ndarray], optional): A `rows x columns` array of bytes to
+            write the grid into. Defaults to None which makes a new one.
+
+    Returns:
+        np.ndarray: The grid.
+    """
+    if out is None:
+        out = np.empty((engine.rows, engine.columns), dtype=np.uint8)
+    occupied = np.frombuffer(engine.occupied, dtype=np.uint8)
+    np.minimum(occupied.reshape(out.shape), BODY, out=out)
+    cells = out.reshape(-1)
+    if engine.level is not None:
+        walls = np.frombuffer(engine.walls, dtype=np.bool_)
+        np.putmask(cells, walls, WALL)
+    if engine.big_food_time_left > 0:
+        big_food = engine.big_food
+        for cell in (big_food, big_food + 1, big_food + engine.columns,
+                     big_food + engine.columns + 1):
+            cells[cell] = BIG_FOOD
+    if engine.food_spawn:
+        cells[engine.food] = FOOD
+    cells[engine.body[0]] = HEAD
+    return out
+
+
+def _chunk_file(path: str, index: int, field: str) -> str:
+    return os.path.join(path, f'{index:06d}.{field}.npy')
+
+
+class TrajectoryRecorder:
+    """Records the steps of a game played with its `engine` into a dataset folder.
+
+    Use `step` of the recorder instead of the one of the engine, so that the steps
+    are recorded. More games can be recorded after `engine.reset()`, and more steps
+    can be added to an existing dataset with the same board size.
+    """
+
+    def __init__(self, engine: SnakeEngine, path: str, chunk_size: int = 4096) -> None:
+        """Trajectory Recorder class.
+
+        Args:
+            engine (SnakeEngine): The game to record.
+            path (str): The folder of the dataset. It is made if it doesn't exist.
+            chunk_size (int, optional): The number of steps in each file. Defaults to
+                4096.
+
+        Raises:
+            ValueError: If the folder has a dataset with another board size or
+                format.
+        """
+        self.engine = engine
+        self.path = path
+        self.shape = (engine.rows, engine.columns)
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as file:
+                self.meta = json.load(file)
+            if self.meta['format'] != FORMAT:
+                raise ValueError(
+                    f'{path} has a dataset of format {self.meta["format"]}, not '
+                    f'{FORMAT}'
+                )
+            if (self.meta['rows'], self.meta['columns']) != self.shape:
+                raise ValueError(
+                    f'{path} has a dataset of {self.meta["columns"]}x'
+                    f'{self.meta["rows"]} boards, not {engine.columns}x{engine.rows}'
+                )
+        else:
+            self.meta = {
+                'format': FORMAT,
+                'columns': engine.columns,
+                'rows': engine.rows,
+                'codes': {
+                    'EMPTY': EMPTY,
+                    'BODY': BODY,
+                    'HEAD': HEAD,
+                    'FOOD': FOOD,
+                    'BIG_FOOD': BIG_FOOD,
+                    'WALL': WALL
+                },
+                'directions': DIRECTIONS,
+                'chunks': []
+            }
+        self.buffers = {
+            field: np.zeros(
+                (chunk_size, *self.shape) if field == 'obs' else chunk_size, dtype
+            )
+            for field, dtype in FIELDS.items()
+        }
+        self.length = 0
+
+    def step(self, action: Optional[str] = None, truncate: bool = False) -> StepResult:
+        """Run a step of the engine and record it.
+
+        Args:
+            action (Optional[str], optional): The direction to turn to. Defaults to
+                None.
+            truncate (bool, optional): Whether the game is cut off after this step,
+                so the step is marked as truncated if the game is not over. Defaults
+                to False.
+        """
+        engine = self.engine
+        if (engine.rows, engine.columns) != self.shape:
+            raise ValueError('The board size of a dataset cannot change')
+        buffers = self.buffers
+        length = self.length
+        observe(engine, buffers['obs'][length])
+        result = engine.step(action)
+        buffers['action'][length] = (
+            DIRECTIONS.index(action) if action in DIRECTIONS else -1
+        )
+        buffers['reward'][length] = result.reward
+        buffers['done'][length] = result.done
+        buffers['truncated'][length] = truncate and not result.done
+        self.length += 1
+        if self.length == len(buffers['done']):
+            self.flush()
+        return result
+
+    def flush(self) -> None:
+        """Write the steps that are not written yet as a new chunk."""
+        if not self.length:
+            return
+        index = len(self.meta['chunks'])
+        for field, buffer in self.buffers.items():
+            np.save(_chunk_file(self.path, index, field), buffer[:self.length])
+        self.meta['chunks'].append(self.length)
+        self.length = 0
+        # The chunks are listed only after they are written, so a dataset is always
+        # readable, even while it is recorded
+        meta_path = os.path.join(self.path, META_FILE)
+        with open(meta_path + '.tmp', 'w') as file:
+            json.dump(self.meta, file)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def close(self) -> None:
+        """Write the rest of the steps."""
+        self.flush()
+
+    def __enter__(self) -> 'TrajectoryRecorder':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class TrajectoryDataset:
+    """Reads a dataset of `TrajectoryRecorder` lazily."""
+
+    def __init__(self, path: str) -> None:
+        """Trajectory Dataset class.
+
+        Args:
+            path (str): The folder of the dataset.
+
+        Raises:
+            ValueError: If the dataset has an unknown format.
+        """
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as file:
+            self.meta: Dict[str, Any] = json.load(file)
+        if self.meta['format'] != FORMAT:
+            raise ValueError(f'Unknown dataset format: {self.meta["format"]}')
+        self.chunks: List[int] = self.meta['chunks']
+
+    def __len__(self) -> int:
+        return sum(self.chunks)
+
+    def chunk(self, index: int) -> Dict[str, np.ndarray]:
+        """Get the fields of a chunk as memory-mapped arrays."""
+        return {
+            field: np.load(_chunk_file(self.path, index, field), mmap_mode='r')
+            for field in FIELDS
+        }
+
+    def minibatches(
+        self,
+        batch_size: int,
+        shuffle: bool = False,
+        seed: Optional[int] = None,
+        drop_last: bool = False
+    ) -> Iterator[Dict[str, np.ndarray]]:
+        """Iterate over the steps in batches.
+
+        Only one chunk is read at a time. Shuffling shuffles the order of the chunks
+        and the steps in each chunk, so batches mix steps of the same chunk only.
+
+        Args:
+            batch_size (int): The number of steps in each batch.
+            shuffle (bool, optional): Shuffle the steps. Defaults to False.
+            seed (Optional[int], optional): The seed of the shuffling. Defaults to None.
+            drop_last (bool, optional): Skip the last batch if it is smaller than
+                `batch_size`. Defaults to False.
+
+        Yields:
+            Dict[str, np.ndarray]: 'obs', 'action', 'reward', 'done' and 'truncated'
+                arrays with the steps of a batch.
+        """
+        rng = np.random.default_rng(seed)
+        order = range(len(self.chunks))
+        if shuffle:
+            order = rng.permutation(len(self.chunks))
+        parts: List[Dict[str, np.ndarray]] = []
+        size = 0
+        for index in order:
+            chunk = self.chunk(index)
+            length = self.chunks[index]
+            steps = rng.permutation(length) if shuffle else None
+            start = 0
+            while start < length:
+                end = min(start + batch_size - size, length)
+                if steps is None:
+                    rows = slice(start, end)
+                else:
+                    # Reading the rows in order is faster on memory-mapped files
+                    rows = np.sort(steps[start:end])
+                parts.append({field: np.asarray(array[rows]) for field, array in
+                              chunk.items()})
+                size += end - start
+                start = end
+                if size == batch_size:
+                    yield _concatenate(parts)
+                    parts = []
+                    size = 0
+        if parts and not drop_last:
+            yield _concatenate(parts)
+
+
+def _concatenate(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if len(parts) == 1:
+        return parts[0]
+    return {field: np.concatenate([part[field] for part in parts]) for field in FIELDS}
+
+
+def record_games(
+    path: str,
+    seeds: Iterator[int],
+    policy: Policy = random_policy,
+    max_steps: int = 10000,
+    chunk_size: int = 4096,
+    **params: Any
+) -> int:
+    """Play headless games and record their steps.
+
+    Args:
+        path (str): The folder of the dataset.
+        seeds (Iterator[int]): The seeds of the games.
+        policy (Policy, optional): The function that plays the games. Defaults to
+            random_policy.
+        max_steps (int, optional): Stop each game after this number of steps.
+            Defaults to 10000.
+        chunk_size (int, optional): The number of steps in each file. Defaults to
+            4096.
+        **params: The parameters of the games.
+
+    Returns:
+        int: The number of steps that were recorded.
+    """
+    engine = SnakeEngine(**params)
+    steps = 0
+    with TrajectoryRecorder(engine, path, chunk_size) as recorder:
+        for seed in seeds:
+            engine.reset(seed)
+            rng = random.Random(f'policy-{seed}')
+            while not engine.done and engine.steps < max_steps:
+                recorder.step(
+                    policy(engine, rng), truncate=engine.steps + 1 == max_steps
+                )
+            steps += engine.steps
+    return steps
+
+
+def main(
+    path: str,
+    games: int = 100,
+    seed: int = 0,
+    max_steps: int = 10000,
+    chunk_size: int = 4096,
+    frame_size_x: int = 720,
+    frame_size_y: int = 480,
+    big_food_chance: float = 0.02,
+    autopilot: bool = False,
+    level: Optional[str] = None
+):
+    """Record the steps of headless games as a dataset.
+
+    Args:
+        path (str): The folder of the dataset. New steps are added to an existing one.
+        games (int): The number of games to play. (default: 100)
+        seed (int): The seed of the first game. The games use consecutive seeds.
+            (default: 0)
+        max_steps (int): The maximum number of steps of each game. (default: 10000)
+        chunk_size (int): The number of steps in each file. (default: 4096)
+        frame_size_x (int): The width of the game frame. (default: 720)
+        frame_size_y (int): The height of the game frame. (default: 480)
+        big_food_chance (float): The chance of a big food spawning. (default: 0.02)
+        autopilot (bool): Play with the autopilot instead of the random policy.
+            (default: False)
+        level (Optional[str]): Play on a level file made with snake_level.py. The
+            frame is the size of the level.
+    """
+    start = time.perf_counter()
+    steps = record_games(
+        path,
+        range(seed, seed + games),
+        policy=Autopilot() if autopilot else random_policy,
+        max_steps=max_steps,
+        chunk_size=chunk_size,
+        frame_size_x=frame_size_x,
+        frame_size_y=frame_size_y,
+        big_food_chance=big_food_chance,
+        level=Level.load(level) if level else None
+    )
+    elapsed = time.perf_counter() - start
+    log21.info(f'Recorded {steps:,} steps in {elapsed:.2f}s ({steps / elapsed:,.0f}/s)')
+
+
+if __name__ == '__main__':
+    log21.argumentify(main)
@@ -0,0 +1,914 @@
+"""Headless game logic for Snake Eater.
+
+This module doesn't import PyGame, so games can be simulated without a window and
+without any sleeping (e.g. for training bots or running regression tests).
+"""
+
+import sys
+import time
+import random
+import struct
+from enum import IntEnum
+from array import array
+from typing import (
+    TYPE_CHECKING, Any, List, Tuple, Callable, Iterable, Optional, NamedTuple
+)
+from collections import deque
+
+if TYPE_CHECKING:
+    from snake_level import Level
+
+DIRECTIONS = ('UP', 'DOWN', 'LEFT', 'RIGHT')
+OPPOSITE_DIRECTIONS = {'UP': 'DOWN', 'DOWN': 'UP', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT'}
+MOVES = {'UP': (0, -1), 'DOWN': (0, 1), 'LEFT': (-1, 0), 'RIGHT': (1, 0)}
+
+
+class Direction(IntEnum):
+    """The directions as small integers, in the order of `DIRECTIONS`."""
+    UP = 0
+    DOWN = 1
+    LEFT = 2
+    RIGHT = 3
+
+
+# The default size of each block of the snake in pixels
+BLOCK_SIZE = 10
+
+# The thickness of the big food time bar
+BAR_THICKNESS = 15
+
+
+def estimate_text_size(text: str, size: int = 16) -> Tuple[int, int]:
+    """Estimate the size of a rendered text as if it was rendered with a monospace
+    font like consolas.
+
+    Args:
+        text (str): The text to measure.
+        size (int, optional): The font size. Defaults to 16.
+
+    Returns:
+        Tuple[int, int]: The width and the height of the text.
+    """
+    return len(text) * ((size * 9 + 15) // 16), (size * 19 + 15) // 16
+
+
+class FreeCells:
+    """A set of cells that supports adding, removing and picking a random cell in
+    O(1).
+
+    The cells are kept in arrays of 32-bit integers, which take a few bytes per cell
+    even on boards with millions of cells.
+    """
+
+    def __init__(self, cells: Iterable[int], size: int) -> None:
+        """Free Cells class.
+
+        Args:
+            cells (Iterable[int]): The cells that are free at first.
+            size (int): The number of cells on the board.
+        """
+        self.cells = array('i', cells)
+        # The position of each cell in `cells` or -1 if it isn't free
+        self.index = array('i', [-1]) * size
+        for i, cell in enumerate(self.cells):
+            self.index[cell] = i
+
+    def add(self, cell: int) -> None:
+        """Mark a cell as free."""
+        if self.index[cell] < 0:
+            self.index[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell: int) -> None:
+        """Mark a cell as taken."""
+        i = self.index[cell]
+        if i >= 0:
+            last = self.cells.pop()
+            if last != cell:
+                self.cells[i] = last
+                self.index[last] = i
+            self.index[cell] = -1
+
+    def copy(self) -> 'FreeCells':
+        """Get a copy that keeps the order of the cells, so picking a cell with the
+        same random number generator state gives the same cell."""
+        free = FreeCells.__new__(FreeCells)
+        free.cells = self.cells[:]
+        free.index = self.index[:]
+        return free
+
+    def choice(self, rng=random) -> int:
+        """Pick a random free cell.
+
+        Args:
+            rng (optional): The random number generator to use. Defaults to the
+                random module.
+
+        Raises:
+            IndexError: If there is no free cell.
+        """
+        return rng.choice(self.cells)
+
+    def __contains__(self, cell: int) -> bool:
+        return self.index[cell] >= 0
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+
+class StepResult(NamedTuple):
+    """The result of a single game step."""
+    reward: int
+    done: bool
+
+
+class Snapshot(NamedTuple):
+    """An immutable copy of the state of a game, e.g. for drawing it."""
+    frame_size_x: int
+    frame_size_y: int
+    columns: int
+    rows: int
+    block_size: int
+    body: Tuple[int, ...]
+    occupied: bytes
+    food: int
+    food_spawn: bool
+    big_food: int
+    big_food_time_left: float
+    big_food_time: float
+    direction: str
+    score: int
+    current_difficulty: float
+    eating_score: bool
+    in_the_danger_zone: bool
+    done: bool
+    steps: int
+
+
+def _to_little_endian(values: array) -> array:
+    if sys.byteorder == 'big':
+        values = values[:]
+        values.byteswap()
+    return values
+
+
+class GameState:
+    """Everything that changes while a game is played, in a compact form that is
+    cheap to copy, e.g. to try moves and roll them back.
+
+    It only holds the state that changes, so it has to be loaded into an engine with
+    the same parameters as the one it came from. Use `SnakeEngine.get_state` and
+    `SnakeEngine.set_state`.
+    """
+
+    __slots__ = (
+        'columns', 'rows', 'block_size', 'body', 'direction', 'food', 'food_spawn',
+        'big_food', 'big_food_shown', 'big_food_due', 'time', 'getting_big_score',
+        'score', 'current_difficulty', 'eating_score', 'in_the_danger_zone', 'done',
+        'steps', 'free', 'random_state'
+    )
+
+    # The fixed size part of `to_bytes`, followed by the body, the free cells and the
+    # state of the random number generator
+    _HEADER = struct.Struct('<8sIIIBiBi?ddiidBBBQII?d')
+    MAGIC = b'SNAKEST2'
+
+    def __init__(self, **values: Any) -> None:
+        """Game State class.
+
+        Args:
+            **values: A value for each name in `__slots__`. `body` is an array('i')
+                of cells, head first, `direction` is a `Direction`, `free` is the
+                `FreeCells` of the spawn zone in their order and `random_state` is the
+                state of the random number generator of the engine.
+        """
+        for name in self.__slots__:
+            setattr(self, name, values[name])
+
+    def copy(self) -> 'GameState':
+        """Get a copy that doesn't share the mutable arrays."""
+        state = GameState.__new__(GameState)
+        for name in self.__slots__:
+            setattr(state, name, getattr(self, name))
+        state.body = self.body[:]
+        state.free = self.free.copy()
+        return state
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, GameState):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+            if name != 'free'
+        ) and self.free.cells == other.free.cells
+
+    def to_bytes(self) -> bytes:
+        """Get the state as bytes that `from_bytes` reads."""
+        version, internal_state, gauss_next = self.random_state
+        header = self._HEADER.pack(
+            self.MAGIC, self.columns, self.rows, self.block_size, self.direction,
+            self.food, self.food_spawn, self.big_food, self.big_food_shown,
+            self.big_food_due, self.time, self.getting_big_score, self.score,
+            self.current_difficulty, self.eating_score, self.in_the_danger_zone,
+            self.done, self.steps, len(self.body), len(self.free.cells),
+            gauss_next is not None, gauss_next or 0.0
+        )
+        return b''.join((
+            header,
+            _to_little_endian(self.body).tobytes(),
+            _to_little_endian(self.free.cells).tobytes(),
+            _to_little_endian(array('I', internal_state)).tobytes()
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'GameState':
+        """Read a state that was made with `to_bytes`.
+
+        Raises:
+            ValueError: If the data is not a game state.
+        """
+        if not data.startswith(cls.MAGIC) or len(data) < cls._HEADER.size:
+            raise ValueError('Not a Snake Eater game state')
+        (_, columns, rows, block_size, direction, food, food_spawn, big_food,
+         big_food_shown, big_food_due, game_time, getting_big_score, score,
+         current_difficulty, eating_score, in_the_danger_zone, done, steps,
+         body_length, free_length, has_gauss_next,
+         gauss_next) = cls._HEADER.unpack_from(data)
+
+        arrays = []
+        position = cls._HEADER.size
+        for typecode, length in (('i', body_length), ('i', free_length), ('I', None)):
+            values = array(typecode)
+            end = len(data) if length is None else position + length * values.itemsize
+            values.frombytes(data[position:end])
+            arrays.append(_to_little_endian(values))
+            position = end
+        body, free_cells, internal_state = arrays
+
+        return cls(
+            columns=columns,
+            rows=rows,
+            block_size=block_size,
+            body=body,
+            direction=Direction(direction),
+            food=food,
+            food_spawn=bool(food_spawn),
+            big_food=big_food,
+            big_food_shown=big_food_shown,
+            big_food_due=big_food_due,
+            time=game_time,
+            getting_big_score=getting_big_score,
+            score=score,
+            current_difficulty=current_difficulty,
+            eating_score=bool(eating_score),
+            in_the_danger_zone=bool(in_the_danger_zone),
+            done=bool(done),
+            steps=steps,
+            free=FreeCells(free_cells, columns * rows),
+            random_state=(
+                3, tuple(internal_state), gauss_next if has_gauss_next else None
+            )
+        )
+
+
+class SnakeEngine:
+    """The rules of the game with no window, sleeps or PyGame involved."""
+
+    def __init__(
+        self,
+        frame_size_x: int = 720,
+        frame_size_y: int = 480,
+        base_difficulty: float = 10,
+        difficulty_modifier: float = 2.5,
+        big_food_chance: float = 0.02,
+        big_food_score: int = 3,
+        big_food_time: float = 6,
+        measure_text: Callable[[str], Tuple[int, int]] = estimate_text_size,
+        auto_big_food: bool = True,
+        seed: Optional[int] = None,
+        block_size: int = BLOCK_SIZE,
+        level: Optional['Level'] = None
+    ) -> None:
+        """Snake Engine class.
+
+        The snake moves on a board of cells. The frame is the board in pixels, with
+        `block_size` pixels for each cell. The score box and the big food time bar
+        are laid out on the board as it is drawn with cells of BLOCK_SIZE pixels and
+        cover the cells under them, so the size of the cells doesn't change the
+        rules.
+
+        Args:
+            frame_size_x (int, optional): Frame size x. Defaults to 720.
+            frame_size_y (int, optional): Frame size y. Defaults to 480.
+            base_difficulty (float, optional): Base difficulty. Defaults to 10.
+            difficulty_modifier (float, optional): Difficulty modifier. Defaults to 2.5.
+            big_food_chance (float, optional): Big food chance. Defaults to 0.02.
+            big_food_score (int, optional): Big food score. Defaults to 3.
+            big_food_time (float, optional): Big food time. Defaults to 6.
+            measure_text (Callable[[str], Tuple[int, int]], optional): A function that
+                returns the size of the score text. It is used to find the score box.
+                Defaults to estimate_text_size.
+            auto_big_food (bool, optional): Advance the big food timer by the game time
+                of each step. Set it to False if the big food timer is driven from
+                outside using `advance_big_food`. Defaults to True.
+            seed (Optional[int], optional): The seed of the random number generator of
+                the game. Games with the same seed and the same moves are the same.
+                Defaults to None.
+            block_size (int, optional): The size of each cell in pixels. Defaults to
+                BLOCK_SIZE.
+            level (Optional[Level], optional): A board with walls. The board is the
+                size of the level, whatever the frame size is, and the snake starts
+                where the level says. Defaults to None which is an empty board.
+        """
+        self.level = level
+        if level is not None:
+            frame_size_x = level.columns * block_size
+            frame_size_y = level.rows * block_size
+        self.block_size = block_size
+        self.frame_size_x = (frame_size_x // block_size) * block_size
+        self.frame_size_y = (frame_size_y // block_size) * block_size
+        self.base_difficulty = base_difficulty
+        self.difficulty_modifier = difficulty_modifier
+        self.big_food_chance = big_food_chance
+        self.big_food_score = big_food_score
+        self.big_food_time = big_food_time
+        self.measure_text = measure_text
+        self.auto_big_food = auto_big_food
+        self.random = random.Random(seed)
+
+        self.reset()
+
+    def reset(self, seed: Optional[int] = None) -> None:
+        """Start a new game.
+
+        Args:
+            seed (Optional[int], optional): A new seed for the random number generator.
+                Defaults to None which keeps using the current one.
+        """
+        if seed is not None:
+            self.random.seed(seed)
+        self.columns = self.frame_size_x // self.block_size
+        self.rows = self.frame_size_y // self.block_size
+
+        # The snake body is stored as a deque of cell indices (y * columns + x),
+        # head first, and `occupied` counts the blocks of the snake in each cell.
+        # This makes moving the snake and checking for collisions O(1).
+        self.body = deque()
+        self.occupied = bytearray(self.columns * self.rows)
+        # 1 for each cell with a wall. Hitting a wall is checked like hitting the
+        # body, with one lookup.
+        if self.level is not None:
+            self.walls = self.level.walls
+            start = self.level.body
+            self.head_x = start[0] % self.columns
+            self.head_y = start[0] // self.columns
+        else:
+            self.walls = bytes(self.columns * self.rows)
+            self.head_x, self.head_y = 10, 5
+            start = [self.head_y * self.columns + x for x in range(10, 7, -1)]
+        for cell in start:
+            self.body.append(cell)
+            self.occupied[cell] += 1
+
+        self.big_food = 0
+        # The game time in seconds, which only passes while the game runs. The big
+        # food has one event scheduled on it at a time: the big food disappearing
+        # while it is on the board, or the next spawn roll while it isn't.
+        self.time = 0.0
+        self._big_food_shown = False
+        self._big_food_due = 0.0
+        self.getting_big_score = 0
+
+        self.direction = 'RIGHT' if self.level is None else self.level.direction
+
+        self.score = 0
+        self.current_difficulty = self.base_difficulty
+        self.eating_score = False
+        self.in_the_danger_zone = False
+        self.done = False
+        self.steps = 0
+        self._score_box = None
+        self._score_box_key = None
+        self._spawn_zone_key = None
+        self.update_spawn_zone()
+
+        self.food_spawn = False
+        self.spawn_food()
+
+    def place_snake(
+        self, snake_body: Iterable[List[int]], direction: Optional[str] = None
+    ) -> None:
+        """Put the snake on the given blocks.
+
+        Args:
+            snake_body (Iterable[List[int]]): The positions of the snake blocks in
+                pixels, head first.
+            direction (Optional[str], optional): The direction the snake is moving to.
+                Defaults to None which keeps the current direction.
+        """
+        self.body.clear()
+        self.occupied = bytearray(self.columns * self.rows)
+        for x, y in snake_body:
+            cell = self.cell_at(x, y)
+            self.body.append(cell)
+            self.occupied[cell] += 1
+        self.head_x = self.body[0] % self.columns
+        self.head_y = self.body[0] // self.columns
+        if direction is not None:
+            self.direction = direction
+        self._spawn_zone_key = None
+        self.update_spawn_zone()
+
+    def update_spawn_zone(self) -> None:
+        """Find the cells that food can be spawned in.
+
+        Food is never spawned in the first column, in the score box rows, in the big
+        food time bar rows, on walls or where the snake can't get to from the start
+        of the level. The free cells of this zone are kept in `free` and updated
+        while the snake moves, so spawning food never has to retry.
+        """
+        rect = self.score_box
+        top = 1 + (rect[1] + rect[3]) // BLOCK_SIZE
+        bottom = self.time_bar_y // BLOCK_SIZE - 1
+        key = (top, bottom, self.columns, self.rows)
+        if key == self._spawn_zone_key:
+            return
+        self._spawn_zone_key = key
+
+        columns = self.columns
+        self.spawn_zone = bytearray(columns * self.rows)
+        for y in range(max(top, 0), min(bottom, self.rows)):
+            self.spawn_zone[y * columns + 1:(y + 1) * columns] = b'\x01' * (columns - 1)
+        if self.level is not None:
+            # The cells of both are 0 or 1, so AND-ing them as big integers keeps the
+            # cells that are in both
+            size = len(self.spawn_zone)
+            self.spawn_zone = bytearray((
+                int.from_bytes(self.spawn_zone, 'little')
+                & int.from_bytes(self.level.open_cells, 'little')
+            ).to_bytes(size, 'little'))
+        occupied = self.occupied
+        self.free = FreeCells(
+            (
+                cell for cell, in_zone in enumerate(self.spawn_zone)
+                if in_zone and not occupied[cell]
+            ), columns * self.rows
+        )
+
+    def _push_head(self, cell: int) -> None:
+        if not self.occupied[cell]:
+            self.free.discard(cell)
+        self.occupied[cell] += 1
+        self.body.appendleft(cell)
+
+    def _pop_tail(self) -> None:
+        cell = self.body.pop()
+        self.occupied[cell] -= 1
+        if not self.occupied[cell] and self.spawn_zone[cell]:
+            self.free.add(cell)
+
+    def cell_at(self, x: int, y: int) -> int:
+        """Get the index of the cell at the given position in pixels."""
+        return ((y // self.block_size) % self.rows) * self.columns + (
+            (x // self.block_size) % self.columns
+        )
+
+    def position_of(self, cell: int) -> List[int]:
+        """Get the position of the given cell in pixels."""
+        return [
+            (cell % self.columns) * self.block_size,
+            (cell // self.columns) * self.block_size
+        ]
+
+    @property
+    def snake_pos(self) -> List[int]:
+        """The position of the snake head in pixels."""
+        return [self.head_x * self.block_size, self.head_y * self.block_size]
+
+    @property
+    def snake_body(self) -> List[List[int]]:
+        """The positions of the snake blocks in pixels, head first."""
+        return [self.position_of(cell) for cell in self.body]
+
+    @property
+    def food_pos(self) -> List[int]:
+        """The position of the food in pixels."""
+        return self.position_of(self.food)
+
+    @property
+    def big_food_pos(self) -> List[int]:
+        """The position of the top left block of the big food in pixels."""
+        return self.position_of(self.big_food)
+
+    def resize(self, frame_size_x: int, frame_size_y: int) -> None:
+        """Change the size of the game frame.
+
+        Args:
+            frame_size_x (int): The new width of the game frame.
+            frame_size_y (int): The new height of the game frame.
+
+        Raises:
+            ValueError: If the game is played on a level, which has a fixed size.
+        """
+        if self.level is not None:
+            raise ValueError('The board of a level cannot be resized')
+        snake_body = self.snake_body
+        food_pos = self.food_pos
+        big_food_pos = self.big_food_pos
+        block_size = self.block_size
+        self.frame_size_x = (frame_size_x // block_size) * block_size
+        self.frame_size_y = (frame_size_y // block_size) * block_size
+        self.columns = self.frame_size_x // block_size
+        self.rows = self.frame_size_y // block_size
+        # The blocks that are out of the new frame wrap around
+        self.place_snake(snake_body)
+        self.food = self.cell_at(*food_pos)
+        if self.food_spawn and (food_pos[0] > self.frame_size_x - block_size
+                                or food_pos[1] > self.frame_size_y - block_size):
+            self.food_spawn = False
+        self.big_food = self.cell_at(*big_food_pos)
+        if (big_food_pos[0] > self.frame_size_x - 2 * block_size
+                or big_food_pos[1] > self.frame_size_y - 2 * block_size):
+            self.big_food_time_left = 0
+
+    @classmethod
+    def from_cells(
+        cls, columns: int, rows: int, block_size: int = BLOCK_SIZE, **params
+    ) -> 'SnakeEngine':
+        """Make an engine with a board of the given number of cells.
+
+        Args:
+            columns (int): The number of columns of the board.
+            rows (int): The number of rows of the board.
+            block_size (int, optional): The size of each cell in pixels. Defaults to
+                BLOCK_SIZE.
+            **params: The other parameters of the engine.
+        """
+        return cls(
+            columns * block_size, rows * block_size, block_size=block_size, **params
+        )
+
+    def set_block_size(self, block_size: int) -> None:
+        """Change the size of the cells in pixels, e.g. to draw the board bigger or
+        smaller. Only the frame changes: the board and the rules stay the same.
+
+        Args:
+            block_size (int): The new size of each cell in pixels.
+        """
+        self.block_size = block_size
+        self.frame_size_x = self.columns * block_size
+        self.frame_size_y = self.rows * block_size
+
+    def get_state(self) -> GameState:
+        """Get a copy of the state of the game that can be loaded with `set_state`."""
+        return GameState(
+            columns=self.columns,
+            rows=self.rows,
+            block_size=self.block_size,
+            body=array('i', self.body),
+            direction=Direction[self.direction],
+            food=self.food,
+            food_spawn=self.food_spawn,
+            big_food=self.big_food,
+            big_food_shown=self._big_food_shown,
+            big_food_due=self._big_food_due,
+            time=self.time,
+            getting_big_score=self.getting_big_score,
+            score=self.score,
+            current_difficulty=self.current_difficulty,
+            eating_score=self.eating_score,
+            in_the_danger_zone=self.in_the_danger_zone,
+            done=self.done,
+            steps=self.steps,
+            free=self.free.copy(),
+            random_state=self.random.getstate()
+        )
+
+    def set_state(self, state: GameState) -> None:
+        """Continue the game from a state of `get_state`. The same moves after it
+        give the same game every time. The state can be loaded again later."""
+        self.block_size = state.block_size
+        self.columns = state.columns
+        self.rows = state.rows
+        self.frame_size_x = state.columns * state.block_size
+        self.frame_size_y = state.rows * state.block_size
+        self.body = deque(state.body)
+        self.occupied = occupied = bytearray(state.columns * state.rows)
+        for cell in state.body:
+            occupied[cell] += 1
+        self.head_x = state.body[0] % state.columns
+        self.head_y = state.body[0] // state.columns
+        self.direction = DIRECTIONS[state.direction]
+        self.food = state.food
+        self.food_spawn = state.food_spawn
+        self.big_food = state.big_food
+        self._big_food_shown = state.big_food_shown
+        self._big_food_due = state.big_food_due
+        self.time = state.time
+        self.getting_big_score = state.getting_big_score
+        self.score = state.score
+        self.current_difficulty = state.current_difficulty
+        self.eating_score = state.eating_score
+        self.in_the_danger_zone = state.in_the_danger_zone
+        self.done = state.done
+        self.steps = state.steps
+        self.random.setstate(state.random_state)
+        # The spawn zone only depends on the score and the board, but the free cells
+        # are copied to keep their order
+        self.update_spawn_zone()
+        self.free = state.free.copy()
+
+    def snapshot(self) -> Snapshot:
+        """Get an immutable copy of the game state."""
+        return Snapshot(
+            self.frame_size_x, self.frame_size_y, self.columns, self.rows,
+            self.block_size, tuple(self.body), bytes(self.occupied), self.food,
+            self.food_spawn, self.big_food, self.big_food_time_left, self.big_food_time,
+            self.direction, self.score, self.current_difficulty, self.eating_score,
+            self.in_the_danger_zone, self.done, self.steps
+        )
+
+    @property
+    def score_box(self) -> Tuple[int, int, int, int]:
+        """The (x, y, width, height) of the box around the score text in pixels, on
+        the board drawn with cells of BLOCK_SIZE pixels."""
+        key = (self.score, self.columns, self.rows)
+        if key != self._score_box_key:
+            width, height = self.measure_text('Score : ' + str(self.score))
+            x, y = self.columns * BLOCK_SIZE // 25, self.rows * BLOCK_SIZE // 25
+            self._score_box = (x - 5, y - 5, width + 10, height + 10)
+            self._score_box_key = key
+        return self._score_box
+
+    @property
+    def time_bar_y(self) -> int:
+        """The top of the big food time bar in pixels, on the board drawn with cells
+        of BLOCK_SIZE pixels."""
+        height = self.rows * BLOCK_SIZE
+        if self.big_food_chance > 0:
+            return (height * 19) // 20 - BAR_THICKNESS - 5
+        return height
+
+    @property
+    def big_food_time_left(self) -> float:
+        """The game time in seconds until the big food disappears, or 0 if there is
+        no big food."""
+        if self._big_food_shown:
+            return self._big_food_due - self.time
+        return 0
+
+    @big_food_time_left.setter
+    def big_food_time_left(self, seconds: float) -> None:
+        self._big_food_shown = seconds > 0
+        # Without a big food, the next spawn roll is due right away
+        self._big_food_due = self.time + max(seconds, 0)
+
+    @property
+    def step_time(self) -> float:
+        """The game time in seconds that the last step takes."""
+        if self.eating_score:
+            return 1 / self.base_difficulty
+        return 1 / self.current_difficulty
+
+    def step(self, action: Optional[str] = None) -> StepResult:
+        """Move the snake one block forward.
+
+        Args:
+            action (Optional[str], optional): The direction to turn to. The snake
+                cannot turn to the opposite direction instantaneously. Defaults to
+                None which keeps the current direction.
+
+        Returns:
+            StepResult: The change of the score and whether the game is over.
+        """
+        if self.done:
+            return StepResult(0, True)
+        # Making sure the snake cannot move in the opposite direction
+        # instantaneously
+        if action in OPPOSITE_DIRECTIONS and action != OPPOSITE_DIRECTIONS[
+                self.direction]:
+            self.direction = action
+        score = self.score
+        self.steps += 1
+        occupied = self.occupied
+
+        # Moving the snake and getting out of bounds
+        move_x, move_y = MOVES[self.direction]
+        x = self.head_x = (self.head_x + move_x) % self.columns
+        y = self.head_y = (self.head_y + move_y) % self.rows
+        head = y * self.columns + x
+
+        # Snake eating and growing mechanism
+        if self.food_spawn and head == self.food:
+            self.score += 1
+            self.food_spawn = False
+        elif self.getting_big_score > 0:
+            self.getting_big_score -= 1
+            self.score += 1
+        else:
+            self._pop_tail()
+        if self._big_food_shown:
+            if (x - self.big_food % self.columns in (0, 1)
+                    and y - self.big_food // self.columns in (0, 1)):
+                self.getting_big_score = self.big_food_score
+                self.big_food_time_left = 0
+                self.big_food = 0
+
+        # Game Over condition
+        # Touching the snake body or a wall
+        hit = occupied[head] > 0 or self.walls[head]
+        self._push_head(head)
+        if hit:
+            self.done = True
+            return StepResult(self.score - score, True)
+
+        rect = self.score_box
+        self.eating_score = False
+
+        # Decrease score if snake is in score box
+        if (self.score > 0 and 0 <= x * BLOCK_SIZE - rect[0] < rect[2]
+                and 0 <= y * BLOCK_SIZE - rect[1] < rect[3]):
+            self.eating_score = True
+            self.score -= 1
+            self._pop_tail()
+
+        # Set difficulty
+        self.current_difficulty = (
+            self.score * self.difficulty_modifier + self.base_difficulty
+        )
+
+        self.in_the_danger_zone = False
+        # Decrease score if snake is in Insane or GOD difficulty box
+        if self.score > 0 and self.current_difficulty >= 250:
+            self.in_the_danger_zone = True
+            self.score -= 1
+            self._pop_tail()
+
+        # Spawning food on the screen
+        if not self.food_spawn:
+            self.update_spawn_zone()
+            self.spawn_food()
+
+        if self.auto_big_food:
+            self.advance_big_food(self.step_time)
+
+        return StepResult(self.score - score, False)
+
+    def spawn_food(self) -> None:
+        """Place the food on a random free cell. If there is no free cell, no food is
+        placed until the snake moves out of the way."""
+        if self.free:
+            self.food = self.free.choice(self.random)
+            self.food_spawn = True
+
+    def _fits_big_food(self, cell: int) -> bool:
+        if cell % self.columns == self.columns - 1:
+            return False
+        free = self.free
+        food = self.food if self.food_spawn else -1
+        for block in (cell, cell + 1, cell + self.columns, cell + self.columns + 1):
+            if block >= len(free.index) or block not in free or block == food:
+                return False
+        return True
+
+    def spawn_big_food(self, attempts: int = 16) -> bool:
+        """Place a big food on a random spot that doesn't overlap the snake or the
+        food.
+
+        A few random free cells are tried first. If none of them fit a big food, all
+        free cells are checked, so this never loops forever on a crowded board.
+
+        Args:
+            attempts (int, optional): The number of random cells to try before checking
+                all of them. Defaults to 16.
+
+        Returns:
+            bool: Whether a big food was placed.
+        """
+        self.update_spawn_zone()
+        if not self.free:
+            return False
+        for _ in range(attempts):
+            cell = self.free.choice(self.random)
+            if self._fits_big_food(cell):
+                break
+        else:
+            cells = [cell for cell in self.free.cells if self._fits_big_food(cell)]
+            if not cells:
+                return False
+            cell = self.random.choice(cells)
+
+        self.big_food = cell
+        self.big_food_time_left = self.big_food_time
+        return True
+
+    def advance_big_food(self, seconds: float) -> None:
+        """Advance the game time and run the big food events that are due.
+
+        While there is no big food on the screen, there is a chance of spawning one
+        every second. A big food disappears after `big_food_time` seconds. Each event
+        happens at the exact game time it is scheduled for, however the time is
+        split between the calls, and the next one is scheduled from it.
+
+        Args:
+            seconds (float): The game time that has passed.
+        """
+        self.time += seconds
+        if not 0 < self.big_food_chance < 1:
+            return
+        while self._big_food_due <= self.time:
+            due = self._big_food_due
+            if self._big_food_shown:
+                # The big food disappears and a new one may spawn right away
+                self._big_food_shown = False
+            elif (self.random.random() <= self.big_food_chance
+                  and self.spawn_big_food()):
+                self._big_food_due = due + self.big_food_time
+            else:
+                self._big_food_due = due + 1
+
+
+class Scheduler:
+    """Runs the steps of an engine at the speed of the game.
+
+    The time that passes between two frames is added to an accumulator and as many
+    steps as fit in it are run, each one taking the engine's `step_time`. The steps
+    don't drift from the clock, no matter how the frame rate and the difficulty
+    compare.
+    """
+
+    def __init__(
+        self,
+        engine: SnakeEngine,
+        max_steps_per_frame: int = 64,
+        unthrottled: bool = False,
+        clock: Callable[[], float] = time.perf_counter,
+        step: Optional[Callable[[Optional[str]], StepResult]] = None
+    ) -> None:
+        """Scheduler class.
+
+        Args:
+            engine (SnakeEngine): The engine to run.
+            max_steps_per_frame (int, optional): The maximum number of steps to run in
+                a frame. If the game falls further behind, the rest of the time is
+                dropped instead of trying to catch up forever. Defaults to 64.
+            unthrottled (bool, optional): Ignore the clock and run
+                `max_steps_per_frame` steps every frame. Useful for benchmarks.
+                Defaults to False.
+            clock (Callable[[], float], optional): A monotonic clock in seconds.
+                Defaults to time.perf_counter.
+            step (Optional[Callable[[Optional[str]], StepResult]], optional): The
+                function that runs a step, e.g. the one of a replay recorder. Defaults
+                to None which uses the `step` of the engine.
+        """
+        self.engine = engine
+        self.step = step or engine.step
+        self.max_steps_per_frame = max_steps_per_frame
+        self.unthrottled = unthrottled
+        self.clock = clock
+        self.accumulator = 0.0
+        self._last_time: Optional[float] = None
+
+    def pause(self) -> None:
+        """Stop counting the time until `advance` is called again."""
+        self._last_time = None
+
+    def time_to_next_step(self) -> float:
+        """Get the time in seconds until the next step is due, or 0 if it already is
+        or the scheduler is unthrottled."""
+        if self.unthrottled:
+            return 0.0
+        elapsed = 0.0 if self._last_time is None else self.clock() - self._last_time
+        return max(0.0, self.engine.step_time - self.accumulator - elapsed)
+
+    def advance(self, action: Optional[str] = None) -> int:
+        """Run the steps that are due since the last call.
+
+        Args:
+            action (Optional[str], optional): The direction to turn to. Defaults to
+                None.
+
+        Returns:
+            int: The number of steps that were run.
+        """
+        if self.unthrottled:
+            steps = 0
+            while steps < self.max_steps_per_frame and not self.engine.done:
+                self.step(action)
+                steps += 1
+            return steps
+
+        now = self.clock()
+        if self._last_time is not None:
+            self.accumulator += now - self._last_time
+        self._last_time = now
+
+        steps = 0
+        while self.accumulator >= self.engine.step_time and not self.engine.done:
+            if steps == self.max_steps_per_frame:
+                self.accumulator = 0.0
+                break
+            self.accumulator -= self.engine.step_time
+            self.step(action)
+            steps += 1
+        return steps
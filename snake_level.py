@@ -0,0 +1,344 @@
+"""Levels: boards with walls.
+
+A level is a board of `columns x rows` cells with walls on some of them and a place
+to start the snake. It is saved in a compact binary file: one bit for each cell,
+followed by fields that are computed once when the level is made, so they never
+have to be computed while a game runs:
+
+* `components`: the number of the area of each cell. Two cells can be reached from
+  each other if they are in the same area. Walls are in area 0.
+* `distances`: the number of steps from the head of the snake at the start to each
+  cell, going around the walls, or `Level.unreachable`.
+
+Loading a level memory-maps the file. The walls are unpacked into a byte for each
+cell, since the engine checks them in every step, but the fields stay in the file,
+so only the parts of them that are used are read.
+
+Levels are made from text, with '#' for walls, '.' or ' ' for empty cells and one of
+'^', 'v', '<' or '>' for the head of the snake and its direction. The snake starts
+with two more blocks behind its head.
+
+Example:
+    python snake_level.py --source levels/rooms.txt --path levels/rooms.level
+    python snake-game.py --level levels/rooms.level
+"""
+
+import os
+import sys
+import mmap
+import struct
+from array import array
+from typing import List, Tuple, Union, Optional
+from collections import deque
+
+from snake_engine import MOVES, DIRECTIONS, OPPOSITE_DIRECTIONS
+
+# The direction of the snake for each character of a text level
+HEAD_CHARACTERS = {'^': 'UP', 'v': 'DOWN', '<': 'LEFT', '>': 'RIGHT'}
+
+# The bits of each byte, one byte for each bit, lowest bit first
+_UNPACKED = [bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]
+_PACKED = {bits: byte for byte, bits in enumerate(_UNPACKED)}
+
+
+def pack_bits(cells: bytes) -> bytes:
+    """Pack a byte of 0 or 1 for each cell into a bit for each cell."""
+    padded = bytes(cells) + bytes(-len(cells) % 8)
+    return bytes(_PACKED[padded[i:i + 8]] for i in range(0, len(padded), 8))
+
+
+def unpack_bits(bits: bytes, count: int) -> bytes:
+    """Unpack `count` bits into a byte of 0 or 1 for each of them."""
+    return b''.join([_UNPACKED[byte] for byte in bits])[:count]
+
+
+class Level:
+    """A board with walls and a place to start the snake.
+
+    The fields are `array`s, or memory views of the file when the level was loaded
+    with `load`, with an item for each cell, so they are read in O(1). The walls are
+    always bytes in memory.
+    """
+
+    MAGIC = b'SNAKELV1'
+    # The magic, columns, rows, start, direction and the item size of the fields
+    _HEADER = struct.Struct('<8sIIIBB2x')
+
+    def __init__(
+        self,
+        columns: int,
+        rows: int,
+        walls: bytes,
+        start: int,
+        direction: str = 'RIGHT'
+    ) -> None:
+        """Level class.
+
+        Args:
+            columns (int): The number of columns of the board.
+            rows (int): The number of rows of the board.
+            walls (bytes): 1 for each cell with a wall and 0 for the others.
+            start (int): The cell of the head of the snake at the start.
+            direction (str, optional): The direction the snake starts moving to.
+                Defaults to 'RIGHT'.
+
+        Raises:
+            ValueError: If `walls` doesn't have a byte for each cell or the snake
+                doesn't start on empty cells.
+        """
+        if len(walls) != columns * rows:
+            raise ValueError(
+                f'A {columns}x{rows} level needs {columns * rows} cells, not '
+                f'{len(walls)}'
+            )
+        self.columns = columns
+        self.rows = rows
+        self.start = start
+        self.direction = direction
+        self.path: Optional[str] = None
+        self._walls = bytes(1 if wall else 0 for wall in walls)
+        self._open_cells: Optional[bytes] = None
+        if any(self._walls[cell] for cell in self.body):
+            raise ValueError('The snake must start on empty cells')
+        self.components, self.distances = self._compute_fields()
+
+    @property
+    def typecode(self) -> str:
+        """The type of the items of the fields: 'H' for boards of less than 65535
+        cells and 'I' for bigger ones."""
+        return 'H' if self.columns * self.rows < 0xFFFF else 'I'
+
+    @property
+    def unreachable(self) -> int:
+        """The distance of the cells that can't be reached from the start."""
+        return 0xFFFF if self.typecode == 'H' else 0xFFFFFFFF
+
+    def next_cell(self, cell: int, direction: str) -> int:
+        """Get the cell next to a cell in a direction, wrapping around the board."""
+        move_x, move_y = MOVES[direction]
+        return ((cell // self.columns + move_y) % self.rows) * self.columns + (
+            (cell % self.columns + move_x) % self.columns
+        )
+
+    @property
+    def body(self) -> List[int]:
+        """The cells of the snake at the start, head first."""
+        behind = OPPOSITE_DIRECTIONS[self.direction]
+        body = [self.start]
+        for _ in range(2):
+            body.append(self.next_cell(body[-1], behind))
+        return body
+
+    def _compute_fields(self) -> Tuple[array, array]:
+        """Number the areas of the board and find the distances from the start with
+        breadth-first searches."""
+        columns, rows = self.columns, self.rows
+        cells = columns * rows
+        walls = self._walls
+        unreachable = self.unreachable
+
+        def neighbors(cell: int) -> Tuple[int, int, int, int]:
+            y, x = divmod(cell, columns)
+            return (
+                (y - 1) % rows * columns + x, (y + 1) % rows * columns + x,
+                y * columns + (x - 1) % columns, y * columns + (x + 1) % columns
+            )
+
+        components = array(self.typecode, bytes(cells * array(self.typecode).itemsize))
+        component = 0
+        for first in range(cells):
+            if walls[first] or components[first]:
+                continue
+            component += 1
+            components[first] = component
+            queue = deque((first,))
+            while queue:
+                for neighbor in neighbors(queue.popleft()):
+                    if not walls[neighbor] and not components[neighbor]:
+                        components[neighbor] = component
+                        queue.append(neighbor)
+
+        distances = array(self.typecode, [unreachable]) * cells
+        distances[self.start] = 0
+        queue = deque((self.start,))
+        while queue:
+            cell = queue.popleft()
+            distance = distances[cell] + 1
+            for neighbor in neighbors(cell):
+                if not walls[neighbor] and distances[neighbor] == unreachable:
+                    distances[neighbor] = distance
+                    queue.append(neighbor)
+        return components, distances
+
+    @property
+    def walls(self) -> bytes:
+        """1 for each cell with a wall and 0 for the others. The engine checks the
+        head against it in every step."""
+        return self._walls
+
+    @property
+    def open_cells(self) -> bytes:
+        """1 for each cell that can be reached from the start and 0 for the others.
+        Food is only spawned on these cells."""
+        if self._open_cells is None:
+            area = self.components[self.start]
+            self._open_cells = bytes(
+                component == area for component in self.components
+            )
+        return self._open_cells
+
+    def reachable(self, a: int, b: int) -> bool:
+        """Check whether a cell can be reached from another one, going around the
+        walls."""
+        return self.components[a] == self.components[b] != 0
+
+    def distance_from_start(self, cell: int) -> int:
+        """Get the number of steps from the start to a cell, going around the walls,
+        or -1 if it can't be reached."""
+        distance = self.distances[cell]
+        return -1 if distance == self.unreachable else distance
+
+    @classmethod
+    def from_text(cls, text: str) -> 'Level':
+        """Make a level from text. See the documentation of the module.
+
+        Raises:
+            ValueError: If the text has an unknown character or not exactly one head.
+        """
+        lines = [line.rstrip('\n') for line in text.splitlines()]
+        while lines and not lines[-1].strip():
+            lines.pop()
+        columns = max(len(line) for line in lines)
+        walls = bytearray(columns * len(lines))
+        start = None
+        direction = 'RIGHT'
+        for y, line in enumerate(lines):
+            for x, character in enumerate(line):
+                cell = y * columns + x
+                if character == '#':
+                    walls[cell] = 1
+                elif character in HEAD_CHARACTERS:
+                    if start is not None:
+                        raise ValueError('A level must have only one head')
+                    start, direction = cell, HEAD_CHARACTERS[character]
+                elif character not in '. ':
+                    raise ValueError(f'Unknown level character: {character!r}')
+        if start is None:
+            raise ValueError("A level needs a head: '^', 'v', '<' or '>'")
+        return cls(columns, len(lines), walls, start, direction)
+
+    def to_bytes(self) -> bytes:
+        """Get the level as bytes that `from_bytes` reads."""
+        bits = pack_bits(self._walls)
+        fields = []
+        for field in (self.components, self.distances):
+            field = array(self.typecode, field)
+            if sys.byteorder == 'big':
+                field.byteswap()
+            fields.append(field.tobytes())
+        return b''.join((
+            self._HEADER.pack(
+                self.MAGIC, self.columns, self.rows, self.start,
+                DIRECTIONS.index(self.direction), array(self.typecode).itemsize
+            ),
+            bits,
+            # The fields start on a multiple of 4 bytes
+            bytes(-(self._HEADER.size + len(bits)) % 4),
+            *fields
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, mmap.mmap]) -> 'Level':
+        """Read a level that was made with `to_bytes`. The fields are views of the
+        data, so they aren't copied, but the walls are unpacked into a byte for each
+        cell.
+
+        Raises:
+            ValueError: If the data is not a level.
+        """
+        if len(data) < cls._HEADER.size or data[:len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError('Not a Snake Eater level')
+        _, columns, rows, start, direction, itemsize = cls._HEADER.unpack_from(data)
+        cells = columns * rows
+        level = cls.__new__(cls)
+        level.columns = columns
+        level.rows = rows
+        level.start = start
+        level.direction = DIRECTIONS[direction]
+        level.path = None
+        level._open_cells = None
+
+        view = memoryview(data)
+        position = cls._HEADER.size
+        bits = view[position:position + (cells + 7) // 8]
+        position += len(bits) + (-(position + len(bits)) % 4)
+        if array(level.typecode).itemsize != itemsize or (
+                len(data) < position + 2 * cells * itemsize):
+            raise ValueError('The level file is damaged')
+        level._walls = unpack_bits(bits, cells)
+        fields = []
+        for _ in range(2):
+            field = view[position:position + cells * itemsize]
+            if sys.byteorder == 'big':
+                field = array(level.typecode, field)
+                field.byteswap()
+            else:
+                field = field.cast(level.typecode)
+            fields.append(field)
+            position += cells * itemsize
+        level.components, level.distances = fields
+        return level
+
+    @classmethod
+    def load(cls, path: str) -> 'Level':
+        """Memory-map a level file."""
+        with open(path, 'rb') as file:
+            if not os.fstat(file.fileno()).st_size:
+                raise ValueError('Not a Snake Eater level')
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        level = cls.from_bytes(data)
+        level.path = path
+        return level
+
+    def save(self, path: str) -> None:
+        """Save the level to a file and remember the path, so replays of games on it
+        can refer to it."""
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+        self.path = path
+
+    def __reduce__(self):
+        # Levels are copied to other processes as their file or their bytes
+        if self.path is not None:
+            return Level.load, (self.path,)
+        return Level.from_bytes, (self.to_bytes(),)
+
+
+def main(source: str, path: str):
+    """Make a level file from a text level.
+
+    Args:
+        source (str): The text level.
+        path (str): The level file to make.
+    """
+    import log21
+
+    with open(source) as file:
+        level = Level.from_text(file.read())
+    level.save(path)
+    open_cells = sum(level.open_cells)
+    farthest = max(
+        (distance for distance in level.distances if distance != level.unreachable),
+        default=0
+    )
+    log21.info(
+        f'Saved a {level.columns}x{level.rows} level with {sum(level.walls)} walls, '
+        f'{open_cells} cells the snake can reach and {max(level.components)} areas '
+        f'to {path} ({os.path.getsize(path):,} bytes). The farthest cell is '
+        f'{farthest} steps away from the start.'
+    )
+
+
+if __name__ == '__main__':
+    import log21
+    log21.argumentify(main)
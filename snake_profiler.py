@@ -0,0 +1,162 @@
+"""Measure how long each part of a frame takes.
+
+Example:
+    profiler = Profiler()
+    with profiler.section('draw'):
+        draw()
+    print(profiler.summary()['draw']['p99'])
+"""
+
+import csv
+import json
+import time
+from array import array
+from typing import Dict, List, Callable
+from contextlib import nullcontext
+
+
+class RollingStats:
+    """Keeps the last durations of a phase to find their percentiles."""
+
+    __slots__ = ('samples', 'count', 'index', 'total', 'max')
+
+    def __init__(self, window: int = 600) -> None:
+        """Rolling Stats class.
+
+        Args:
+            window (int, optional): The number of last durations to keep. Defaults to
+                600, which is 10 seconds at 60 frames per second.
+        """
+        self.samples = array('d', bytes(8 * window))
+        self.count = 0
+        self.index = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Add a duration."""
+        self.samples[self.index] = seconds
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentiles(self, *percents: float) -> List[float]:
+        """Get percentiles of the durations in the window, in seconds."""
+        samples = sorted(self.samples[:min(self.count, len(self.samples))])
+        if not samples:
+            return [0.0] * len(percents)
+        return [
+            samples[min(int(len(samples) * percent / 100), len(samples) - 1)]
+            for percent in percents
+        ]
+
+    def summary(self) -> Dict[str, float]:
+        """Get the count, the mean and the maximum of all the durations and the median
+        and the 99th percentile of the ones in the window, in milliseconds."""
+        p50, p99 = self.percentiles(50, 99)
+        return {
+            'count': self.count,
+            'mean': self.total / self.count * 1000 if self.count else 0.0,
+            'p50': p50 * 1000,
+            'p99': p99 * 1000,
+            'max': self.max * 1000
+        }
+
+
+class _Section:
+    """Times a `with` block and adds the time to the stats of a phase."""
+
+    __slots__ = ('stats', 'clock', 'start')
+
+    def __init__(self, stats: RollingStats, clock: Callable[[], float]) -> None:
+        self.stats = stats
+        self.clock = clock
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = self.clock()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stats.add(self.clock() - self.start)
+
+
+class Profiler:
+    """Times the phases of the game."""
+
+    enabled = True
+
+    def __init__(
+        self, window: int = 600, clock: Callable[[], float] = time.perf_counter
+    ) -> None:
+        """Profiler class.
+
+        Args:
+            window (int, optional): The number of last durations to keep for each
+                phase. Defaults to 600.
+            clock (Callable[[], float], optional): A monotonic clock in seconds.
+                Defaults to time.perf_counter.
+        """
+        self.window = window
+        self.clock = clock
+        self.stats: Dict[str, RollingStats] = {}
+        self._sections: Dict[str, _Section] = {}
+
+    def section(self, name: str) -> _Section:
+        """Time a `with` block as a part of a phase."""
+        section = self._sections.get(name)
+        if section is None:
+            section = self._sections[name] = _Section(
+                self.stats.setdefault(name, RollingStats(self.window)), self.clock
+            )
+        return section
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add a duration that was measured some other way to a phase."""
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = RollingStats(self.window)
+        stats.add(seconds)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Get the summary of each phase. See `RollingStats.summary`."""
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def export(self, path: str) -> None:
+        """Save the summary to a file. Files ending with '.csv' are saved as CSV,
+        others as JSON."""
+        summary = self.summary()
+        with open(path, 'w', newline='') as file:
+            if not path.lower().endswith('.csv'):
+                json.dump(summary, file, indent=2)
+                return
+            writer = csv.writer(file)
+            writer.writerow(['phase', 'count', 'mean', 'p50', 'p99', 'max'])
+            for name, stats in summary.items():
+                writer.writerow([
+                    name, stats['count'], stats['mean'], stats['p50'], stats['p99'],
+                    stats['max']
+                ])
+
+
+class NullProfiler:
+    """A profiler that measures nothing, used when profiling is off. A `with` block
+    costs about as much as an empty function call."""
+
+    enabled = False
+    _section = nullcontext()
+
+    def section(self, name: str) -> nullcontext:
+        """Do nothing for a `with` block."""
+        return self._section
+
+    def add(self, name: str, seconds: float) -> None:
+        """Do nothing."""
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Get an empty summary."""
+        return {}
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,304 @@
+"""Rendering helpers for Snake Eater."""
+
+import os
+import json
+import threading
+from typing import (
+    Dict, List, Tuple, Union, Callable, Hashable, Iterable, Optional, Sequence
+)
+from collections import OrderedDict
+
+import pygame
+
+FontName = Union[str, bytes, Iterable[Union[str, bytes]]]
+
+# Where the paths of the system fonts are saved between runs
+FONT_CACHE_FILE = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'snake-eater', 'fonts.json'
+)
+
+
+class FontPaths:
+    """Finds the files of system fonts and saves them between runs.
+
+    Finding a font the first time makes PyGame list all the system fonts, which may
+    take a long time on systems with many fonts. The paths that were found are
+    saved in `path`, so the next runs only check that the files still exist. Fonts
+    that are not found are saved too, as None, and use the default font of PyGame.
+    Delete the file to find newly installed fonts.
+    """
+
+    def __init__(self, path: Optional[str] = FONT_CACHE_FILE) -> None:
+        """Font Paths class.
+
+        Args:
+            path (Optional[str], optional): The file to save the paths in or None to
+                not save them. Defaults to FONT_CACHE_FILE.
+        """
+        self.path = path
+        self.paths: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path) as file:
+                    self.paths = json.load(file)
+            except (OSError, ValueError):
+                pass
+
+    @staticmethod
+    def _key(font: FontName) -> str:
+        if isinstance(font, (str, bytes)):
+            font = font.split(b',' if isinstance(font, bytes) else ',')
+        return ','.join(
+            name.decode() if isinstance(name, bytes) else name for name in font
+        )
+
+    def get(self, font: FontName) -> Optional[str]:
+        """Get the file of a font.
+
+        Args:
+            font (FontName): The name of the font or a list of names to try.
+
+        Returns:
+            Optional[str]: The path of the first font that is found or None if none
+                of them is found.
+        """
+        key = self._key(font)
+        with self._lock:
+            if key in self.paths:
+                path = self.paths[key]
+                if path is None or os.path.exists(path):
+                    return path
+            path = self.paths[key] = pygame.font.match_font(key.split(','))
+            self.save()
+        return path
+
+    def preload(self, fonts: Iterable[FontName]) -> threading.Thread:
+        """Find fonts on a background thread, so they are ready when they are
+        needed. `get` waits for the font that is being found."""
+        thread = threading.Thread(
+            target=lambda: [self.get(font) for font in fonts], daemon=True
+        )
+        thread.start()
+        return thread
+
+    def save(self) -> None:
+        """Save the paths in `path`."""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + '.tmp', 'w') as file:
+                json.dump(self.paths, file)
+            os.replace(self.path + '.tmp', self.path)
+        except OSError:
+            pass
+
+
+class TextCache:
+    """Caches the fonts and the rendered texts, so that the fonts are looked up and
+    the texts are rendered only once instead of every frame."""
+
+    def __init__(
+        self, max_size: int = 64, font_paths: Optional[FontPaths] = None
+    ) -> None:
+        """Text Cache class.
+
+        Args:
+            max_size (int, optional): The maximum number of rendered texts to keep.
+                The least recently used texts are dropped first. Defaults to 64.
+            font_paths (Optional[FontPaths], optional): Where the files of the fonts
+                are found. Defaults to None which uses a new `FontPaths()`.
+        """
+        self.max_size = max_size
+        self.font_paths = font_paths or FontPaths()
+        self.fonts: Dict[Tuple, pygame.font.Font] = {}
+        self.surfaces: 'OrderedDict[Tuple, pygame.Surface]' = OrderedDict()
+
+    @staticmethod
+    def _font_key(font: FontName) -> Union[str, bytes, Tuple]:
+        if isinstance(font, (str, bytes)):
+            return font
+        return tuple(font)
+
+    def font(self, font: FontName, size: int) -> pygame.font.Font:
+        """Get a system font.
+
+        Args:
+            font (FontName): The name of the font or a list of names to try.
+            size (int): The size of the font.
+        """
+        key = (self._font_key(font), size)
+        result = self.fonts.get(key)
+        if result is None:
+            result = self.fonts[key] = pygame.font.Font(
+                self.font_paths.get(font), size
+            )
+        return result
+
+    def render(
+        self, text: str, font: FontName, size: int, color: pygame.Color
+    ) -> pygame.Surface:
+        """Get a rendered text.
+
+        Args:
+            text (str): The text to render.
+            font (FontName): The name of the font or a list of names to try.
+            size (int): The size of the font.
+            color (pygame.Color): The color of the text.
+        """
+        key = (text, self._font_key(font), size, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.surfaces[key] = self.font(font, size).render(text, True, color)
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self) -> None:
+        """Drop all the cached fonts and texts."""
+        self.fonts.clear()
+        self.surfaces.clear()
+
+
+class LayerCache:
+    """Caches the parts of the window that only change when it is resized, so they
+    are drawn once and then only blitted.
+
+    The layers are transparent where nothing is drawn on them, so what is under
+    them still shows.
+    """
+
+    # The color of the transparent parts of the layers. It is not used by the game.
+    TRANSPARENT = pygame.Color(255, 0, 255)
+
+    def __init__(self) -> None:
+        """Layer Cache class."""
+        self.surfaces: Dict[Hashable, pygame.Surface] = {}
+
+    def get(
+        self, key: Hashable, size: Tuple[int, int],
+        draw: Callable[[pygame.Surface], object]
+    ) -> pygame.Surface:
+        """Get a layer, drawing it first if it is not cached.
+
+        Args:
+            key (Hashable): What the layer looks like, e.g. its name and its size.
+            size (Tuple[int, int]): The size of the layer.
+            draw (Callable[[pygame.Surface], object]): A function that draws the layer
+                on a transparent surface.
+        """
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert()
+            surface.fill(self.TRANSPARENT)
+            draw(surface)
+            surface.set_colorkey(self.TRANSPARENT, pygame.RLEACCEL)
+            self.surfaces[key] = surface
+        return surface
+
+    def clear(self) -> None:
+        """Drop all the layers, e.g. when the window is resized."""
+        self.surfaces.clear()
+
+
+class CellRenderer:
+    """Draws many cells of the same color in one batched call instead of one
+    `pygame.draw.rect` call for each.
+
+    Small sets of cells are blitted from a cached tile with `Surface.fblits` (or
+    `Surface.blits` on versions of PyGame that don't have it). When the cells cover
+    a large part of the board, the occupancy grid itself is turned into a tiny
+    8-bit surface and scaled up, which takes the same time however many cells there
+    are.
+    """
+
+    def __init__(self, color: pygame.Color, block_size: int) -> None:
+        """Cell Renderer class.
+
+        Args:
+            color (pygame.Color): The color of the cells.
+            block_size (int): The width and the height of a cell in pixels.
+        """
+        self.color = color
+        self.block_size = block_size
+        self.tile = pygame.Surface((block_size, block_size))
+        self.tile.fill(color)
+        self._tile_converted = False
+        # An empty cell is black and a cell with any number of blocks has the color
+        self.palette = [(0, 0, 0)] + [tuple(color)] * 255
+        self._size: Tuple[int, int] = (0, 0)
+        self._positions: List[Tuple[int, int]] = []
+
+    def positions(self, columns: int, rows: int) -> List[Tuple[int, int]]:
+        """Get the position in pixels of each cell of a board."""
+        if self._size != (columns, rows):
+            self._size = (columns, rows)
+            block_size = self.block_size
+            self._positions = [
+                (x * block_size, y * block_size) for y in range(rows)
+                for x in range(columns)
+            ]
+        return self._positions
+
+    def draw_cells(
+        self, surface: pygame.Surface, cells: Iterable[int], columns: int, rows: int
+    ) -> None:
+        """Draw the given cells by blitting the tile on each of them."""
+        if not self._tile_converted and pygame.display.get_surface() is not None:
+            self.tile = self.tile.convert()
+            self._tile_converted = True
+        positions = self.positions(columns, rows)
+        tile = self.tile
+        if hasattr(surface, 'fblits'):
+            surface.fblits([(tile, positions[cell]) for cell in cells])
+        else:
+            surface.blits([(tile, positions[cell]) for cell in cells], False)
+
+    def draw_grid(
+        self,
+        surface: pygame.Surface,
+        occupied: bytes,
+        columns: int,
+        rows: int,
+        background: bool = True
+    ) -> None:
+        """Draw the whole board from its occupancy grid. The empty cells are drawn
+        black, or left as they are without `background`."""
+        grid = pygame.image.frombuffer(occupied, (columns, rows), 'P')
+        grid.set_palette(self.palette)
+        if not background:
+            grid.set_colorkey(self.palette[0])
+        surface.blit(
+            pygame.transform.scale(
+                grid, (columns * self.block_size, rows * self.block_size)
+            ), (0, 0)
+        )
+
+    def draw(
+        self, surface: pygame.Surface, cells: Sequence[int], occupied: bytes,
+        columns: int, rows: int, background: bool = True
+    ) -> None:
+        """Draw the cells on a black background in the fastest way.
+
+        Args:
+            surface (pygame.Surface): The surface to draw on.
+            cells (Sequence[int]): The cells to draw.
+            occupied (bytes): The number of blocks in each cell of the board. It must
+                agree with `cells`.
+            columns (int): The number of columns of the board.
+            rows (int): The number of rows of the board.
+            background (bool, optional): Whether the empty cells may be drawn black.
+                False keeps what is under them, e.g. the walls of a level. Defaults
+                to True.
+        """
+        if len(cells) * 3 >= columns * rows:
+            self.draw_grid(surface, occupied, columns, rows, background)
+        else:
+            self.draw_cells(surface, cells, columns, rows)
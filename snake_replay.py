@@ -0,0 +1,297 @@
+"""Record games and replay them headlessly.
+
+A replay keeps the seed and the parameters of a game and the moves of the player.
+Since everything else in a game comes from its seed, playing the moves again gives
+the same game. A game on a level keeps the path of the level file, which must be
+there when the replay is played.
+
+The file starts with `MAGIC`, then the length of a JSON header as a varint and the
+header itself, then the events. Each event is a varint of `steps << 3 | kind`, where
+`steps` is the number of steps since the previous event without a turn:
+    * kind 0-3: Turn to a direction in `DIRECTIONS` on the next step.
+    * kind 4: The frame was resized. Two varints follow: the width and the height.
+    * kind 7: The end of the game.
+
+Example:
+    python snake-game.py --seed 42 --record game.snake
+    python snake_replay.py --path game.snake
+"""
+
+import sys
+import json
+import time
+from typing import Any, Dict, List, Tuple, Iterator, Optional, NamedTuple
+
+from snake_level import Level
+from snake_engine import DIRECTIONS, StepResult, SnakeEngine, estimate_text_size
+
+# The version changes when the same seed and moves give a different game
+MAGIC = b'SNAKERP3'
+
+RESIZE = 4
+END = 7
+
+
+def write_varint(buffer: bytearray, value: int) -> None:
+    """Append an unsigned integer to a buffer using as few bytes as possible."""
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    """Read an unsigned integer that was written by `write_varint`.
+
+    Returns:
+        Tuple[int, int]: The integer and the position after it.
+    """
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class ReplayEvent(NamedTuple):
+    """Something that happened in a game after `steps` steps without a turn."""
+    steps: int
+    kind: int
+    size: Optional[Tuple[int, int]] = None
+
+
+class ReplayRecorder:
+    """Records the moves of a game played with its `engine`.
+
+    Use `step` and `resize` of the recorder instead of the ones of the engine, so
+    that they are recorded. The size of the cells only changes how the game is drawn,
+    so it isn't recorded.
+    """
+
+    def __init__(
+        self, seed: int, measure_text=estimate_text_size, **params: Any
+    ) -> None:
+        """Replay Recorder class.
+
+        Args:
+            seed (int): The seed of the game.
+            measure_text (optional): The function that measures the score text.
+                Defaults to estimate_text_size.
+            **params: The other parameters of the engine, e.g. `frame_size_x` or
+                `big_food_chance`.
+
+        Raises:
+            ValueError: If the level is not a file, so the replay can't refer to it.
+        """
+        level = params.get('level')
+        if level is not None and level.path is None:
+            raise ValueError('Only games on levels loaded from files can be recorded')
+        self.params = params
+        self.seed = seed
+        self._measure_text = measure_text
+        self.text_sizes: Dict[str, Tuple[int, int]] = {}
+        self.events = bytearray()
+        self._steps = 0
+        self.engine = SnakeEngine(seed=seed, measure_text=self.measure_text, **params)
+
+    def measure_text(self, text: str) -> Tuple[int, int]:
+        """Measure a text and remember its size for the replay."""
+        size = self.text_sizes.get(text)
+        if size is None:
+            size = self.text_sizes[text] = tuple(self._measure_text(text))
+        return size
+
+    def step(self, action: Optional[str] = None) -> StepResult:
+        """Run a step of the engine and record the turn, if the snake turned."""
+        direction = self.engine.direction
+        result = self.engine.step(action)
+        if self.engine.direction != direction:
+            write_varint(
+                self.events, self._steps << 3 | DIRECTIONS.index(self.engine.direction)
+            )
+            self._steps = 0
+        else:
+            self._steps += 1
+        return result
+
+    def resize(self, frame_size_x: int, frame_size_y: int) -> None:
+        """Resize the frame of the engine and record it."""
+        self.engine.resize(frame_size_x, frame_size_y)
+        write_varint(self.events, self._steps << 3 | RESIZE)
+        write_varint(self.events, frame_size_x)
+        write_varint(self.events, frame_size_y)
+        self._steps = 0
+
+    def to_bytes(self) -> bytes:
+        """Get the replay of the game so far."""
+        params = dict(self.params)
+        if params.get('level') is not None:
+            params['level'] = params['level'].path
+        header = {
+            'params': params,
+            'seed': self.seed,
+            'text_sizes': self.text_sizes,
+            'steps': self.engine.steps,
+            'score': self.engine.score
+        }
+        header = json.dumps(header, separators=(',', ':')).encode()
+        data = bytearray(MAGIC)
+        write_varint(data, len(header))
+        data += header
+        data += self.events
+        write_varint(data, self._steps << 3 | END)
+        return bytes(data)
+
+    def save(self, path: str) -> None:
+        """Save the replay of the game so far to a file."""
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+
+class Replay:
+    """A recorded game."""
+
+    def __init__(
+        self, header: Dict[str, Any], events: List[ReplayEvent]
+    ) -> None:
+        """Replay class.
+
+        Args:
+            header (Dict[str, Any]): The parameters, the seed, the measured score text
+                sizes, the number of steps and the score of the game.
+            events (List[ReplayEvent]): The events of the game.
+        """
+        self.header = header
+        self.events = events
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'Replay':
+        """Read a replay that was made with `ReplayRecorder.to_bytes`.
+
+        Raises:
+            ValueError: If the data is not a replay of this version of the game.
+        """
+        if not data.startswith(MAGIC):
+            if data.startswith(MAGIC[:-1]):
+                raise ValueError('The replay was made by another version of the game')
+            raise ValueError('Not a Snake Eater replay')
+        length, position = read_varint(data, len(MAGIC))
+        header = json.loads(data[position:position + length])
+        position += length
+
+        events = []
+        while True:
+            value, position = read_varint(data, position)
+            steps, kind = value >> 3, value & 7
+            if kind == RESIZE:
+                width, position = read_varint(data, position)
+                height, position = read_varint(data, position)
+                events.append(ReplayEvent(steps, kind, (width, height)))
+            else:
+                events.append(ReplayEvent(steps, kind))
+            if kind == END:
+                return cls(header, events)
+
+    @classmethod
+    def load(cls, path: str) -> 'Replay':
+        """Read a replay file."""
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+    def measure_text(self, text: str) -> Tuple[int, int]:
+        """Get the size of a score text as it was measured in the recorded game."""
+        size = self.header['text_sizes'].get(text)
+        if size is None:
+            return estimate_text_size(text)
+        return tuple(size)
+
+    def engine_params(self) -> Dict[str, Any]:
+        """Get the parameters of the engine of the recorded game, with its level
+        loaded."""
+        params = dict(self.header['params'])
+        if params.get('level') is not None:
+            params['level'] = Level.load(params['level'])
+        return params
+
+    def new_engine(self) -> SnakeEngine:
+        """Make an engine with the seed and the parameters of the recorded game."""
+        return SnakeEngine(
+            seed=self.header['seed'], measure_text=self.measure_text,
+            **self.engine_params()
+        )
+
+    def play(self, engine: Optional[SnakeEngine] = None) -> Iterator[SnakeEngine]:
+        """Play the game again one step at a time, e.g. to draw each step.
+
+        Args:
+            engine (Optional[SnakeEngine], optional): The engine to play on. It must
+                be like a `new_engine()`. Defaults to None which makes one.
+
+        Yields:
+            SnakeEngine: The engine before the first step and after each step.
+        """
+        engine = engine or self.new_engine()
+        yield engine
+        for event in self.events:
+            for _ in range(event.steps):
+                engine.step()
+                yield engine
+            if event.kind == RESIZE:
+                engine.resize(*event.size)
+            elif event.kind != END:
+                engine.step(DIRECTIONS[event.kind])
+                yield engine
+
+    def simulate(self) -> SnakeEngine:
+        """Play the game again headlessly, as fast as possible.
+
+        Returns:
+            SnakeEngine: The engine at the end of the game.
+        """
+        engine = self.new_engine()
+        step = engine.step
+        for event in self.events:
+            for _ in range(event.steps):
+                step()
+            if event.kind == RESIZE:
+                engine.resize(*event.size)
+            elif event.kind != END:
+                step(DIRECTIONS[event.kind])
+        return engine
+
+    def verify(self) -> bool:
+        """Check that playing the game again gives the recorded score and steps."""
+        engine = self.simulate()
+        return (
+            engine.score == self.header['score']
+            and engine.steps == self.header['steps']
+        )
+
+
+def main(path: str):
+    """Play a replay again headlessly and check that it gives the recorded score.
+
+    Args:
+        path (str): The replay file.
+    """
+    replay = Replay.load(path)
+    start = time.perf_counter()
+    engine = replay.simulate()
+    elapsed = time.perf_counter() - start
+    print(f'Seed: {replay.header["seed"]}')
+    print(f'Steps: {engine.steps:,} in {elapsed:.3f}s '
+          f'({engine.steps / max(elapsed, 1e-9):,.0f}/s)')
+    print(f'Score: {engine.score} (recorded: {replay.header["score"]})')
+    if engine.score != replay.header['score'] or engine.steps != replay.header['steps']:
+        import log21
+        log21.error('The replay does not match the recorded game!')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    # log21 is only imported here, so the game doesn't wait for it to start
+    import log21
+    log21.argumentify(main)
@@ -0,0 +1,215 @@
+"""Run many headless games on all CPU cores and collect their results.
+
+Example:
+    python snake_runner.py --games 1000 --big-food-chance 0.1
+"""
+
+import sys
+import time
+import random
+import itertools
+from typing import (Any, Dict, List, Tuple, Callable, Iterator, Optional, Sequence,
+                    NamedTuple)
+from multiprocessing import Pool
+
+import log21
+
+from snake_level import Level
+from snake_engine import DIRECTIONS, SnakeEngine
+from snake_autopilot import Autopilot
+
+# A function that gets the engine and a random number generator of its own and
+# returns the direction to take
+Policy = Callable[[SnakeEngine, random.Random], Optional[str]]
+
+
+class GameResult(NamedTuple):
+    """The result of a single game."""
+    seed: int
+    score: int
+    length: int
+    steps: int
+
+
+def random_policy(engine: SnakeEngine, rng: random.Random) -> Optional[str]:
+    """Turn to a random direction in one of every ten steps."""
+    if rng.random() < 0.1:
+        return rng.choice(DIRECTIONS)
+    return None
+
+
+def simulate(
+    seed: int,
+    policy: Policy = random_policy,
+    max_steps: int = 10000,
+    **params: Any
+) -> GameResult:
+    """Play a headless game until it is over.
+
+    Args:
+        seed (int): The seed of the game. The same seed, policy and parameters always
+            give the same result.
+        policy (Policy, optional): The function that plays the game. Defaults to
+            random_policy.
+        max_steps (int, optional): Stop the game after this number of steps. Defaults
+            to 10000.
+        **params: The parameters of the game, the same ones that `main()` of
+            snake-game.py accepts, e.g. `base_difficulty` or `big_food_chance`.
+
+    Returns:
+        GameResult: The result of the game.
+    """
+    engine = SnakeEngine(seed=seed, **params)
+    # The policy has its own random number generator, so it doesn't change what the
+    # engine does with the same moves
+    rng = random.Random(f'policy-{seed}')
+    while not engine.done and engine.steps < max_steps:
+        engine.step(policy(engine, rng))
+    return GameResult(seed, engine.score, len(engine.body), engine.steps)
+
+
+def _simulate_batch(
+    task: Tuple[int, Dict[str, Any], Sequence[int], Policy, int]
+) -> Tuple[int, List[Tuple[int, int, int, int]]]:
+    index, params, seeds, policy, max_steps = task
+    return index, [tuple(simulate(seed, policy, max_steps, **params)) for seed in seeds]
+
+
+def grid(**values: Sequence[Any]) -> List[Dict[str, Any]]:
+    """Get every combination of the given parameter values.
+
+    Example:
+        >>> grid(base_difficulty=[10, 20], big_food_chance=[0, 0.1])
+        [{'base_difficulty': 10, 'big_food_chance': 0}, ...]
+    """
+    return [
+        dict(zip(values, combination))
+        for combination in itertools.product(*values.values())
+    ]
+
+
+def sweep(
+    settings: Sequence[Dict[str, Any]],
+    seeds: Sequence[int],
+    policy: Policy = random_policy,
+    max_steps: int = 10000,
+    processes: Optional[int] = None,
+    batch_size: int = 64
+) -> Iterator[Tuple[Dict[str, Any], GameResult]]:
+    """Play a game for every seed with every setting on a pool of processes.
+
+    The games are sent to the processes in batches and the results are sent back in
+    batches as soon as they are ready, so they come in no particular order.
+
+    Args:
+        settings (Sequence[Dict[str, Any]]): The parameters of the games, e.g. from
+            `grid()`.
+        seeds (Sequence[int]): The seeds of the games to play with each setting.
+        policy (Policy, optional): The function that plays the games. It must be
+            picklable, e.g. a function defined at the top level of a module. Defaults
+            to random_policy.
+        max_steps (int, optional): The maximum number of steps of each game. Defaults
+            to 10000.
+        processes (Optional[int], optional): The number of processes. Defaults to None
+            which uses all CPU cores.
+        batch_size (int, optional): The number of games in each batch. Defaults to 64.
+
+    Yields:
+        Tuple[Dict[str, Any], GameResult]: The setting and the result of each game.
+    """
+    tasks = [(index, params, seeds[i:i + batch_size], policy, max_steps)
+             for index, params in enumerate(settings)
+             for i in range(0, len(seeds), batch_size)]
+    with Pool(processes) as pool:
+        for index, results in pool.imap_unordered(_simulate_batch, tasks):
+            for result in results:
+                yield settings[index], GameResult(*result)
+
+
+def run_games(
+    seeds: Sequence[int],
+    params: Optional[Dict[str, Any]] = None,
+    policy: Policy = random_policy,
+    max_steps: int = 10000,
+    processes: Optional[int] = None,
+    batch_size: int = 64
+) -> Iterator[GameResult]:
+    """Play a game for every seed with the same parameters on a pool of processes.
+
+    See `sweep()` for the arguments.
+    """
+    for _, result in sweep([params or {}], seeds, policy, max_steps, processes,
+                           batch_size):
+        yield result
+
+
+def main(
+    games: int = 1000,
+    seed: int = 0,
+    processes: int = 0,
+    max_steps: int = 10000,
+    frame_size_x: int = 720,
+    frame_size_y: int = 480,
+    base_difficulty: float = 10,
+    difficulty_modifier: float = 2.5,
+    big_food_chance: float = 0.02,
+    big_food_score: int = 3,
+    big_food_time: float = 6,
+    autopilot: bool = False,
+    level: Optional[str] = None
+):
+    """Play many headless games and show their stats.
+
+    Args:
+        games (int): The number of games to play. (default: 1000)
+        seed (int): The seed of the first game. The games use consecutive seeds.
+            (default: 0)
+        processes (int): The number of processes. 0 uses all CPU cores. (default: 0)
+        max_steps (int): The maximum number of steps of each game. (default: 10000)
+        frame_size_x (int): The width of the game frame. (default: 720)
+        frame_size_y (int): The height of the game frame. (default: 480)
+        base_difficulty (float): The base difficulty of the game. (default: 10)
+        difficulty_modifier (float): The difficulty modifier of the game. (default: 2.5)
+        big_food_chance (float): The chance of a big food spawning. (default: 0.02)
+        big_food_score (int): The score to earn for eating a BIG FOOD. (default: 3)
+        big_food_time (float): The time in seconds for a big food to stay. (default: 6)
+        autopilot (bool): Play with the autopilot instead of the random policy.
+            (default: False)
+        level (Optional[str]): Play on a level file made with snake_level.py. The
+            frame is the size of the level.
+    """
+    if games < 1:
+        log21.error(f'games must be at least 1, not {games}')
+        sys.exit(1)
+    params = {
+        'frame_size_x': frame_size_x,
+        'frame_size_y': frame_size_y,
+        'base_difficulty': base_difficulty,
+        'difficulty_modifier': difficulty_modifier,
+        'big_food_chance': big_food_chance,
+        'big_food_score': big_food_score,
+        'big_food_time': big_food_time,
+        'level': Level.load(level) if level else None
+    }
+    start = time.perf_counter()
+    results = list(
+        run_games(
+            range(seed, seed + games), params,
+            policy=Autopilot() if autopilot else random_policy,
+            max_steps=max_steps,
+            processes=processes or None
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    steps = sum(result.steps for result in results)
+    print(f'Games: {len(results)} in {elapsed:.2f}s ({len(results) / elapsed:,.0f}/s)')
+    print(f'Steps: {steps:,} ({steps / elapsed:,.0f}/s)')
+    print(f'Score: mean {sum(r.score for r in results) / len(results):.2f}, '
+          f'max {max(r.score for r in results)}')
+    print(f'Length: mean {sum(r.length for r in results) / len(results):.2f}')
+    print(f'Steps survived: mean {steps / len(results):.1f}')
+
+
+if __name__ == '__main__':
+    log21.argumentify(main)
@@ -0,0 +1,6 @@
+"""Shared setup of the tests: the game is drawn without a window."""
+
+import os
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
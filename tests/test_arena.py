@@ -0,0 +1,31 @@
+"""Tests of the arena with many snakes."""
+
+import pytest
+
+from snake_arena import EMPTY, GRID_SNAKE, SNAKE_COLORS, ArenaEngine, GreedyBot
+
+
+def test_colors():
+    arena = ArenaEngine(20, 20, food_count=0, seed=0)
+    assert arena.place_snake([2, 1, 0]).color == 0
+    snake = arena.place_snake([22, 21, 20], color=SNAKE_COLORS - 1)
+    assert arena.grid[22] == 255 and arena.owner[22] == snake.id
+    with pytest.raises(ValueError):
+        arena.place_snake([42, 41, 40], color=SNAKE_COLORS)
+
+
+def test_many_snakes_keep_their_cells():
+    arena = ArenaEngine(120, 80, food_count=20, seed=1)
+    for i in range(600):
+        arena.add_snake(color=1 + i % (SNAKE_COLORS - 1))
+    bot = GreedyBot(seed=1)
+    for _ in range(50):
+        arena.step({snake.id: bot(arena, snake) for snake in arena.living})
+    owners = {}
+    for snake in arena.living:
+        assert snake.color != 0
+        for cell in snake.body:
+            owners[cell] = snake.id
+            assert arena.grid[cell] == GRID_SNAKE + snake.color
+    for cell, owner in enumerate(arena.owner):
+        assert owner == owners.get(cell, EMPTY)
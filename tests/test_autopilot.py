@@ -0,0 +1,65 @@
+"""Tests of the autopilot."""
+
+import random
+
+import pytest
+
+from snake_level import Level
+from snake_engine import SnakeEngine
+from snake_autopilot import Autopilot, cell_set, cycle_next, cycle_path
+
+
+@pytest.mark.parametrize('columns', range(1, 9))
+@pytest.mark.parametrize('rows', range(1, 9))
+def test_cycle_next_follows_cycle_path(columns, rows):
+    path = cycle_path(columns, rows)
+    for x in range(columns):
+        for y in range(rows):
+            following = cycle_next(columns, rows, x, y)
+            if path is None:
+                assert following is None
+            else:
+                assert following == path[(path.index((x, y)) + 1) % len(path)]
+
+
+def test_cell_set():
+    assert cell_set(b'') == 0
+    assert cell_set(b'\x01\x00\x01\x01') == 0b1101
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_cell_set_of_the_snake_follows_it(seed):
+    engine = SnakeEngine(seed=seed, big_food_chance=0.3)
+    autopilot = Autopilot()
+    rng = random.Random(seed)
+    states = []
+    while not engine.done and engine.steps < 1500:
+        if rng.random() < 0.01:
+            states.append(engine.get_state())
+        elif states and rng.random() < 0.005:
+            engine.set_state(states.pop())
+        direction = autopilot(engine)
+        assert autopilot._body_bits == cell_set(map(bool, engine.occupied))
+        engine.step(direction)
+    assert not engine.done
+
+
+def test_food_in_another_area_is_not_searched_for():
+    level = Level.from_text(
+        '#' * 40 + '\n' + '\n'.join('#' + '.' * 30 + '#...#...#' for _ in range(20))
+        + '\n' + '#' + '.' * 9 + '>' + '.' * 20 + '#########\n' + '#' * 40
+    )
+    engine = SnakeEngine(
+        level.columns * 10, level.rows * 10, level=level, big_food_chance=0
+    )
+    engine.food = 2 * level.columns + 33
+    autopilot = Autopilot()
+    searches = []
+
+    def search(*args):
+        searches.append(args[1])
+        return Autopilot._search(autopilot, *args)
+
+    autopilot._search = search
+    assert autopilot(engine) is not None
+    assert searches and not any(wanted >> engine.food & 1 for wanted in searches)
@@ -0,0 +1,31 @@
+"""Tests of the NumPy batch environment."""
+
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from snake_batch import BatchSnakeEnv  # noqa: E402
+from snake_engine import DIRECTIONS, SnakeEngine  # noqa: E402
+from snake_autopilot import Autopilot  # noqa: E402
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_steps_match_the_engine(seed):
+    engine = SnakeEngine(big_food_chance=0, seed=seed)
+    env = BatchSnakeEnv(1, big_food_chance=0, seed=seed)
+    autopilot = Autopilot()
+    rng = random.Random(seed)
+    while not engine.done:
+        # The food is spawned with another random number generator
+        env.food[0] = engine.food
+        # Mostly eat the food, sometimes make a random turn
+        direction = autopilot(engine) if rng.random() < 0.9 else rng.choice(DIRECTIONS)
+        result = engine.step(direction)
+        rewards, dones = env.step([DIRECTIONS.index(direction) if direction else -1])
+        assert rewards[0] == result.reward
+        assert dones[0] == result.done
+        assert env.score[0] == engine.score
+        assert bytes(env.occupied[0]) == bytes(engine.occupied)
+    assert engine.steps > 100
@@ -0,0 +1,74 @@
+"""Tests of the frame capture."""
+
+import os
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import pygame  # noqa: E402
+
+from snake_capture import GifWriter, lzw_encode  # noqa: E402
+
+
+def lzw_decode(data: bytes, min_code_size: int = 8) -> bytes:
+    """Decompress the color indices of a GIF image, as GIF readers do."""
+    clear = 1 << min_code_size
+    bits = int.from_bytes(data, 'little')
+    position = 0
+    code_size = min_code_size + 1
+    table = []
+    previous = None
+    out = bytearray()
+    while True:
+        code = bits >> position & ((1 << code_size) - 1)
+        position += code_size
+        if code == clear:
+            table = [bytes((i,)) for i in range(clear)] + [b'', b'']
+            code_size = min_code_size + 1
+            previous = None
+            continue
+        if code == clear + 1:
+            return bytes(out)
+        if code < len(table):
+            entry = table[code]
+        else:
+            assert code == len(table) and previous is not None
+            entry = previous + previous[:1]
+        out += entry
+        if previous is not None and len(table) < 4096:
+            table.append(previous + entry[:1])
+        previous = entry
+        if len(table) == 1 << code_size and code_size < 12:
+            code_size += 1
+
+
+@pytest.mark.parametrize('data', [
+    bytes(1),
+    bytes(range(256)),
+    bytes(100000),
+    b'abcabcabcd' * 5000,
+    bytes(random.Random(0).randrange(256) for _ in range(50000)),
+    bytes(random.Random(1).randrange(4) for _ in range(200000)),
+], ids=['one', 'all', 'zeros', 'repeated', 'random', 'few colors'])
+def test_lzw_round_trip(data):
+    assert lzw_decode(lzw_encode(data)) == data
+
+
+def test_gif_first_frame(tmp_path):
+    path = os.path.join(tmp_path, 'game.gif')
+    frames = np.zeros((3, 20, 30, 3), dtype=np.uint8)
+    frames[0, 5:10, 5:10] = (0, 255, 0)
+    frames[1, 5:10, 6:11] = (0, 255, 0)
+    frames[2, 15:, :] = (255, 255, 255)
+    writer = GifWriter(path)
+    writer.open((30, 20))
+    for frame in frames:
+        writer.write(frame)
+    writer.close()
+
+    image = pygame.image.load(path)
+    assert image.get_size() == (30, 20)
+    assert image.get_at((7, 7))[:3] == (0, 255, 0)
+    assert image.get_at((20, 2))[:3] == (0, 0, 0)
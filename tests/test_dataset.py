@@ -0,0 +1,31 @@
+"""Tests of the trajectory datasets."""
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from snake_engine import DIRECTIONS  # noqa: E402
+from snake_autopilot import Autopilot  # noqa: E402
+from snake_dataset import TrajectoryDataset, record_games  # noqa: E402
+
+
+def test_every_game_ends_with_done_or_truncated(tmp_path):
+    autopilot = Autopilot()
+
+    def policy(engine, rng):
+        # Mostly eat the food, sometimes make a random turn, so some games end
+        return autopilot(engine) if rng.random() < 0.9 else rng.choice(DIRECTIONS)
+
+    steps = record_games(
+        str(tmp_path), range(6), policy, max_steps=300, chunk_size=64
+    )
+    batch = next(TrajectoryDataset(str(tmp_path)).minibatches(steps))
+    done, truncated = batch['done'], batch['truncated']
+    ends = np.flatnonzero(done | truncated)
+    assert len(ends) == 6 and ends[-1] == steps - 1
+    assert done.any() and truncated.any()
+    assert not (done & truncated).any()
+    # Only the games that reached the maximum number of steps are truncated
+    lengths = np.diff(ends, prepend=-1)
+    assert (lengths[truncated[ends]] == 300).all()
+    assert (lengths[done[ends]] < 300).all()
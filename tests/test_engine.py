@@ -0,0 +1,61 @@
+"""Tests of the headless engine."""
+
+import random
+
+import pytest
+
+from snake_engine import DIRECTIONS, GameState, SnakeEngine
+
+
+def play(engine, rng, steps):
+    """Play random moves and return the score and the body after them."""
+    for _ in range(steps):
+        if engine.done:
+            break
+        engine.step(rng.choice(DIRECTIONS + (None,) * 4))
+    return engine.score, list(engine.body)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_state_bytes_round_trip(seed):
+    engine = SnakeEngine(seed=seed, big_food_chance=0.3)
+    play(engine, random.Random(seed), 300)
+    state = engine.get_state()
+    assert GameState.from_bytes(state.to_bytes()) == state
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_set_state_rolls_back(seed):
+    engine = SnakeEngine(seed=seed, big_food_chance=0.3)
+    play(engine, random.Random(seed), 100)
+    state = engine.get_state()
+    first = play(engine, random.Random('moves'), 500)
+
+    engine.set_state(GameState.from_bytes(state.to_bytes()))
+    assert play(engine, random.Random('moves'), 500) == first
+
+
+@pytest.mark.parametrize('block_size', [1, 3, 25])
+def test_block_size_does_not_change_the_game(block_size):
+    engine = SnakeEngine(seed=2, big_food_chance=0.3)
+    scaled = SnakeEngine(seed=2, big_food_chance=0.3)
+    play(engine, random.Random(2), 100)
+    play(scaled, random.Random(2), 100)
+    scaled.set_block_size(block_size)
+    assert scaled.score_box == engine.score_box
+    assert scaled.spawn_zone == engine.spawn_zone
+    assert play(scaled, random.Random(3), 1000) == play(engine, random.Random(3), 1000)
+
+
+def test_copy_does_not_share_the_body():
+    engine = SnakeEngine(seed=0)
+    state = engine.get_state()
+    copy = state.copy()
+    copy.body.append(0)
+    assert copy != state
+    assert len(state.body) == 3
+
+
+def test_from_bytes_refuses_other_data():
+    with pytest.raises(ValueError):
+        GameState.from_bytes(b'not a state')
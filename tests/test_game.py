@@ -0,0 +1,49 @@
+"""Tests of drawing the game."""
+
+import os
+import importlib.util
+
+import pytest
+
+from snake_level import Level
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def snake_game():
+    """Import snake-game.py, which cannot be imported by name."""
+    spec = importlib.util.spec_from_file_location(
+        'snake_game', os.path.join(ROOT, 'snake-game.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_long_snake_keeps_the_walls(snake_game):
+    # A snake this long is drawn from the occupancy grid, whose empty cells must not
+    # cover the walls
+    game = snake_game.SnakeGame(
+        level=Level.load(os.path.join(ROOT, 'levels', 'rooms.level')), seed=1
+    )
+    engine = game.engine
+    walls = engine.level.walls
+    body = tuple(cell for cell in range(len(walls)) if not walls[cell])[:1200]
+    occupied = bytearray(len(walls))
+    for cell in body:
+        occupied[cell] = 1
+    game.snapshot = engine.snapshot()._replace(body=body, occupied=bytes(occupied))
+    game.redraw()
+    game.do_drawings()
+
+    def color(cell):
+        middle = engine.block_size // 2
+        return game.game_window.get_at((
+            cell % engine.columns * engine.block_size + middle,
+            cell // engine.columns * engine.block_size + middle
+        ))[:3]
+
+    assert walls[0]
+    assert color(0) == snake_game.GRAY[:3]
+    assert color(body[0]) == snake_game.GREEN[:3]
@@ -0,0 +1,84 @@
+"""Tests of levels."""
+
+import os
+import pickle
+import random
+
+import pytest
+
+from snake_level import Level, pack_bits, unpack_bits
+from snake_engine import SnakeEngine
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEXT = """\
+##########
+#..>.#...#
+#....#...#
+######...#
+#........#
+##########
+"""
+
+
+@pytest.mark.parametrize('count', [0, 1, 7, 8, 9, 100, 3456])
+def test_pack_bits_round_trip(count):
+    cells = bytes(random.Random(count).randrange(2) for _ in range(count))
+    bits = pack_bits(cells)
+    assert len(bits) == (count + 7) // 8
+    assert unpack_bits(bits, count) == cells
+
+
+def test_pack_bits_lowest_bit_first():
+    assert pack_bits(b'\x01\x00\x00\x00\x00\x00\x00\x00\x01') == b'\x01\x01'
+
+
+def test_from_text():
+    level = Level.from_text(TEXT)
+    assert (level.columns, level.rows) == (10, 6)
+    assert level.start == 13 and level.direction == 'RIGHT'
+    assert level.body == [13, 12, 11]
+    assert level.reachable(11, 14)
+    assert not level.reachable(11, 16)
+    assert not level.reachable(0, 11)
+    assert level.distance_from_start(11) == 2
+    assert level.distance_from_start(16) == -1
+    assert sum(level.open_cells) == 8
+
+
+def test_bytes_round_trip():
+    level = Level.from_text(TEXT)
+    loaded = Level.from_bytes(level.to_bytes())
+    assert (loaded.columns, loaded.rows, loaded.start, loaded.direction) == (
+        level.columns, level.rows, level.start, level.direction
+    )
+    assert loaded.walls == level.walls
+    assert list(loaded.components) == list(level.components)
+    assert list(loaded.distances) == list(level.distances)
+
+
+def test_from_bytes_refuses_damaged_data():
+    data = Level.from_text(TEXT).to_bytes()
+    with pytest.raises(ValueError):
+        Level.from_bytes(b'not a level')
+    with pytest.raises(ValueError):
+        Level.from_bytes(data[:-1])
+
+
+def test_saved_level_is_loaded_and_pickled(tmp_path):
+    level = Level.from_text(TEXT)
+    path = os.path.join(tmp_path, 'small.level')
+    level.save(path)
+    loaded = pickle.loads(pickle.dumps(Level.load(path)))
+    assert loaded.path == path
+    assert list(loaded.distances) == list(level.distances)
+
+
+def test_food_spawns_where_the_snake_can_go():
+    level = Level.load(os.path.join(ROOT, 'levels', 'rooms.level'))
+    engine = SnakeEngine(
+        level.columns * 10, level.rows * 10, level=level, big_food_chance=0
+    )
+    for seed in range(20):
+        engine.reset(seed)
+        assert level.open_cells[engine.food]
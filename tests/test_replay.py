@@ -0,0 +1,61 @@
+"""Tests of recording and replaying games."""
+
+import random
+
+import pytest
+
+from snake_engine import DIRECTIONS
+from snake_replay import MAGIC, Replay, ReplayRecorder, read_varint, write_varint
+
+
+def record(seed, steps=500, **params):
+    """Record a game of random moves."""
+    recorder = ReplayRecorder(seed, **params)
+    rng = random.Random(seed)
+    while not recorder.engine.done and recorder.engine.steps < steps:
+        if recorder.engine.steps == 200:
+            recorder.resize(500, 400)
+        recorder.step(rng.choice(DIRECTIONS + (None,) * 4))
+    return recorder
+
+
+def test_varint_round_trip():
+    data = bytearray()
+    values = [0, 1, 127, 128, 300, 2 ** 21, 2 ** 40]
+    for value in values:
+        write_varint(data, value)
+    position = 0
+    for value in values:
+        read, position = read_varint(data, position)
+        assert read == value
+    assert position == len(data)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_replay_gives_the_same_game(seed):
+    recorder = record(seed, big_food_chance=0.2)
+    replay = Replay.from_bytes(recorder.to_bytes())
+    assert replay.verify()
+    assert replay.simulate().get_state() == recorder.engine.get_state()
+
+
+def test_replay_plays_every_step():
+    recorder = record(1)
+    replay = Replay.from_bytes(recorder.to_bytes())
+    engines = replay.play()
+    assert next(engines).steps == 0
+    assert sum(1 for _ in engines) == recorder.engine.steps
+
+
+def test_verify_finds_another_score():
+    replay = Replay.from_bytes(record(2).to_bytes())
+    replay.header['score'] += 1
+    assert not replay.verify()
+
+
+def test_other_versions_are_refused():
+    data = record(3).to_bytes()
+    with pytest.raises(ValueError, match='another version'):
+        Replay.from_bytes(MAGIC[:-1] + b'1' + data[len(MAGIC):])
+    with pytest.raises(ValueError, match='Not a Snake Eater replay'):
+        Replay.from_bytes(b'not a replay')